@@ -0,0 +1,96 @@
+import argparse
+from expenses_opt.constants import SolverBackend
+from expenses_opt.benchmarks.generator import START_DATE, random_portfolio
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.exceptions import InfeasibleProblemException
+
+
+def time_backend(
+    num_expenses: int,
+    iterations: int,
+    backend: SolverBackend,
+    num_threads: int = None,
+    relative_gap: float = None,
+    max_time: float = 60000,
+    seed: int = 0,
+) -> dict:
+    portfolio = random_portfolio(
+        num_expenses=num_expenses, iterations=iterations, seed=seed
+    )
+    parameters = OptmizationParameters(
+        priority_exponent=2,
+        deviation_weight=1,
+        max_time=max_time,
+        vectorized=True,
+        solver=backend,
+        num_threads=num_threads,
+        relative_gap=relative_gap,
+    )
+
+    optimizer = Optimizer(portfolio, parameters, START_DATE)
+    try:
+        solution = optimizer.solve_optimization_problem()
+    except InfeasibleProblemException:
+        solution = None
+
+    return {
+        "backend": backend.value,
+        "threads": num_threads,
+        "expenses": num_expenses,
+        "iterations": iterations,
+        "build_time": solution.timings["build"] if solution else None,
+        "solve_time": solution.timings["solve"] if solution else None,
+        "status": solution.status if solution else None,
+        "objective": solution.objective_value if solution else None,
+    }
+
+
+def main(argv: list[str] = None) -> list[dict]:
+    parser = argparse.ArgumentParser(
+        description="Solve time and objective of each solver backend on the same inputs"
+    )
+    parser.add_argument("--expenses", type=int, nargs="+", default=[200, 1000])
+    parser.add_argument("--iterations", type=int, default=12)
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=[backend.value for backend in SolverBackend],
+        choices=[backend.value for backend in SolverBackend],
+    )
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--relative-gap", type=float, default=None)
+    parser.add_argument("--max-time", type=float, default=60000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = list()
+    print(
+        f"{'backend':>8} {'N':>6} {'build (s)':>10} {'solve (s)':>10} "
+        f"{'objective':>12}"
+    )
+    for num_expenses in args.expenses:
+        for backend in args.backends:
+            result = time_backend(
+                num_expenses=num_expenses,
+                iterations=args.iterations,
+                backend=SolverBackend(backend),
+                num_threads=args.threads,
+                relative_gap=args.relative_gap,
+                max_time=args.max_time,
+                seed=args.seed,
+            )
+            results.append(result)
+            if result["status"] is None:
+                print(f"{backend:>8} {num_expenses:>6} {'no solution':>34}")
+                continue
+            print(
+                f"{backend:>8} {num_expenses:>6} {result['build_time']:>10.3f} "
+                f"{result['solve_time']:>10.3f} {result['objective']:>12.4f}"
+            )
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
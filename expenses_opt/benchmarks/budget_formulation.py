@@ -0,0 +1,86 @@
+import argparse
+import time
+from expenses_opt.constants import BudgetFormulation
+from expenses_opt.benchmarks.generator import START_DATE, random_portfolio
+from expenses_opt.optimization.builder import (
+    OptimizerBuilder,
+    OptmizationParameters,
+)
+from expenses_opt.optimization.vectorized import VectorizedOptimizerBuilder
+
+
+def time_formulation(
+    num_expenses: int,
+    iterations: int,
+    formulation: BudgetFormulation,
+    vectorized: bool = False,
+    max_time: float = 60000,
+) -> dict:
+    portfolio = random_portfolio(num_expenses=num_expenses, iterations=iterations)
+    parameters = OptmizationParameters(
+        priority_exponent=2,
+        deviation_weight=0,
+        max_time=max_time,
+        vectorized=vectorized,
+        budget_formulation=formulation,
+    )
+    builder_class = VectorizedOptimizerBuilder if vectorized else OptimizerBuilder
+    builder = builder_class(portfolio, parameters, START_DATE)
+
+    start = time.perf_counter()
+    solver = builder.build_optimization_problem()
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    status = solver.Solve()
+    solve_time = time.perf_counter() - start
+
+    return {
+        "formulation": formulation.value,
+        "expenses": num_expenses,
+        "iterations": iterations,
+        "constraints": solver.NumConstraints(),
+        "variables": solver.NumVariables(),
+        "build_time": build_time,
+        "solve_time": solve_time,
+        "status": status,
+        "objective": solver.Objective().Value(),
+    }
+
+
+def main(argv: list[str] = None) -> list[dict]:
+    parser = argparse.ArgumentParser(
+        description="Build and solve time of the budget formulations against M"
+    )
+    parser.add_argument("--expenses", type=int, default=200)
+    parser.add_argument("--iterations", type=int, nargs="+", default=[6, 12, 24, 36])
+    parser.add_argument("--vectorized", action="store_true")
+    parser.add_argument("--max-time", type=float, default=60000)
+    args = parser.parse_args(argv)
+
+    results = list()
+    print(
+        f"{'formulation':>12} {'M':>4} {'rows':>7} {'build (s)':>10} "
+        f"{'solve (s)':>10} {'objective':>12}"
+    )
+    for iterations in args.iterations:
+        for formulation in BudgetFormulation:
+            result = time_formulation(
+                num_expenses=args.expenses,
+                iterations=iterations,
+                formulation=formulation,
+                vectorized=args.vectorized,
+                max_time=args.max_time,
+            )
+            results.append(result)
+            print(
+                f"{result['formulation']:>12} {iterations:>4} "
+                f"{result['constraints']:>7} {result['build_time']:>10.3f} "
+                f"{result['solve_time']:>10.3f} {result['objective']:>12.4f}"
+            )
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
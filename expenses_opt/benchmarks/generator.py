@@ -0,0 +1,92 @@
+import random
+import pendulum
+from expenses_opt.constants import Priority
+from expenses_opt.models.expense import (
+    Expense,
+    ExpenseRange,
+    parse_expenses_to_dict,
+)
+from expenses_opt.models.portfolio import Budget, Portfolio
+
+START_DATE = pendulum.date(2023, 1, 1)
+
+
+def random_portfolio(
+    num_expenses: int,
+    iterations: int,
+    seed: int = 0,
+    recurrence: int = 30,
+    budget_ratio: float = 0.6,
+    mandatory_ratio: float = 0.1,
+    due_spread: float = 1.0,
+) -> Portfolio:
+    # budget_ratio is the budget over the total target spend, lower is tighter,
+    # and due dates are drawn from the first due_spread fraction of the horizon
+    rng = random.Random(seed)
+
+    expenses: list[Expense] = list()
+    for index in range(num_expenses):
+        minimum = rng.uniform(10, 500)
+        target = minimum * rng.uniform(1, 2)
+        maximum = target * rng.uniform(1, 1.5)
+        due_in_days = rng.randint(0, int(due_spread * iterations * recurrence))
+
+        expenses.append(
+            Expense(
+                description=f"Expense {index:05d}",
+                due_date=START_DATE.add(days=due_in_days),
+                priority=rng.choice(list(Priority)),
+                range=ExpenseRange(minimum=minimum, maximum=maximum, target=target),
+                mandatory=rng.random() < mandatory_ratio,
+            )
+        )
+
+    # budget_ratio of the total target spend, spread over the iterations
+    total_target = sum(expense.range.target for expense in expenses)
+    recorrent = budget_ratio * total_target / iterations
+    budget = Budget(
+        initial=recorrent,
+        recorrent=recorrent,
+        recurrence=recurrence,
+        last_recurrence=0,
+        iterations=iterations,
+    )
+
+    return Portfolio(expenses=expenses, budget=budget)
+
+
+def random_raw_data(
+    num_expenses: int,
+    iterations: int,
+    seed: int = 0,
+    recurrence: int = 30,
+    budget_ratio: float = 0.6,
+    mandatory_ratio: float = 0.1,
+    due_spread: float = 1.0,
+    optimization_parameters: dict = None,
+) -> dict:
+    # same portfolio as random_portfolio, in the JSON input format
+    portfolio = random_portfolio(
+        num_expenses=num_expenses,
+        iterations=iterations,
+        seed=seed,
+        recurrence=recurrence,
+        budget_ratio=budget_ratio,
+        mandatory_ratio=mandatory_ratio,
+        due_spread=due_spread,
+    )
+    budget = portfolio.budget
+
+    return {
+        "start_date": str(START_DATE),
+        "budget": {
+            "initial": budget.initial,
+            "recorrent": budget.recorrent,
+            "recurrence": budget.recurrence,
+            "last_recurrence": str(START_DATE.subtract(days=budget.last_recurrence)),
+            "iterations": budget.iterations,
+        },
+        "optimization_parameters": optimization_parameters
+        or {"priority_exponent": 2, "deviation_weight": 0, "max_time": 60000},
+        "expenses": parse_expenses_to_dict(portfolio.expenses)["expenses"],
+    }
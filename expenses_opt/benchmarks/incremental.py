@@ -0,0 +1,61 @@
+import argparse
+import time
+from expenses_opt.benchmarks.generator import START_DATE, random_portfolio
+from expenses_opt.models.portfolio import Portfolio
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.optimizer import Optimizer
+
+
+def main(argv: list[str] = None) -> dict:
+    parser = argparse.ArgumentParser(
+        description="Incremental re-solve against a cold build and solve"
+    )
+    parser.add_argument("--expenses", type=int, default=300)
+    parser.add_argument("--iterations", type=int, default=12)
+    parser.add_argument("--vectorized", action="store_true")
+    parser.add_argument("--max-time", type=float, default=60000)
+    args = parser.parse_args(argv)
+
+    portfolio = random_portfolio(num_expenses=args.expenses, iterations=args.iterations)
+    new_expense = random_portfolio(
+        num_expenses=1, iterations=args.iterations, seed=1
+    ).expenses[0]
+    parameters = OptmizationParameters(
+        priority_exponent=2,
+        deviation_weight=0,
+        max_time=args.max_time,
+        vectorized=args.vectorized,
+    )
+
+    optimizer = Optimizer(portfolio, parameters, START_DATE)
+    optimizer.solve_optimization_problem()
+
+    start = time.perf_counter()
+    optimizer.add_expense(new_expense)
+    optimizer.remove_expense(0)
+    incremental = optimizer.solve_optimization_problem()
+    incremental_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    changed = Portfolio(expenses=optimizer.expenses, budget=portfolio.budget)
+    cold = Optimizer(changed, parameters, START_DATE).solve_optimization_problem()
+    cold_time = time.perf_counter() - start
+
+    result = {
+        "expenses": args.expenses,
+        "iterations": args.iterations,
+        "incremental_time": incremental_time,
+        "cold_time": cold_time,
+        "incremental_objective": incremental.objective_value,
+        "cold_objective": cold.objective_value,
+    }
+    print(
+        f"incremental: {incremental_time:.3f} s, cold: {cold_time:.3f} s "
+        f"(objective {incremental.objective_value:.4f} / {cold.objective_value:.4f})"
+    )
+
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import time
+from expenses_opt.benchmarks.generator import START_DATE, random_portfolio
+from expenses_opt.exceptions import InfeasibleProblemException
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.rolling import RollingHorizonOptimizer
+
+
+def compare_rolling_horizon(
+    num_expenses: int,
+    iterations: int,
+    rolling_horizon: int,
+    seed: int = 0,
+    budget_ratio: float = 0.6,
+    max_time: float = 60000,
+) -> dict:
+    portfolio = random_portfolio(
+        num_expenses=num_expenses,
+        iterations=iterations,
+        seed=seed,
+        budget_ratio=budget_ratio,
+    )
+    parameters = OptmizationParameters(
+        priority_exponent=2,
+        deviation_weight=0.2,
+        max_time=max_time,
+        vectorized=True,
+        rolling_horizon=rolling_horizon,
+    )
+
+    result = {
+        "expenses": num_expenses,
+        "iterations": iterations,
+        "rolling_horizon": rolling_horizon,
+    }
+    for name, optimizer_class in (
+        ("full", Optimizer),
+        ("rolling", RollingHorizonOptimizer),
+    ):
+        start = time.perf_counter()
+        try:
+            solution = optimizer_class(
+                portfolio, parameters, START_DATE
+            ).solve_optimization_problem()
+            objective = solution.objective_value
+        except InfeasibleProblemException:
+            # the full model may find nothing in the time given
+            objective = None
+        result[f"{name}_time"] = time.perf_counter() - start
+        result[f"{name}_objective"] = objective
+
+    result["speedup"] = result["full_time"] / result["rolling_time"]
+    full, rolling = result["full_objective"], result["rolling_objective"]
+    result["loss"] = (
+        (rolling - full) / abs(full) if full and rolling is not None else None
+    )
+
+    return result
+
+
+def main(argv: list[str] = None) -> list[dict]:
+    parser = argparse.ArgumentParser(
+        description="Time and objective of the rolling horizon against the full model"
+    )
+    parser.add_argument("--expenses", type=int, nargs="+", default=[200, 1000])
+    parser.add_argument("--iterations", type=int, nargs="+", default=[24, 60])
+    parser.add_argument("--rolling-horizon", type=int, default=6)
+    parser.add_argument("--budget-ratio", type=float, default=0.6)
+    parser.add_argument("--max-time", type=float, default=60000)
+    args = parser.parse_args(argv)
+
+    results = list()
+    print(
+        f"{'N':>6} {'M':>4} {'full (s)':>9} {'rolling (s)':>12} {'speedup':>8} "
+        f"{'full':>12} {'rolling':>12} {'loss':>8}"
+    )
+    for num_expenses in args.expenses:
+        for iterations in args.iterations:
+            result = compare_rolling_horizon(
+                num_expenses=num_expenses,
+                iterations=iterations,
+                rolling_horizon=args.rolling_horizon,
+                budget_ratio=args.budget_ratio,
+                max_time=args.max_time,
+            )
+            results.append(result)
+            print(
+                f"{num_expenses:>6} {iterations:>4} {result['full_time']:>9.2f} "
+                f"{result['rolling_time']:>12.2f} {result['speedup']:>7.2f}x "
+                f"{_format(result['full_objective']):>12} "
+                f"{_format(result['rolling_objective']):>12} "
+                f"{_format(result['loss'], '.2%'):>8}"
+            )
+
+    return results
+
+
+def _format(value, spec: str = ".4f") -> str:
+    return "-" if value is None else format(value, spec)
+
+
+if __name__ == "__main__":
+    main()
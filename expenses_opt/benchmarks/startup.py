@@ -0,0 +1,69 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# wall time budget of a validate call, interpreter start included, in seconds
+STARTUP_BUDGET = 0.5
+
+# modules only a solve needs, a validate call must not import them
+SOLVER_MODULES = ["ortools", "scipy", "expenses_opt.optimization.builder"]
+
+
+def loaded_modules(command: list[str]) -> list[str]:
+    # solver modules imported by an expenses-opt command, in a fresh interpreter
+    script = (
+        "import sys\n"
+        "from expenses_opt.cli import main\n"
+        f"main({command!r})\n"
+        f"print(','.join(m for m in {SOLVER_MODULES!r} if m in sys.modules))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    # the last line, after what the command printed
+    return [module for module in output.splitlines()[-1].split(",") if module]
+
+
+def time_startup(command: list[str], repeat: int = 5) -> dict:
+    # wall time of `python -m expenses_opt.cli <command>`, the way batch jobs
+    # start it, and of a bare interpreter for reference
+    def wall_time(args: list[str]) -> float:
+        start = time.perf_counter()
+        subprocess.run(args, capture_output=True)
+        return time.perf_counter() - start
+
+    cli = [sys.executable, "-m", "expenses_opt.cli"] + command
+    bare = [sys.executable, "-c", "pass"]
+
+    return {
+        "command": " ".join(command),
+        "time": statistics.median(wall_time(cli) for _ in range(repeat)),
+        "interpreter": statistics.median(wall_time(bare) for _ in range(repeat)),
+    }
+
+
+def main(argv: list[str] = None) -> dict:
+    parser = argparse.ArgumentParser(
+        description="Time the start of a validate call against its budget"
+    )
+    parser.add_argument("input", help="JSON input to validate")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET)
+    args = parser.parse_args(argv)
+
+    command = ["validate", args.input]
+    result = time_startup(command, repeat=args.repeat)
+    result["loaded"] = loaded_modules(command)
+    result["budget"] = args.budget
+    print(json.dumps(result, indent=2))
+
+    if result["time"] > args.budget or result["loaded"]:
+        raise SystemExit(1)
+    return result
+
+
+if __name__ == "__main__":
+    main()
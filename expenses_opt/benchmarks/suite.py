@@ -0,0 +1,218 @@
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+import ortools
+from expenses_opt.benchmarks.generator import random_raw_data
+from expenses_opt.exceptions import InfeasibleProblemException
+from expenses_opt.models.input import build_input_data
+from expenses_opt.optimization.diagnostics import Diagnostics
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.run import solution_to_dict
+
+STAGES = ["build_input_data", "build", "solve", "serialization"]
+
+
+def time_case(
+    num_expenses: int,
+    iterations: int,
+    seed: int = 0,
+    mandatory_ratio: float = 0.1,
+    due_spread: float = 1.0,
+    budget_ratio: float = 0.6,
+    vectorized: bool = False,
+    max_time: float = 60000,
+    repeat: int = 3,
+) -> dict:
+    case = {
+        "expenses": num_expenses,
+        "iterations": iterations,
+        "seed": seed,
+        "mandatory_ratio": mandatory_ratio,
+        "due_spread": due_spread,
+        "budget_ratio": budget_ratio,
+        "vectorized": vectorized,
+    }
+    raw_data = random_raw_data(
+        num_expenses=num_expenses,
+        iterations=iterations,
+        seed=seed,
+        budget_ratio=budget_ratio,
+        mandatory_ratio=mandatory_ratio,
+        due_spread=due_spread,
+        optimization_parameters={
+            "priority_exponent": 2,
+            "deviation_weight": 0,
+            "max_time": max_time,
+            "vectorized": vectorized,
+        },
+    )
+
+    times = {stage: list() for stage in STAGES}
+    for _ in range(repeat):
+        diagnostics = Diagnostics()
+
+        with diagnostics.stage("build_input_data"):
+            input_data = build_input_data(raw_data)
+
+        try:
+            optimizer = Optimizer(
+                portfolio=input_data.portfolio,
+                parameters=input_data.optmization_parameters,
+                start_date=input_data.start_date,
+                diagnostics=diagnostics,
+            )
+            solution = optimizer.solve_optimization_problem()
+            status, objective = solution.status, solution.objective_value
+        except InfeasibleProblemException:
+            solution, status, objective = None, 1, None
+
+        with diagnostics.stage("serialization"):
+            json.dumps(solution_to_dict(input_data.portfolio, solution, status))
+
+        for stage in STAGES:
+            if stage in diagnostics.stages:
+                times[stage].append(diagnostics.stages[stage]["time"])
+
+    return {
+        "case": case,
+        "status": status,
+        "objective": objective,
+        "times": {
+            stage: {"min": min(values), "median": statistics.median(values)}
+            for stage, values in times.items()
+            if values
+        },
+    }
+
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "ortools": ortools.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare(baseline: dict, current: dict) -> list[dict]:
+    # median time of each stage of the current run over the baseline one, for
+    # the cases present in both
+    baseline_cases = {
+        json.dumps(result["case"], sort_keys=True): result
+        for result in baseline["results"]
+    }
+
+    ratios = list()
+    for result in current["results"]:
+        previous = baseline_cases.get(json.dumps(result["case"], sort_keys=True))
+        if previous is None:
+            continue
+
+        ratios.append(
+            {
+                "case": result["case"],
+                "ratios": {
+                    stage: times["median"] / previous["times"][stage]["median"]
+                    for stage, times in result["times"].items()
+                    if previous["times"].get(stage, {}).get("median")
+                },
+            }
+        )
+
+    return ratios
+
+
+def main(argv: list[str] = None) -> dict:
+    parser = argparse.ArgumentParser(
+        description="Time input parsing, build, solve and serialization on "
+        "synthetic portfolios"
+    )
+    parser.add_argument("--expenses", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--iterations", type=int, nargs="+", default=[6, 12])
+    parser.add_argument("--mandatory-ratio", type=float, nargs="+", default=[0.1])
+    parser.add_argument("--due-spread", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--budget-ratio", type=float, nargs="+", default=[0.6])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--vectorized", action="store_true")
+    parser.add_argument("--max-time", type=float, default=60000)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run")
+    args = parser.parse_args(argv)
+
+    report = {"metadata": metadata(), "results": list()}
+
+    print(
+        f"{'N':>6} {'M':>4} {'mand.':>6} {'spread':>6} {'budget':>6} "
+        + " ".join(f"{stage:>16}" for stage in STAGES)
+    )
+    for (
+        num_expenses,
+        iterations,
+        mandatory_ratio,
+        due_spread,
+        budget_ratio,
+    ) in itertools.product(
+        args.expenses,
+        args.iterations,
+        args.mandatory_ratio,
+        args.due_spread,
+        args.budget_ratio,
+    ):
+        result = time_case(
+            num_expenses=num_expenses,
+            iterations=iterations,
+            seed=args.seed,
+            mandatory_ratio=mandatory_ratio,
+            due_spread=due_spread,
+            budget_ratio=budget_ratio,
+            vectorized=args.vectorized,
+            max_time=args.max_time,
+            repeat=args.repeat,
+        )
+        report["results"].append(result)
+
+        medians = [
+            result["times"].get(stage, {}).get("median", float("nan"))
+            for stage in STAGES
+        ]
+        print(
+            f"{num_expenses:>6} {iterations:>4} {mandatory_ratio:>6} "
+            f"{due_spread:>6} {budget_ratio:>6} "
+            + " ".join(f"{median:>16.4f}" for median in medians)
+        )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+        print(f"\nmedian time over {baseline['metadata'].get('commit')}")
+        for comparison in compare(baseline, report):
+            case = comparison["case"]
+            ratios = " ".join(
+                f"{stage}={ratio:.2f}x" for stage, ratio in comparison["ratios"].items()
+            )
+            print(f"N={case['expenses']} M={case['iterations']}: {ratios}")
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Optional, TextIO
+from expenses_opt.optimization.run import run_optimization_from_raw_data
+
+# records solved or waiting to be written, per worker
+PENDING_PER_WORKER = 2
+
+
+def _error(message: str) -> dict:
+    return {"status": 1, "expenses": [], "error": message}
+
+
+def solve_record(line: str, max_time: Optional[float] = None) -> dict:
+    # One JSONL record, the JSON read by build_input_data. Its max_time is
+    # the time limit of the record, capped by the max_time of the run.
+    try:
+        raw_data = json.loads(line)
+        if not isinstance(raw_data, dict):
+            return _error("Expected a JSON object")
+
+        if max_time is not None:
+            parameters = dict(raw_data.get("optimization_parameters", {}))
+            record_time = parameters.get("max_time")
+            parameters["max_time"] = (
+                max_time if record_time is None else min(record_time, max_time)
+            )
+            raw_data = dict(raw_data, optimization_parameters=parameters)
+
+        result = run_optimization_from_raw_data(raw_data)
+    except Exception as err:
+        # a failed record is reported in its line, the run goes on
+        return _error(repr(err))
+
+    if "id" in raw_data:
+        result = dict(id=raw_data["id"], **result)
+
+    return result
+
+
+def read_checkpoint(path: str) -> set[int]:
+    # Records already in an output of run_bulk. A line cut by a crash is
+    # dropped from the file, so the run can append to it.
+    if not os.path.exists(path):
+        return set()
+
+    with open(path, "rb+") as file:
+        content = file.read()
+        end = content.rfind(b"\n") + 1
+        file.truncate(end)
+
+    return {json.loads(line)["record"] for line in content[:end].splitlines()}
+
+
+def run_bulk(
+    lines: Iterable[str],
+    output: TextIO,
+    workers: int = None,
+    ordered: bool = False,
+    done: set[int] = frozenset(),
+    max_time: float = None,
+    max_pending: int = None,
+) -> int:
+    # Solves every JSONL record on a process pool and writes one JSONL result
+    # per record, with its line number in "record", as they complete or in
+    # input order. At most max_pending records are read and not yet written,
+    # so memory doesn't grow with the input. Records in done are skipped, and
+    # every result is flushed, so an interrupted run resumes from its output.
+    workers = workers or os.cpu_count()
+    max_pending = max_pending or PENDING_PER_WORKER * workers
+
+    records = (
+        (index, line)
+        for index, line in enumerate(lines)
+        if line.strip() and index not in done
+    )
+    pending = dict()
+    # submitted records and results still waiting for an earlier one
+    order = deque()
+    results = dict()
+    written = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        exhausted = False
+        while True:
+            while not exhausted and len(order) < max_pending:
+                record = next(records, None)
+                if record is None:
+                    exhausted = True
+                    break
+                index, line = record
+                pending[executor.submit(solve_record, line, max_time)] = index
+                order.append(index)
+
+            if not pending:
+                break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as err:
+                    result = _error(repr(err))
+                results[index] = dict(record=index, **result)
+
+            if ordered:
+                ready = list()
+                while order and order[0] in results:
+                    ready.append(order.popleft())
+            else:
+                ready = list(results)
+                for index in ready:
+                    order.remove(index)
+
+            for index in ready:
+                output.write(json.dumps(results.pop(index)) + "\n")
+                output.flush()
+            written += len(ready)
+
+    return written
+
+
+def run_bulk_files(
+    input_path: str,
+    output_path: str,
+    workers: int = None,
+    ordered: bool = False,
+    resume: bool = False,
+    max_time: float = None,
+) -> int:
+    done = read_checkpoint(output_path) if resume else set()
+    with open(input_path) as lines, open(output_path, "a" if resume else "w") as output:
+        return run_bulk(
+            lines,
+            output,
+            workers=workers,
+            ordered=ordered,
+            done=done,
+            max_time=max_time,
+        )
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(
+        description="Solve a JSONL file of inputs on a process pool"
+    )
+    parser.add_argument("input", help="JSONL file, one input per line")
+    parser.add_argument("output", help="JSONL file of results")
+    parser.add_argument("--workers", type=int, help="solver processes")
+    parser.add_argument(
+        "--ordered", action="store_true", help="write results in input order"
+    )
+    parser.add_argument(
+        "--resume", action="store_true", help="skip the records already in output"
+    )
+    parser.add_argument(
+        "--max-time", type=float, help="time limit of each record, in milliseconds"
+    )
+    args = parser.parse_args(argv)
+
+    written = run_bulk_files(
+        args.input,
+        args.output,
+        workers=args.workers,
+        ordered=args.ordered,
+        resume=args.resume,
+        max_time=args.max_time,
+    )
+    print(f"{written} records solved", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
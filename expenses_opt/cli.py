@@ -0,0 +1,104 @@
+import argparse
+import importlib
+import json
+import sys
+
+# Entry point of the expenses-opt script. It is started as a short lived
+# process many times, so the solver modules (OR-Tools, SciPy, the builders)
+# are only imported by the commands that solve.
+
+BENCHMARKS = [
+    "suite",
+    "startup",
+    "backends",
+    "budget_formulation",
+    "incremental",
+    "rolling_horizon",
+]
+
+
+def _load_json(path: str) -> dict:
+    if path == "-":
+        return json.load(sys.stdin)
+    with open(path) as file:
+        return json.load(file)
+
+
+def _write_json(payload: dict, path: str = None):
+    text = json.dumps(payload, indent=2)
+    if path is None:
+        print(text)
+    else:
+        with open(path, "w") as file:
+            file.write(text + "\n")
+
+
+def solve(args) -> int:
+    from ortools.linear_solver import pywraplp
+    from expenses_opt.optimization.run import run_optimization_from_raw_data
+
+    result = run_optimization_from_raw_data(_load_json(args.input))
+    _write_json(result, args.output)
+
+    # An optimal or feasible plan is a success. A failed solve also has
+    # status 1, the one of a feasible plan, but with an error.
+    usable = [pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE]
+    if result["error"] or result["status"] not in usable:
+        return 1
+    return 0
+
+
+def validate(args) -> int:
+    from expenses_opt.exceptions import ExpectedExpcetion
+    from expenses_opt.models.input import build_input_data
+    from expenses_opt.optimization.feasibility import check_mandatory_feasibility
+
+    try:
+        input_data = build_input_data(_load_json(args.input))
+        portfolio = input_data.portfolio
+        check_mandatory_feasibility(
+            portfolio, portfolio.last_periods(input_data.start_date)
+        )
+    except (ExpectedExpcetion, KeyError, ValueError, TypeError) as err:
+        print(f"Invalid input: {err!r}", file=sys.stderr)
+        return 1
+
+    print(f"{len(portfolio)} expenses over {portfolio.budget.iterations} periods")
+    return 0
+
+
+def bench(args) -> int:
+    module = importlib.import_module(f"expenses_opt.benchmarks.{args.name}")
+    module.main(args.args)
+
+    return 0
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="expenses-opt")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    solve_parser = commands.add_parser("solve", help="solve a JSON input")
+    solve_parser.add_argument("input", help="JSON input, - for stdin")
+    solve_parser.add_argument("--output", help="write the result to this file")
+    solve_parser.set_defaults(run=solve)
+
+    validate_parser = commands.add_parser(
+        "validate", help="check a JSON input without solving it"
+    )
+    validate_parser.add_argument("input", help="JSON input, - for stdin")
+    validate_parser.set_defaults(run=validate)
+
+    bench_parser = commands.add_parser("bench", help="run a benchmark")
+    bench_parser.add_argument("name", choices=BENCHMARKS)
+    bench_parser.add_argument(
+        "args", nargs=argparse.REMAINDER, help="arguments of the benchmark"
+    )
+    bench_parser.set_defaults(run=bench)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,3 +11,29 @@ class OptimizationObjective(Enum):
     TARGET = "target"
     MIN = "minumum"
     MAX = "maximum"
+
+
+class BudgetFormulation(Enum):
+    EXPANDED = "expanded"
+    PERIOD = "period"
+    CUMULATIVE = "cumulative"
+
+
+class SolverBackend(Enum):
+    CBC = "cbc"
+    SCIP = "scip"
+    CP_SAT = "cp_sat"
+    GLOP = "glop"
+    PDLP = "pdlp"
+
+
+class SolveMode(Enum):
+    MILP = "milp"
+    HEURISTIC = "heuristic"
+    RELAX = "relax"
+
+
+class ModelFormat(Enum):
+    PROTO = "proto"
+    MPS = "mps"
+    LP = "lp"
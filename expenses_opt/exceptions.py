@@ -8,3 +8,14 @@ class InfeasibleProblemException(ExpectedExpcetion):
 
 class InvalidDataException(ExpectedExpcetion):
     pass
+
+
+class InvalidRowsException(InvalidDataException):
+    def __init__(self, errors: list[tuple[int, str]]) -> None:
+        # (line number, reason) of every rejected row
+        self.errors = errors
+
+        details = "; ".join(f"line {line}: {reason}" for line, reason in errors[:10])
+        if len(errors) > 10:
+            details += f"; and {len(errors) - 10} more"
+        super().__init__(f"{len(errors)} invalid rows: {details}")
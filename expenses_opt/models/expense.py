@@ -7,10 +7,12 @@ from expenses_opt.utils.utils import (
     get_min_price,
     get_max_price,
 )
-import csv
+from expenses_opt.models.ingestion import ExpenseColumns, read_expense_columns
 
 
 class ExpenseRange:
+    __slots__ = ("minimum", "maximum", "target")
+
     def __init__(self, minimum: float, maximum: float, target: float) -> None:
         if not (0 <= minimum <= target <= maximum):
             raise ValueError("Range must be a valid interval.")
@@ -24,6 +26,15 @@ class ExpenseRange:
 
 
 class Expense:
+    __slots__ = (
+        "description",
+        "due_date",
+        "priority",
+        "range",
+        "mandatory",
+        "__partial_spends",
+    )
+
     def __init__(
         self,
         description: str,
@@ -87,19 +98,35 @@ def build_expenses_from_dict(expenses_data: list[dict]) -> list[Expense]:
 
 
 def build_expenses_from_csv(path: str):
-
-    expenses: list[Expense] = list()
-
-    with open(path, "r") as file:
-        csv_reader = csv.reader(file)
-
-        next(csv_reader)
-
-        for row in csv_reader:
-            expense = build_expense_from_row(row)
-            expenses.append(expense)
-
-    return expenses
+    # invalid rows raise InvalidRowsException with their line numbers
+    return build_expenses_from_columns(read_expense_columns(path))
+
+
+def build_expenses_from_columns(columns: ExpenseColumns) -> list[Expense]:
+    priorities = {priority.value: priority for priority in Priority}
+    due_dates = [
+        pendulum.Date.fromordinal(due_date.toordinal()) if due_date else None
+        for due_date in columns.due_dates.astype(object)
+    ]
+
+    return [
+        Expense(
+            description=description,
+            due_date=due_date,
+            priority=priorities[priority],
+            range=ExpenseRange(minimum=minimum, maximum=maximum, target=target),
+            mandatory=mandatory,
+        )
+        for description, due_date, minimum, target, maximum, priority, mandatory in zip(
+            columns.descriptions,
+            due_dates,
+            columns.minimums.tolist(),
+            columns.targets.tolist(),
+            columns.maximums.tolist(),
+            columns.priorities.tolist(),
+            columns.mandatory.tolist(),
+        )
+    ]
 
 
 def build_expense_from_row(row: list):
@@ -145,3 +172,5 @@ def parse_expenses_to_dict(expenses: list[Expense], json_path: str = None):
     if json_path is not None:
         with open(json_path, "w") as file:
             json.dump(expenses_dict, file, indent=4)
+
+    return expenses_dict
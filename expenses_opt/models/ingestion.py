@@ -0,0 +1,339 @@
+import csv
+from dataclasses import dataclass, field
+from datetime import date
+from operator import itemgetter
+from typing import Callable, Iterator, Optional
+import numpy as np
+from expenses_opt.constants import Priority
+from expenses_opt.exceptions import InvalidRowsException
+
+# columns of the CSV export, after the header
+DESCRIPTION, DUE_DATE, MINIMUM, TARGET, MAXIMUM, PRIORITY, MANDATORY = range(7)
+NUM_COLUMNS = 7
+
+PRIORITIES = {str(priority.value): priority.value for priority in Priority}
+MANDATORY_VALUES = {"yes": True, "no": False, "": False}
+# missing priorities are LOW, as in get_priority_from_string
+PRIORITIES_OR_EMPTY = {**PRIORITIES, "": Priority.LOW.value}
+
+EPOCH = date(1970, 1, 1)
+
+
+@dataclass
+class ExpenseColumns:
+    descriptions: list[str]
+    # datetime64[D], NaT where the due date is missing
+    due_dates: np.ndarray
+    minimums: np.ndarray
+    targets: np.ndarray
+    maximums: np.ndarray
+    # Priority values, 1 is the highest
+    priorities: np.ndarray
+    mandatory: np.ndarray
+    # (line number, reason) of the rows left out
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.descriptions)
+
+    @classmethod
+    def concatenate(cls, chunks: list["ExpenseColumns"]) -> "ExpenseColumns":
+        if not chunks:
+            return _empty_columns()
+
+        return cls(
+            descriptions=[text for chunk in chunks for text in chunk.descriptions],
+            due_dates=np.concatenate([chunk.due_dates for chunk in chunks]),
+            minimums=np.concatenate([chunk.minimums for chunk in chunks]),
+            targets=np.concatenate([chunk.targets for chunk in chunks]),
+            maximums=np.concatenate([chunk.maximums for chunk in chunks]),
+            priorities=np.concatenate([chunk.priorities for chunk in chunks]),
+            mandatory=np.concatenate([chunk.mandatory for chunk in chunks]),
+            errors=[error for chunk in chunks for error in chunk.errors],
+        )
+
+
+def _empty_columns() -> ExpenseColumns:
+    return ExpenseColumns(
+        descriptions=[],
+        due_dates=np.array([], "datetime64[D]"),
+        minimums=np.array([], float),
+        targets=np.array([], float),
+        maximums=np.array([], float),
+        priorities=np.array([], np.int8),
+        mandatory=np.array([], bool),
+    )
+
+
+def _parse_iso(value: str) -> date:
+    return date.fromisoformat(value)
+
+
+def _parse_day_first(value: str) -> date:
+    day, month, year = value.split("/")
+    return date(int(year), int(month), int(day))
+
+
+# same formats as get_date_from_string, YYYY-MM-DD and DD/MM/YYYY
+DATE_PARSERS: list[Callable[[str], date]] = [_parse_iso, _parse_day_first]
+
+
+def guess_date_parser(value: str) -> Optional[Callable[[str], date]]:
+    for parser in DATE_PARSERS:
+        try:
+            parser(value)
+            return parser
+        except ValueError:
+            continue
+
+    return None
+
+
+def _day_first_to_iso(values: list[str]) -> np.ndarray:
+    # DD/MM/YYYY to YYYY-MM-DD by moving the characters of the whole column
+    characters = np.array(values, "U10").view(np.uint32).reshape(-1, 10)
+    filled = characters[:, 0] != 0
+
+    slash = ord("/")
+    if not np.all((characters[filled, 2] == slash) & (characters[filled, 5] == slash)):
+        raise ValueError("not a DD/MM/YYYY date")
+
+    iso = characters[:, [6, 7, 8, 9, 2, 3, 4, 2, 0, 1]]
+    iso[filled, 4] = iso[filled, 7] = ord("-")
+
+    return np.ascontiguousarray(iso).view("U10").ravel()
+
+
+class _ChunkParser:
+    # Parses rows into columns. The date format is guessed on the first date
+    # of the file and tried first on every other row. Whole columns are
+    # converted at once, and a chunk with any malformed value is parsed again
+    # row by row to find the lines to report.
+
+    def __init__(self) -> None:
+        self.date_parser: Optional[Callable[[str], date]] = None
+
+    def parse(self, rows: list[tuple[int, list[str]]]) -> ExpenseColumns:
+        lines = [line for line, _ in rows]
+        try:
+            return self.__parse_columns(lines, [row for _, row in rows])
+        except (ValueError, KeyError):
+            return self.__parse_rows(rows)
+
+    def __parse_columns(self, lines: list[int], rows: list[list[str]]):
+        if min(map(len, rows)) < NUM_COLUMNS:
+            raise ValueError("missing columns")
+
+        columns = [list(map(itemgetter(index), rows)) for index in range(NUM_COLUMNS)]
+
+        return self.__build_columns(
+            lines=lines,
+            errors=list(),
+            descriptions=columns[DESCRIPTION],
+            due_dates=self.__parse_date_column(columns[DUE_DATE]),
+            minimums=self.__parse_price_column(columns[MINIMUM], "0"),
+            targets=self.__parse_price_column(columns[TARGET], "0"),
+            maximums=self.__parse_price_column(columns[MAXIMUM], "inf"),
+            priorities=[PRIORITIES_OR_EMPTY[value] for value in columns[PRIORITY]],
+            mandatory=[MANDATORY_VALUES[value.lower()] for value in columns[MANDATORY]],
+        )
+
+    def __parse_date_column(self, values: list[str]) -> np.ndarray:
+        # only full YYYY-MM-DD or DD/MM/YYYY dates, NumPy also takes "2023"
+        if not set(map(len, values)) <= {0, 10}:
+            raise ValueError("not a fixed width date")
+
+        if self.date_parser is None:
+            first = next((value for value in values if value), None)
+            self.date_parser = first and guess_date_parser(first)
+
+        if self.date_parser is _parse_day_first:
+            return np.array(_day_first_to_iso(values), "datetime64[D]")
+        if self.date_parser is not _parse_iso and any(values):
+            raise ValueError("unknown date format")
+
+        return np.array(values, "datetime64[D]")
+
+    @staticmethod
+    def __parse_price_column(values: list[str], default: str) -> np.ndarray:
+        if "" in values:
+            values = [value or default for value in values]
+
+        return np.fromiter(map(float, values), float, len(values))
+
+    def __parse_rows(self, rows: list[tuple[int, list[str]]]) -> ExpenseColumns:
+        errors = list()
+        lines = list()
+        descriptions = list()
+        due_days = list()
+        prices = list()
+        priorities = list()
+        mandatory = list()
+
+        for line, row in rows:
+            try:
+                parsed = self.__parse_row(row)
+            except ValueError as err:
+                errors.append((line, str(err)))
+                continue
+
+            lines.append(line)
+            descriptions.append(parsed[0])
+            due_days.append(parsed[1])
+            prices.append(parsed[2])
+            priorities.append(parsed[3])
+            mandatory.append(parsed[4])
+
+        # days since the epoch, NaN where the due date is missing
+        due_days = np.array(due_days, float)
+        due_dates = np.full(len(due_days), np.datetime64("NaT"), "datetime64[D]")
+        known = ~np.isnan(due_days)
+        due_dates[known] = due_days[known].astype("int64").astype("datetime64[D]")
+
+        prices = np.array(prices, float).reshape(-1, 3)
+
+        return self.__build_columns(
+            lines=lines,
+            errors=errors,
+            descriptions=descriptions,
+            due_dates=due_dates,
+            minimums=prices[:, 0],
+            targets=prices[:, 1],
+            maximums=prices[:, 2],
+            priorities=priorities,
+            mandatory=mandatory,
+        )
+
+    @staticmethod
+    def __build_columns(
+        lines: list[int],
+        errors: list[tuple[int, str]],
+        descriptions: list[str],
+        due_dates: np.ndarray,
+        minimums: np.ndarray,
+        targets: np.ndarray,
+        maximums: np.ndarray,
+        priorities: list[int],
+        mandatory: list[bool],
+    ) -> ExpenseColumns:
+        # 0 <= minimum <= target <= maximum, as in ExpenseRange
+        valid = (0 <= minimums) & (minimums <= targets) & (targets <= maximums)
+        if not valid.all():
+            errors = sorted(
+                errors
+                + [
+                    (lines[index], "Range must be a valid interval.")
+                    for index in np.flatnonzero(~valid)
+                ]
+            )
+            descriptions = [text for text, ok in zip(descriptions, valid) if ok]
+
+        return ExpenseColumns(
+            descriptions=descriptions,
+            due_dates=due_dates[valid],
+            minimums=minimums[valid],
+            targets=targets[valid],
+            maximums=maximums[valid],
+            priorities=np.array(priorities, np.int8)[valid],
+            mandatory=np.array(mandatory, bool)[valid],
+            errors=errors,
+        )
+
+    def __parse_row(self, row: list[str]) -> tuple:
+        if len(row) < NUM_COLUMNS:
+            raise ValueError(f"expected {NUM_COLUMNS} columns, found {len(row)}")
+
+        return (
+            row[DESCRIPTION],
+            self.__parse_date(row[DUE_DATE].strip()),
+            (
+                self.__parse_price(row[MINIMUM], 0.0, "minimum"),
+                self.__parse_price(row[TARGET], 0.0, "target"),
+                self.__parse_price(row[MAXIMUM], float("inf"), "maximum"),
+            ),
+            self.__parse_priority(row[PRIORITY].strip()),
+            self.__parse_mandatory(row[MANDATORY].strip().lower()),
+        )
+
+    def __parse_date(self, value: str) -> float:
+        if not value:
+            return float("nan")
+
+        if self.date_parser is not None:
+            try:
+                return (self.date_parser(value) - EPOCH).days
+            except ValueError:
+                pass
+
+        parser = guess_date_parser(value)
+        if parser is None:
+            raise ValueError(f"invalid due date {value!r}")
+        if self.date_parser is None:
+            self.date_parser = parser
+
+        return (parser(value) - EPOCH).days
+
+    @staticmethod
+    def __parse_price(value: str, default: float, name: str) -> float:
+        value = value.strip()
+        if not value:
+            return default
+
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f"invalid {name} price {value!r}")
+
+    @staticmethod
+    def __parse_priority(value: str) -> int:
+        # missing priorities are LOW, as in get_priority_from_string
+        if not value:
+            return Priority.LOW.value
+
+        priority = PRIORITIES.get(value)
+        if priority is None:
+            raise ValueError(f"invalid priority {value!r}")
+
+        return priority
+
+    @staticmethod
+    def __parse_mandatory(value: str) -> bool:
+        mandatory = MANDATORY_VALUES.get(value)
+        if mandatory is None:
+            raise ValueError(f"invalid mandatory flag {value!r}")
+
+        return mandatory
+
+
+def iter_expense_columns(
+    path: str, chunk_size: int = 65536
+) -> Iterator[ExpenseColumns]:
+    parser = _ChunkParser()
+
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        next(reader, None)
+
+        rows = list()
+        for row in reader:
+            if not any(row):
+                continue
+
+            rows.append((reader.line_num, row))
+            if len(rows) == chunk_size:
+                yield parser.parse(rows)
+                rows = list()
+
+        if rows:
+            yield parser.parse(rows)
+
+
+def read_expense_columns(
+    path: str, chunk_size: int = 65536, skip_invalid: bool = False
+) -> ExpenseColumns:
+    columns = ExpenseColumns.concatenate(list(iter_expense_columns(path, chunk_size)))
+
+    if columns.errors and not skip_invalid:
+        raise InvalidRowsException(columns.errors)
+
+    return columns
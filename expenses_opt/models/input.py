@@ -1,13 +1,12 @@
 import pendulum
-from expenses_opt.models.expense import (
-    build_expenses_from_csv,
-    build_expenses_from_dict,
-)
+import numpy as np
+from expenses_opt.models.expense import build_expenses_from_dict
+from expenses_opt.models.ingestion import read_expense_columns
 from expenses_opt.models.portfolio import (
     build_budget_from_parameters,
     Portfolio,
 )
-from expenses_opt.optimization.optimizer import OptmizationParameters
+from expenses_opt.optimization.parameters import OptmizationParameters
 from dataclasses import dataclass
 from expenses_opt.utils.utils import get_date_from_string
 from expenses_opt.exceptions import InvalidDataException
@@ -26,22 +25,23 @@ def build_input_data(raw_data: dict) -> InputData:
         params=raw_data["budget"], start_date=start_date
     )
 
+    # missing due dates are the latest one of the portfolio
     if "path_to_csv" in raw_data:
-        expenses = build_expenses_from_csv(path=raw_data["path_to_csv"])
+        columns = read_expense_columns(path=raw_data["path_to_csv"])
+        missing = np.isnat(columns.due_dates)
+        if missing.any():
+            columns.due_dates[missing] = columns.due_dates[~missing].max()
+        portfolio = Portfolio.from_columns(columns=columns, budget=budget)
     elif "expenses" in raw_data:
         expenses = build_expenses_from_dict(expenses_data=raw_data["expenses"])
+        max_due_date = max(exp.due_date for exp in expenses if exp.due_date is not None)
+        for expense in expenses:
+            if expense.due_date is None:
+                expense.due_date = max_due_date
+        portfolio = Portfolio(expenses=expenses, budget=budget)
     else:
         raise InvalidDataException("No expenses information was found in json")
 
-    portfolio = Portfolio(expenses=expenses, budget=budget)
-
-    max_due_date = max(
-        exp.due_date for exp in portfolio.expenses if exp.due_date is not None
-    )
-    for expense in portfolio.expenses:
-        if expense.due_date is None:
-            expense.due_date = max_due_date
-
     parameters = OptmizationParameters(**raw_data["optimization_parameters"])
 
     input_data = InputData(
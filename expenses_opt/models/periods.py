@@ -0,0 +1,42 @@
+import numpy as np
+import pendulum
+
+
+class PeriodCalendar:
+    # First day of each budget period, as date ordinals. Period j starts j
+    # recurrences after the last one, or j calendar months after it, and an
+    # expense can spend in every period started by its due date. A due date
+    # before the first period maps to -1.
+
+    def __init__(self, start_date: pendulum.Date, budget) -> None:
+        first = pendulum.Date.fromordinal(
+            start_date.toordinal() - budget.last_recurrence
+        )
+
+        if budget.monthly:
+            # from the first date each time, so a 31st stays on the last day
+            # of shorter months instead of drifting to the 28th
+            starts = [
+                first.add(months=k_index).toordinal()
+                for k_index in range(budget.iterations)
+            ]
+        else:
+            starts = first.toordinal() + budget.recurrence * np.arange(
+                budget.iterations
+            )
+
+        self.starts = np.array(starts, dtype=np.int64)
+        self.starts.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def last_periods(self, due_ordinals: np.ndarray) -> np.ndarray:
+        # the largest j with starts_j \le d_i
+        return np.searchsorted(self.starts, due_ordinals, side="right") - 1
+
+    def period_of(self, date: pendulum.Date) -> int:
+        return int(self.last_periods(np.array([date.toordinal()]))[0])
+
+    def start_dates(self) -> list[pendulum.Date]:
+        return [pendulum.Date.fromordinal(int(ordinal)) for ordinal in self.starts]
@@ -1,8 +1,19 @@
+import sys
+from collections.abc import MutableSequence, Sequence
 from typing import Optional
+import numpy as np
 import pendulum
-from expenses_opt.models.expense import Expense
+from expenses_opt.constants import OptimizationObjective, Priority
+from expenses_opt.exceptions import InvalidDataException
+from expenses_opt.models.expense import Expense, ExpenseRange
+from expenses_opt.models.ingestion import ExpenseColumns
+from expenses_opt.models.periods import PeriodCalendar
 from expenses_opt.utils.utils import get_date_from_string
 
+# recurrence of a budget on calendar months, and its nominal length in days
+MONTHLY = "monthly"
+MONTH_DAYS = 30
+
 
 class Budget:
     def __init__(
@@ -12,6 +23,7 @@ class Budget:
         recurrence: int,
         last_recurrence: int,
         iterations: int,
+        monthly: bool = False,
     ) -> None:
 
         self.initial = initial
@@ -19,26 +31,399 @@ class Budget:
         self.recurrence = recurrence
         self.last_recurrence = last_recurrence
         self.iterations = iterations
+        # periods on calendar months from the last recurrence, recurrence is
+        # then only nominal
+        self.monthly = monthly
 
     @property
     def total_budget(self):
         return self.initial + self.recorrent * (self.iterations - 1)
 
+    @property
+    def capacities(self) -> np.ndarray:
+        # b_0 + k \cdot b for k = 0, 1, ..., M - 1
+        return self.initial + self.recorrent * np.arange(self.iterations, dtype=float)
+
+    def calendar(self, start_date: pendulum.Date) -> PeriodCalendar:
+        return PeriodCalendar(start_date, self)
+
     def __repr__(self) -> str:
         return f"Budget(initial={self.initial}, recorrent={self.recorrent})"
 
 
+# date.toordinal() of the due date, 0 when it is missing
+NO_DUE_DATE = 0
+
+EPOCH_ORDINAL = pendulum.date(1970, 1, 1).toordinal()
+
+COLUMN_TYPES = {
+    # position in the description table
+    "description": np.int32,
+    "due_ordinal": np.int64,
+    "minimum": float,
+    "target": float,
+    "maximum": float,
+    "priority": np.int8,
+    "mandatory": bool,
+}
+
+
+# fields of an expense that are stored in the portfolio columns
+EXPENSE_FIELDS = ("description", "due_date", "priority", "range", "mandatory")
+
+
+class _PortfolioRange(ExpenseRange):
+    # range of an expense built by a portfolio, changes go to its columns
+    __slots__ = ("_expense",)
+
+    def __setattr__(self, name: str, value) -> None:
+        super().__setattr__(name, value)
+        expense = getattr(self, "_expense", None)
+        if expense is not None:
+            expense.changed()
+
+
+class _PortfolioExpense(Expense):
+    # expense built by a portfolio, changes go to its columns
+    __slots__ = ("_portfolio",)
+
+    def __setattr__(self, name: str, value) -> None:
+        portfolio = getattr(self, "_portfolio", None)
+        if name == "range" and not isinstance(value, _PortfolioRange):
+            value = _PortfolioRange(value.minimum, value.maximum, value.target)
+        if isinstance(value, _PortfolioRange):
+            value._expense = self
+
+        super().__setattr__(name, value)
+        if portfolio is not None and name in EXPENSE_FIELDS:
+            self.changed()
+
+    def changed(self) -> None:
+        portfolio = getattr(self, "_portfolio", None)
+        if portfolio is not None:
+            portfolio._expense_changed(self)
+
+
+class ExpenseList(MutableSequence):
+    # List of the expenses of a portfolio, built on first access. Changes to
+    # the list or to its expenses are written to the portfolio columns.
+
+    def __init__(self, portfolio: "Portfolio") -> None:
+        self.__portfolio = portfolio
+
+    def __len__(self) -> int:
+        return len(self.__portfolio)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        return self.__portfolio.expense(self.__position(index))
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            start, stop = self.__span(index)
+            self.__portfolio._splice(start, stop, list(value))
+        else:
+            index = self.__position(index)
+            self.__portfolio._splice(index, index + 1, [value])
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            start, stop = self.__span(index)
+            self.__portfolio._splice(start, stop, [])
+        else:
+            index = self.__position(index)
+            self.__portfolio._splice(index, index + 1, [])
+
+    def insert(self, index: int, value: Expense) -> None:
+        # same clamping as list.insert
+        start, _, _ = slice(index, None).indices(len(self))
+        self.__portfolio._splice(start, start, [value])
+
+    def __position(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("expense index out of range")
+
+        return index
+
+    def __span(self, index: slice) -> tuple[int, int]:
+        start, stop, step = index.indices(len(self))
+        if step != 1:
+            raise ValueError("expense slices must be contiguous")
+
+        return start, max(start, stop)
+
+    def __add__(self, other) -> list[Expense]:
+        return list(self) + list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
 class Portfolio:
-    def __init__(self, expenses: list[Expense], budget: Budget) -> None:
+    # Expenses are stored column by column, the columns are the source of
+    # truth. The given expenses are copied, and the Expense objects read
+    # through `expenses` are built on first access and write their changes
+    # back to the columns. The with_* methods return changed copies.
+
+    def __init__(self, expenses: Sequence[Expense], budget: Budget) -> None:
 
-        self.expenses = expenses
         self.budget = budget
 
+        self.__table: list[str] = list()
+        self.__codes: dict[str, int] = dict()
+
+        rows = [self.__row(expense) for expense in expenses]
+        self.__columns = self.__freeze(
+            {name: [row[name] for row in rows] for name in COLUMN_TYPES}
+        )
+        self.__expenses: list[Optional[Expense]] = [None] * len(rows)
+        self.__priorities: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_columns(cls, columns: ExpenseColumns, budget: Budget) -> "Portfolio":
+        portfolio = cls([], budget)
+
+        days = columns.due_dates.astype("int64")
+        due_ordinals = np.where(
+            np.isnat(columns.due_dates), NO_DUE_DATE, days + EPOCH_ORDINAL
+        )
+        portfolio.__columns = portfolio.__freeze(
+            {
+                "description": [portfolio.__intern(d) for d in columns.descriptions],
+                "due_ordinal": due_ordinals,
+                "minimum": columns.minimums,
+                "target": columns.targets,
+                "maximum": columns.maximums,
+                "priority": columns.priorities,
+                "mandatory": columns.mandatory,
+            }
+        )
+        portfolio.__expenses = [None] * len(columns)
+
+        return portfolio
+
+    @property
+    def expenses(self) -> ExpenseList:
+        return ExpenseList(self)
+
+    def __len__(self) -> int:
+        return len(self.__expenses)
+
+    def expense(self, index: int) -> Expense:
+        expense = self.__expenses[index]
+        if expense is None:
+            expense = self.__build_expense(index)
+            self.__expenses[index] = expense
+
+        return expense
+
+    @property
+    def descriptions(self) -> list[str]:
+        return [self.__table[code] for code in self.__columns["description"]]
+
     @property
     def mandatory_total_min_spend(self):
-        return sum(
-            expense.range.minimum for expense in self.expenses if expense.mandatory
+        return float(self.minimums[self.mandatory_flags].sum())
+
+    @property
+    def minimums(self) -> np.ndarray:
+        return self.__columns["minimum"]
+
+    @property
+    def maximums(self) -> np.ndarray:
+        return self.__columns["maximum"]
+
+    @property
+    def priorities(self) -> np.ndarray:
+        # as floats, p_i^C overflows the stored int8
+        if self.__priorities is None:
+            self.__priorities = self.__columns["priority"].astype(float)
+            self.__priorities.flags.writeable = False
+        return self.__priorities
+
+    @property
+    def mandatory_flags(self) -> np.ndarray:
+        return self.__columns["mandatory"]
+
+    @property
+    def due_ordinals(self) -> np.ndarray:
+        return self.__columns["due_ordinal"]
+
+    def targets(self, objective: OptimizationObjective) -> np.ndarray:
+        column = {
+            OptimizationObjective.TARGET: "target",
+            OptimizationObjective.MIN: "minimum",
+            OptimizationObjective.MAX: "maximum",
+        }[objective]
+        return self.__columns[column]
+
+    def due_dates_in_days(self, start: pendulum.Date) -> np.ndarray:
+        # same as Expense.get_due_date_in_days, without building a pendulum Period
+        return self.due_ordinals - start.toordinal()
+
+    def copy(self) -> "Portfolio":
+        return self.with_budget(self.budget)
+
+    def with_budget(self, budget: Budget) -> "Portfolio":
+        portfolio = self.__derived(budget)
+        portfolio.__columns = self.__columns
+
+        return portfolio
+
+    def with_expense(self, expense: Expense) -> "Portfolio":
+        portfolio = self.__derived(self.budget)
+        row = portfolio.__row(expense)
+        portfolio.__columns = self.__freeze(
+            {
+                name: np.append(column, row[name])
+                for name, column in self.__columns.items()
+            }
+        )
+        portfolio.__expenses.append(None)
+
+        return portfolio
+
+    def without_expense(self, index: int) -> "Portfolio":
+        portfolio = self.__derived(self.budget)
+        portfolio.__columns = self.__freeze(
+            {name: np.delete(column, index) for name, column in self.__columns.items()}
         )
+        portfolio.__expenses.pop(index)
+
+        return portfolio
+
+    def with_replaced_expense(self, index: int, expense: Expense) -> "Portfolio":
+        portfolio = self.__derived(self.budget)
+        row = portfolio.__row(expense)
+
+        columns = {name: column.copy() for name, column in self.__columns.items()}
+        for name, value in row.items():
+            columns[name][index] = value
+        portfolio.__columns = self.__freeze(columns)
+
+        return portfolio
+
+    def subset(self, indices: Sequence[int], budget: Budget = None) -> "Portfolio":
+        portfolio = self.__derived(budget or self.budget)
+        portfolio.__columns = self.__freeze(
+            {name: column[indices] for name, column in self.__columns.items()}
+        )
+        portfolio.__expenses = [None] * len(portfolio.__columns["minimum"])
+
+        return portfolio
+
+    def __derived(self, budget: Budget) -> "Portfolio":
+        # copy of this portfolio, columns excluded, to be changed by the caller.
+        # Built expenses belong to this portfolio, the copy builds its own.
+        portfolio = Portfolio([], budget)
+        portfolio.__table = list(self.__table)
+        portfolio.__codes = dict(self.__codes)
+        portfolio.__expenses = [None] * len(self)
+
+        return portfolio
+
+    def __row(self, expense: Expense) -> dict:
+        return {
+            "description": self.__intern(expense.description),
+            "due_ordinal": (
+                expense.due_date.toordinal()
+                if expense.due_date is not None
+                else NO_DUE_DATE
+            ),
+            "minimum": expense.range.minimum,
+            "target": expense.range.target,
+            "maximum": expense.range.maximum,
+            "priority": expense.priority.value,
+            "mandatory": expense.mandatory,
+        }
+
+    def __intern(self, description: str) -> int:
+        code = self.__codes.get(description)
+        if code is None:
+            code = len(self.__table)
+            self.__table.append(sys.intern(description))
+            self.__codes[description] = code
+
+        return code
+
+    @staticmethod
+    def __freeze(columns: dict) -> dict[str, np.ndarray]:
+        frozen = dict()
+        for name, dtype in COLUMN_TYPES.items():
+            column = np.array(columns[name], dtype=dtype)
+            column.flags.writeable = False
+            frozen[name] = column
+
+        return frozen
+
+    def __build_expense(self, index: int) -> Expense:
+        columns = self.__columns
+        due_ordinal = int(columns["due_ordinal"][index])
+
+        expense = _PortfolioExpense(
+            description=self.__table[columns["description"][index]],
+            due_date=(
+                pendulum.Date.fromordinal(due_ordinal)
+                if due_ordinal != NO_DUE_DATE
+                else None
+            ),
+            priority=Priority(int(columns["priority"][index])),
+            range=_PortfolioRange(
+                minimum=float(columns["minimum"][index]),
+                maximum=float(columns["maximum"][index]),
+                target=float(columns["target"][index]),
+            ),
+            mandatory=bool(columns["mandatory"][index]),
+        )
+        expense._portfolio = self
+
+        return expense
+
+    def _expense_changed(self, expense: Expense) -> None:
+        # an expense built by this portfolio was changed, its row follows. The
+        # columns may be shared with other portfolios, so they are replaced.
+        index = self.__expenses.index(expense)
+        columns = dict(self.__columns)
+        for name, value in self.__row(expense).items():
+            if columns[name][index] != value:
+                column = columns[name].copy()
+                column[index] = value
+                column.flags.writeable = False
+                columns[name] = column
+
+        self.__columns = columns
+        self.__priorities = None
+
+    def _splice(self, start: int, stop: int, expenses: list[Expense]) -> None:
+        # replaces the rows start to stop with copies of the given expenses
+        rows = [self.__row(expense) for expense in expenses]
+        self.__columns = self.__freeze(
+            {
+                name: np.concatenate(
+                    [
+                        column[:start],
+                        np.array([row[name] for row in rows], dtype=column.dtype),
+                        column[stop:],
+                    ]
+                )
+                for name, column in self.__columns.items()
+            }
+        )
+        for expense in self.__expenses[start:stop]:
+            if expense is not None:
+                expense._portfolio = None
+        self.__expenses[start:stop] = [None] * len(rows)
+        self.__priorities = None
+
+    def last_periods(self, start: pendulum.Date) -> np.ndarray:
+        # x_{i,j} = 0 se d_i < \delta - \delta_0 + (j-1) \cdot \delta, so the last
+        # feasible period is the largest j with j \cdot \delta \le d_i + \delta_0,
+        # found in the period calendar
+        return self.budget.calendar(start).last_periods(self.due_ordinals)
 
     def set_expenses_cost(self, costs: list[Optional[float]]):
         for index, value in enumerate(costs):
@@ -46,7 +431,7 @@ class Portfolio:
             my_expense.set_cost_value(value)
 
     def __repr__(self) -> str:
-        return f"Portfolio with {len(self.expenses)} expenses"
+        return f"Portfolio with {len(self)} expenses"
 
 
 def build_budget_from_parameters(params: dict, start_date: pendulum.Date):
@@ -59,12 +444,31 @@ def build_budget_from_parameters(params: dict, start_date: pendulum.Date):
     period = start_date - last_recurrence_date
     last_recurrence = period.days
 
+    # "monthly" follows calendar months instead of a fixed number of days
+    recurrence = params["recurrence"]
+    monthly = recurrence == MONTHLY
+    if monthly:
+        recurrence = MONTH_DAYS
+    elif isinstance(recurrence, bool) or not (
+        isinstance(recurrence, int)
+        # JSON may give a whole number of days as 30.0
+        or (isinstance(recurrence, float) and recurrence.is_integer())
+    ):
+        raise InvalidDataException(
+            f'Recurrence must be "{MONTHLY}" or a number of days, got {recurrence!r}'
+        )
+    elif recurrence < 0:
+        raise InvalidDataException("Recurrence must not be negative")
+    else:
+        recurrence = int(recurrence)
+
     return Budget(
         initial=params["initial"],
         recorrent=params["recorrent"],
-        recurrence=params["recurrence"],
+        recurrence=recurrence,
         last_recurrence=last_recurrence,
         iterations=params["iterations"],
+        monthly=monthly,
     )
 
 
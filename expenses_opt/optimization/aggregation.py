@@ -0,0 +1,126 @@
+import numpy as np
+import pendulum
+from expenses_opt.constants import OptimizationObjective
+from expenses_opt.models.portfolio import Portfolio
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.diagnostics import Diagnostics
+from expenses_opt.optimization.feasibility import check_mandatory_feasibility
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.solution import Solution
+
+
+class ExpenseClasses:
+    # Expenses with the same range, priority, mandatory flag and last feasible
+    # period have the same variables and rows in the model, only the
+    # descriptions differ. Classes are numbered by their first expense.
+
+    def __init__(self, portfolio: Portfolio, last_periods: np.ndarray) -> None:
+        keys = np.column_stack(
+            [
+                portfolio.minimums,
+                portfolio.targets(OptimizationObjective.TARGET),
+                portfolio.maximums,
+                portfolio.priorities,
+                portfolio.mandatory_flags,
+                last_periods,
+            ]
+        )
+        _, first, classes, counts = np.unique(
+            keys,
+            axis=0,
+            return_index=True,
+            return_inverse=True,
+            return_counts=True,
+        )
+
+        order = np.argsort(first, kind="stable")
+        numbers = np.empty_like(order)
+        numbers[order] = np.arange(len(order))
+
+        # first expense of each class, class of each expense and class sizes
+        self.representatives = first[order]
+        self.classes = numbers[classes.ravel()]
+        self.counts = counts[order]
+
+        # position of each expense in its class
+        by_class = np.argsort(self.classes, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(self.counts)[:-1]])
+        self.ranks = np.empty(len(self.classes), int)
+        self.ranks[by_class] = np.arange(len(self.classes)) - np.repeat(
+            starts, self.counts
+        )
+
+    def __len__(self) -> int:
+        return len(self.representatives)
+
+    def split(
+        self, spends: np.ndarray, attended: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # the first y_c expenses of class c split its spends evenly, in cents,
+        # the first one taking the rounding difference
+        attended = np.rint(attended).astype(int)
+        divisors = np.maximum(attended, 1)[:, None]
+        shares = np.round(spends / divisors, 2)
+        remainders = spends - (divisors - 1) * shares
+
+        expense_attended = self.ranks < attended[self.classes]
+        expense_spends = np.where(expense_attended[:, None], shares[self.classes], 0.0)
+        first = expense_attended & (self.ranks == 0)
+        expense_spends[first] = remainders[self.classes[first]]
+
+        return expense_spends, expense_attended
+
+
+class AggregatedOptimizer:
+    # Same results as Optimizer, with one set of variables per class of
+    # identical expenses, see OptimizerBuilder.set_counts
+
+    def __init__(
+        self,
+        portfolio: Portfolio,
+        parameters: OptmizationParameters,
+        start_date: pendulum.DateTime,
+        diagnostics: Diagnostics = None,
+    ) -> None:
+        diagnostics = diagnostics or Diagnostics()
+
+        # the class portfolio counts each mandatory minimum only once
+        last_periods = portfolio.last_periods(start_date)
+        check_mandatory_feasibility(portfolio, last_periods)
+
+        with diagnostics.stage("aggregation") as aggregation:
+            self.classes = ExpenseClasses(portfolio, last_periods)
+        self.__aggregation_time = aggregation["time"]
+
+        if len(self.classes) == len(portfolio):
+            self.optimizer = Optimizer(portfolio, parameters, start_date, diagnostics)
+        else:
+            self.optimizer = Optimizer(
+                portfolio.subset(self.classes.representatives),
+                parameters,
+                start_date,
+                diagnostics,
+                counts=self.classes.counts,
+            )
+
+    @property
+    def aggregated(self) -> bool:
+        return len(self.classes) < len(self.classes.classes)
+
+    def solve_optimization_problem(self) -> Solution:
+        solution = self.optimizer.solve_optimization_problem()
+        if not self.aggregated:
+            return solution
+
+        spends, attended = self.classes.split(solution.spends, self.optimizer.y_values)
+
+        timings = dict(solution.timings)
+        timings["aggregation"] = self.__aggregation_time
+
+        return Solution(
+            status=solution.status,
+            spends=spends,
+            attended=attended,
+            objective_value=solution.objective_value,
+            timings=timings,
+        )
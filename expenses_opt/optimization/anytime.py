@@ -0,0 +1,274 @@
+import asyncio
+import queue
+import threading
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Iterator
+import numpy as np
+import pendulum
+from ortools.linear_solver import pywraplp
+from ortools.sat.python import cp_model
+from expenses_opt.exceptions import InfeasibleProblemException
+from expenses_opt.models.portfolio import Portfolio
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.feasibility import check_mandatory_feasibility
+from expenses_opt.optimization.heuristic import HEURISTIC_STATUS, GreedyPlanner
+from expenses_opt.optimization.solution import Solution
+
+# CP-SAT only has integer variables, amounts are modeled in cents
+CENTS = 100
+
+# default number of CP-SAT search workers
+NUM_WORKERS = 8
+
+# end of the incumbents of a search
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class Incumbent:
+    solution: Solution
+    best_bound: float
+    gap: float
+    # seconds since the search started
+    wall_time: float
+    # set on the last incumbent when the search proved it optimal
+    optimal: bool = False
+
+
+class _IncumbentCallback(cp_model.CpSolverSolutionCallback):
+    def __init__(self, solver: "AnytimeSolver", incumbents: queue.Queue) -> None:
+        super().__init__()
+        self.__solver = solver
+        self.__incumbents = incumbents
+        self.last = None
+
+    def on_solution_callback(self):
+        incumbent = self.__solver.incumbent(
+            spends=[[self.Value(x_i_j) for x_i_j in x_i] for x_i in self.__solver.x],
+            attended=[self.BooleanValue(y_i) for y_i in self.__solver.y],
+            best_bound=self.BestObjectiveBound(),
+            wall_time=self.WallTime(),
+        )
+
+        # CP-SAT rounds the objective weights, so a solution it takes as an
+        # improvement may not be one for the exact objective
+        objective_value = incumbent.solution.objective_value
+        if self.last is None or objective_value < self.last.solution.objective_value:
+            self.last = incumbent
+            self.__incumbents.put(incumbent)
+
+
+class AnytimeSolver:
+    # The model of OptimizerBuilder on CP-SAT, with every amount in cents:
+    #   \sum_j x_{i,j} \ge y_i \cdot \underline{g}_i, \sum_j x_{i,j} \le y_i \cdot \overline{g}_i
+    #   d_i \ge |\sum_j x_{i,j} - g_i|, minimizing \sum_i d_i / (g_i p_i^C) + A y_i
+    # Each improving solution is streamed as an Incumbent while the search
+    # goes on, and cancel() stops the search from any thread.
+
+    def __init__(
+        self,
+        portfolio: Portfolio,
+        parameters: OptmizationParameters,
+        start_date: pendulum.Date,
+    ) -> None:
+        self.portfolio = portfolio
+        self.parameters = parameters
+        self.start_date = start_date
+        self.last_periods = portfolio.last_periods(start_date)
+
+        check_mandatory_feasibility(portfolio, self.last_periods)
+
+        self.__planner = GreedyPlanner(portfolio, parameters, start_date)
+        self.__model = cp_model.CpModel()
+        self.__solver = cp_model.CpSolver()
+        self.__callback = None
+        self.__build()
+
+    @property
+    def targets(self) -> np.ndarray:
+        return self.__planner.targets
+
+    def __build(self):
+        model = self.__model
+        capacities = np.floor(self.portfolio.budget.capacities * CENTS + 1e-6)
+        largest = int(max(capacities.max(), 0))
+
+        minimums = np.ceil(self.portfolio.minimums * CENTS - 1e-6)
+        maximums = np.minimum(
+            np.floor(np.nan_to_num(self.portfolio.maximums, posinf=largest) * CENTS),
+            largest,
+        )
+        targets = np.round(np.minimum(self.targets, largest) * CENTS)
+        weights = self.__planner.weights
+        big_a = self.parameters.deviation_weight
+
+        self.x = list()
+        self.y = list()
+        objective = list()
+        for i_index in range(len(self.portfolio)):
+            max_i, min_i = int(maximums[i_index]), int(minimums[i_index])
+            g_i = int(targets[i_index])
+
+            x_i = [
+                model.NewIntVar(0, max_i, f"x[{i_index}, {j_index}]")
+                for j_index in range(self.last_periods[i_index] + 1)
+            ]
+            y_i = model.NewBoolVar(f"y[{i_index}]")
+            spend = cp_model.LinearExpr.Sum(x_i)
+
+            model.Add(spend <= max_i * y_i)
+            model.Add(spend >= min_i * y_i)
+            if self.portfolio.mandatory_flags[i_index]:
+                model.Add(y_i == 1)
+
+            if g_i > 0:
+                d_i = model.NewIntVar(0, max(g_i, max_i - g_i), f"d[{i_index}]")
+                model.Add(d_i >= spend - g_i)
+                model.Add(d_i >= g_i - spend)
+                objective.append(weights[i_index] / g_i * d_i)
+            else:
+                model.Add(spend == 0)
+
+            objective.append(big_a * y_i)
+            self.x.append(x_i)
+            self.y.append(y_i)
+
+        # \sum_{j \le k} \sum_i x_{i,j} \le b_0 + k \cdot b
+        for k_index, capacity in enumerate(capacities):
+            spent = [x_i_j for x_i in self.x for x_i_j in x_i[: k_index + 1]]
+            model.Add(cp_model.LinearExpr.Sum(spent) <= int(capacity))
+
+        model.Minimize(cp_model.LinearExpr.Sum(objective))
+
+        if self.parameters.warm_start:
+            self.__add_hint()
+
+    def __add_hint(self):
+        try:
+            schedule = self.__planner.solve()
+        except InfeasibleProblemException:
+            return
+
+        spends = np.round(schedule.spends * CENTS)
+        for i_index, (x_i, y_i) in enumerate(zip(self.x, self.y)):
+            for j_index, x_i_j in enumerate(x_i):
+                self.__model.AddHint(x_i_j, int(spends[i_index, j_index]))
+            self.__model.AddHint(y_i, int(schedule.attended[i_index]))
+
+    def incumbent(
+        self, spends: list, attended: list, best_bound: float, wall_time: float
+    ) -> Incumbent:
+        matrix = np.zeros((len(self.portfolio), self.portfolio.budget.iterations))
+        for i_index, x_i in enumerate(spends):
+            matrix[i_index, : len(x_i)] = x_i
+        matrix /= CENTS
+
+        objective_value = self.__planner.objective_value(matrix, np.array(attended))
+        gap = (
+            abs(objective_value - best_bound) / abs(objective_value)
+            if objective_value
+            else 0.0
+        )
+
+        return Incumbent(
+            solution=Solution(
+                status=HEURISTIC_STATUS,
+                spends=matrix,
+                attended=attended,
+                objective_value=objective_value,
+                timings={"solve": wall_time},
+            ),
+            best_bound=best_bound,
+            gap=gap,
+            wall_time=wall_time,
+        )
+
+    def cancel(self):
+        # CpSolver.StopSearch does nothing in OR-Tools 9.6, the callback of
+        # the running search stops it
+        if self.__callback is not None:
+            self.__callback.StopSearch()
+
+    def __search(self, callback: _IncumbentCallback, incumbents: queue.Queue):
+        parameters = self.__solver.parameters
+        parameters.max_time_in_seconds = self.parameters.max_time / 1000
+        parameters.num_workers = self.parameters.num_threads or NUM_WORKERS
+        if self.parameters.relative_gap is not None:
+            parameters.relative_gap_limit = self.parameters.relative_gap
+
+        try:
+            status = self.__solver.Solve(self.__model, callback)
+        except Exception as err:
+            incumbents.put(err)
+            return
+
+        if callback.last is None:
+            incumbents.put(
+                InfeasibleProblemException(
+                    "Optimizer did not found a feasible solution"
+                )
+            )
+        elif status == cp_model.OPTIMAL:
+            # the last incumbent again, with the bound that proves it
+            incumbents.put(
+                Incumbent(
+                    solution=replace(
+                        callback.last.solution, status=pywraplp.Solver.OPTIMAL
+                    ),
+                    best_bound=callback.last.solution.objective_value,
+                    gap=0.0,
+                    wall_time=self.__solver.WallTime(),
+                    optimal=True,
+                )
+            )
+        incumbents.put(_DONE)
+
+    def __start(self) -> tuple[queue.Queue, threading.Thread]:
+        incumbents = queue.Queue()
+        self.__callback = _IncumbentCallback(self, incumbents)
+        thread = threading.Thread(
+            target=self.__search, args=(self.__callback, incumbents), daemon=True
+        )
+        thread.start()
+
+        return incumbents, thread
+
+    @staticmethod
+    def __unwrap(item):
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def solutions(self) -> Iterator[Incumbent]:
+        # Improving incumbents, as they are found. Leaving the loop, or
+        # closing the generator, stops the search.
+        incumbents, thread = self.__start()
+        try:
+            while True:
+                item = self.__unwrap(incumbents.get())
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            self.cancel()
+            thread.join()
+
+    async def asolutions(self) -> AsyncIterator[Incumbent]:
+        # same as solutions, without blocking the event loop
+        incumbents, thread = self.__start()
+        try:
+            while True:
+                item = self.__unwrap(await asyncio.to_thread(incumbents.get))
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            self.cancel()
+            await asyncio.to_thread(thread.join)
+
+    def solve(self) -> Incumbent:
+        # the last incumbent of a search run to the end
+        last = None
+        for last in self.solutions():
+            pass
+        return last
@@ -1,37 +1,62 @@
+import numpy as np
 import pendulum
-from expenses_opt.models.portfolio import Portfolio
-from ortools.linear_solver import pywraplp
-
-from expenses_opt.constants import OptimizationObjective
-from expenses_opt.exceptions import (
-    InfeasibleProblemException,
-    InvalidDataException,
+from expenses_opt.models.portfolio import Budget, Portfolio
+from expenses_opt.models.expense import Expense, ExpenseRange
+from ortools.linear_solver import linear_solver_pb2, pywraplp
+
+from expenses_opt.constants import (
+    BudgetFormulation,
+    ModelFormat,
+    OptimizationObjective,
+    Priority,
+    SolverBackend,
+)
+from expenses_opt.exceptions import InvalidDataException
+from expenses_opt.optimization.diagnostics import Diagnostics
+from expenses_opt.optimization.feasibility import check_mandatory_feasibility
+from expenses_opt.optimization.parameters import OptmizationParameters
+from expenses_opt.optimization.serialization import (
+    model_format_from_path,
+    read_model,
+    write_model,
 )
 
+SOLVER_IDS = {
+    SolverBackend.CBC: "CBC",
+    SolverBackend.SCIP: "SCIP",
+    SolverBackend.CP_SAT: "CP_SAT",
+    SolverBackend.GLOP: "GLOP",
+    SolverBackend.PDLP: "PDLP",
+}
 
-# TODO use dataclass
-class OptmizationParameters:
-    def __init__(
-        self,
-        priority_exponent: float,
-        deviation_weight: float,
-        max_time: float,
-    ) -> None:
+# LP solvers ignore the integrality of y and return the LP relaxation
+LP_BACKENDS = {SolverBackend.GLOP, SolverBackend.PDLP}
 
-        if priority_exponent < 1:
-            raise InvalidDataException(
-                "Priority exponent must be equal or greater than 1"
-            )
+# the CBC shipped with OR-Tools is built without thread support
+MULTITHREADED_BACKENDS = {SolverBackend.SCIP, SolverBackend.CP_SAT, SolverBackend.PDLP}
+
+
+def build_solver_parameters(
+    parameters: OptmizationParameters,
+) -> pywraplp.MPSolverParameters:
+    solver_parameters = pywraplp.MPSolverParameters()
 
-        if deviation_weight < 0:
-            raise InvalidDataException("Weight must be a positive float")
+    if parameters.relative_gap is not None and parameters.solver not in LP_BACKENDS:
+        solver_parameters.SetDoubleParam(
+            solver_parameters.RELATIVE_MIP_GAP, parameters.relative_gap
+        )
 
-        if max_time < 0:
-            raise InvalidDataException("Max optimization time must be a positive float")
+    if parameters.presolve is not None:
+        solver_parameters.SetIntegerParam(
+            solver_parameters.PRESOLVE,
+            (
+                solver_parameters.PRESOLVE_ON
+                if parameters.presolve
+                else solver_parameters.PRESOLVE_OFF
+            ),
+        )
 
-        self.priority_exponent = priority_exponent
-        self.deviation_weight = deviation_weight
-        self.max_time = max_time
+    return solver_parameters
 
 
 class OptimizerBuilder:
@@ -40,138 +65,318 @@ class OptimizerBuilder:
         portfolio: Portfolio,
         parameters: OptmizationParameters,
         start_date: pendulum.Date,
-        objective: OptimizationObjective = OptimizationObjective.TARGET,
+        objective: OptimizationObjective = None,
+        diagnostics: Diagnostics = None,
     ) -> None:
 
-        self.portfolio = portfolio
+        # the model is built once, later changes to the given portfolio must
+        # go through the update methods
+        self.portfolio = portfolio.copy()
         self.parameters = parameters
         self.start_date = start_date
-        self.__op_objective = objective
-
-        self.variables = {"x": list(), "y": list(), "epsilon": list()}
+        self.diagnostics = diagnostics or Diagnostics()
+        self.__op_objective = objective or parameters.objective
+
+        self.variables = {
+            "x": list(),
+            "y": list(),
+            "epsilon": list(),
+            "spend": list(),
+        }
+        self.constraints = {
+            "max_cost": list(),
+            "min_cost": list(),
+            "spend": list(),
+            "budget": list(),
+            "target_lower": list(),
+            "target_upper": list(),
+            "mandatory": list(),
+        }
+
+        self.last_periods = self.portfolio.last_periods(self.start_date)
 
         self.__check_feasibility()
 
     @property
     def num_expenses(self):
-        return len(self.portfolio.expenses)
+        return len(self.portfolio)
 
     @property
     def iterations(self):
         return self.portfolio.budget.iterations
 
+    @property
+    def objective(self) -> OptimizationObjective:
+        return self.__op_objective
+
+    @property
+    def budget_formulation(self) -> BudgetFormulation:
+        return self.parameters.budget_formulation
+
+    @property
+    def named_variables(self) -> bool:
+        return True
+
+    @property
+    def period_mask(self) -> np.ndarray:
+        # True where x_{i,j} exists, i.e. j is not after the last feasible period
+        periods = np.arange(self.iterations)
+        return periods[None, :] <= self.last_periods[:, None]
+
     def __check_feasibility(self):
-        if (
-            self.portfolio.mandatory_total_min_spend
-            > self.portfolio.budget.total_budget
-        ):
-            raise InfeasibleProblemException(
-                "Not enough budget to attend all mandatory expenses"
-            )
+        check_mandatory_feasibility(self.portfolio, self.last_periods)
 
-    def build_optimization_problem(self):
-        solver = pywraplp.Solver.CreateSolver("CBC")
+    def create_solver(self):
+        backend = self.parameters.solver
+        solver = pywraplp.Solver.CreateSolver(SOLVER_IDS[backend])
+        if solver is None:
+            raise InvalidDataException(f"Solver backend not available: {backend.value}")
 
-        solver.SetTimeLimit(self.parameters.max_time)
+        solver.SetTimeLimit(int(self.parameters.max_time))
 
-        self.create_variables(solver=solver)
+        if self.parameters.num_threads and backend in MULTITHREADED_BACKENDS:
+            solver.SetNumThreads(self.parameters.num_threads)
+
+        return solver
+
+    def build_optimization_problem(self):
+        solver = self.create_solver()
+
+        with self.diagnostics.stage("create_variables"):
+            self.create_variables(solver=solver)
 
         self.set_constraints(solver=solver)
 
-        self.set_objective_function(solver=solver)
+        with self.diagnostics.stage("set_objective_function"):
+            self.set_objective_function(solver=solver)
+
+        return solver
+
+    def solver_parameters(self) -> pywraplp.MPSolverParameters:
+        return build_solver_parameters(self.parameters)
+
+    # Serialization: the built model is written with a layout sidecar holding
+    # the index of every variable and constraint of the builder, so a loaded
+    # model can be solved, updated and read back as if it was just built.
+
+    def export_model(self, solver, path: str, model_format: ModelFormat = None):
+        model_format = ModelFormat(model_format or model_format_from_path(path))
+
+        model_proto = linear_solver_pb2.MPModelProto()
+        solver.ExportModelToProto(model_proto)
+        lp_text = (
+            solver.ExportModelAsLpFormat(False)
+            if model_format == ModelFormat.LP
+            else None
+        )
+
+        layout = {
+            "num_expenses": self.num_expenses,
+            "iterations": self.iterations,
+            "budget_formulation": self.budget_formulation.value,
+            "variables": {
+                "x": [[x_i_j.index() for x_i_j in x_i] for x_i in self.variables["x"]],
+                **{
+                    name: [var.index() for var in self.variables[name]]
+                    for name in ("y", "epsilon", "spend")
+                },
+            },
+            "constraints": {
+                name: [constraint.index() for constraint in constraints]
+                for name, constraints in self.constraints.items()
+            },
+        }
+        write_model(model_proto, layout, path, model_format, lp_text=lp_text)
+
+    def load_model(self, path: str):
+        model_proto, layout = read_model(path)
+
+        x_sizes = [len(x_i) for x_i in layout["variables"]["x"]]
+        if (
+            layout["num_expenses"] != self.num_expenses
+            or layout["iterations"] != self.iterations
+            or layout["budget_formulation"] != self.budget_formulation.value
+            or x_sizes != (self.last_periods + 1).tolist()
+        ):
+            raise InvalidDataException(
+                f"Model {path} was built for another portfolio or formulation"
+            )
+
+        solver = self.create_solver()
+        error = solver.LoadModelFromProto(model_proto)
+        if error:
+            raise InvalidDataException(f"Could not load model {path}: {error}")
+
+        variables = solver.variables()
+        self.variables = {
+            "x": [
+                [variables[index] for index in x_i] for x_i in layout["variables"]["x"]
+            ],
+            **{
+                name: [variables[index] for index in layout["variables"][name]]
+                for name in ("y", "epsilon", "spend")
+            },
+        }
+        constraints = solver.constraints()
+        self.constraints = {
+            name: [constraints[index] for index in indices]
+            for name, indices in layout["constraints"].items()
+        }
 
         return solver
 
+    def hint_from_schedule(
+        self, spends: np.ndarray, attended: np.ndarray
+    ) -> dict[int, float]:
+        # value of every variable of the model for a given N x M schedule
+        hint = dict()
+        for i_index, x_i in enumerate(self.variables["x"]):
+            for j_index, x_i_j in enumerate(x_i):
+                hint[x_i_j.index()] = float(spends[i_index, j_index])
+
+        targets = self.portfolio.targets(self.objective)
+        totals = spends.sum(axis=1)
+        deviations = np.divide(
+            np.abs(totals - targets),
+            targets,
+            out=np.zeros_like(targets),
+            where=targets > 0,
+        )
+        for y_i, e_i, attended_i, deviation in zip(
+            self.variables["y"], self.variables["epsilon"], attended, deviations
+        ):
+            hint[y_i.index()] = float(attended_i)
+            hint[e_i.index()] = float(deviation)
+
+        period_spends = spends.sum(axis=0)
+        if self.budget_formulation == BudgetFormulation.CUMULATIVE:
+            period_spends = np.cumsum(period_spends)
+        for s_k, value in zip(self.variables["spend"], period_spends):
+            hint[s_k.index()] = float(value)
+
+        return hint
+
     def create_variables(self, solver):
-        # x variables
+        # x variables, only up to the last feasible period of each expense
         for i_index in range(self.num_expenses):
-            self.variables["x"].append([])
-            for j_index in range(self.iterations):
-                var_name = f"x[{i_index}, {j_index}]"
-                max_value = self.portfolio.expenses[i_index].range.maximum
-                x_var = solver.NumVar(0, max_value, var_name)
-                self.variables["x"][i_index].append(x_var)
+            self.variables["x"].append(self.__new_x_variables(solver, i_index))
 
         # y variables
         for i_index in range(self.num_expenses):
-            var_name = f"y[{i_index}]"
-            y_var = solver.IntVar(0, 1, var_name)
-            self.variables["y"].append(y_var)
+            self.variables["y"].append(self.__new_y_variable(solver, i_index))
 
         # epsilon variables
         for i_index in range(self.num_expenses):
-            var_name = f"epsilon[{i_index}]"
-            e_var = solver.NumVar(0, solver.infinity(), var_name)
+            e_var = self.__new_epsilon_variable(solver, i_index)
             self.variables["epsilon"].append(e_var)
 
-    def set_constraints(self, solver):
+        # per-period aggregate spend variables
+        if self.budget_formulation == BudgetFormulation.PERIOD:
+            for k_index in range(self.iterations):
+                s_var = solver.NumVar(0, solver.infinity(), f"s[{k_index}]")
+                self.variables["spend"].append(s_var)
+
+        elif self.budget_formulation == BudgetFormulation.CUMULATIVE:
+            capacities = self.portfolio.budget.capacities
+            for k_index in range(self.iterations):
+                max_budget = float(capacities[k_index])
+                c_var = solver.NumVar(0, max_budget, f"c[{k_index}]")
+                self.variables["spend"].append(c_var)
+
+    def __variable_name(self, name: str) -> str:
+        return name if self.named_variables else ""
+
+    def __new_x_variables(self, solver, i_index: int) -> list:
+        max_value = self.portfolio.maximums[i_index]
 
-        print("Setting constraints")
-        self.constraint_total_spend_respect_max_cost(solver=solver)
-        self.constraint_respect_min_cost(solver=solver)
-        self.constraint_partial_spends_respect_due_date(solver=solver)
-        self.constraint_total_spend_respect_iteration_budget(solver=solver)
-        self.constraint_absolute_error_definition(solver=solver)
-        self.constraint_mandatory_expenses_must_be_attended(solver=solver)
+        x_i = list()
+        for j_index in range(self.last_periods[i_index] + 1):
+            var_name = self.__variable_name(f"x[{i_index}, {j_index}]")
+            x_i.append(solver.NumVar(0, max_value, var_name))
+
+        return x_i
+
+    def __new_y_variable(self, solver, i_index: int):
+        return solver.IntVar(0, 1, self.__variable_name(f"y[{i_index}]"))
+
+    def __new_epsilon_variable(self, solver, i_index: int):
+        var_name = self.__variable_name(f"epsilon[{i_index}]")
+        return solver.NumVar(0, solver.infinity(), var_name)
+
+    def set_constraints(self, solver):
+        for add_constraints in (
+            self.constraint_total_spend_respect_max_cost,
+            self.constraint_respect_min_cost,
+            self.constraint_total_spend_respect_iteration_budget,
+            self.constraint_absolute_error_definition,
+            self.constraint_mandatory_expenses_must_be_attended,
+        ):
+            with self.diagnostics.stage(add_constraints.__name__):
+                add_constraints(solver=solver)
 
     def set_objective_function(self, solver):
         objective = solver.Objective()
 
+        for i_index in range(self.num_expenses):
+            self.__set_expense_objective(solver, i_index)
+
+        objective.SetMinimization()
+
+    def __set_expense_objective(self, solver, i_index: int):
+        objective = solver.Objective()
+
         big_c = self.parameters.priority_exponent
         big_a = self.parameters.deviation_weight
 
-        for i_index in range(self.num_expenses):
-            e_i = self.variables["epsilon"][i_index]
-            y_i = self.variables["y"][i_index]
-            p_i = self.portfolio.expenses[i_index].priority.value
-
-            objective.SetCoefficient(e_i, 1 / (p_i**big_c))
-            objective.SetCoefficient(y_i, big_a)
+        e_i = self.variables["epsilon"][i_index]
+        y_i = self.variables["y"][i_index]
+        p_i = self.portfolio.priorities[i_index]
 
-        objective.SetMinimization()
+        objective.SetCoefficient(e_i, 1 / (p_i**big_c))
+        objective.SetCoefficient(y_i, big_a)
 
     def constraint_total_spend_respect_max_cost(self, solver):
-        # \sum_{j=0}^M x_{i,j} <= \overline{g}_i
         for i_index in range(self.num_expenses):
-            max_spend = self.portfolio.expenses[i_index].range.maximum
+            self.__add_max_cost_constraint(solver, i_index)
 
-            constraint = solver.Constraint(-solver.infinity(), 0)
-            y_i = self.variables["y"][i_index]
-            constraint.SetCoefficient(y_i, -max_spend)
+    def __add_max_cost_constraint(self, solver, i_index: int):
+        # \sum_{j=0}^M x_{i,j} <= \overline{g}_i
+        max_spend = self.portfolio.maximums[i_index]
+
+        constraint = solver.Constraint(-solver.infinity(), 0)
+        y_i = self.variables["y"][i_index]
+        constraint.SetCoefficient(y_i, -max_spend)
+
+        for x_i_j in self.variables["x"][i_index]:
+            constraint.SetCoefficient(x_i_j, 1)
 
-            for j_index in range(self.iterations):
-                x_i_j = self.variables["x"][i_index][j_index]
-                constraint.SetCoefficient(x_i_j, 1)
+        self.constraints["max_cost"].append(constraint)
 
     def constraint_respect_min_cost(self, solver):
-        # \sum_{j=0}^M x_{i,j}  - y_i \cdot \underline{g}_i >= 0
         for i_index in range(self.num_expenses):
-            constraint = solver.Constraint(0, solver.infinity())
-            y_i = self.variables["y"][i_index]
-            min_spend = self.portfolio.expenses[i_index].range.minimum
-            constraint.SetCoefficient(y_i, -min_spend)
+            self.__add_min_cost_constraint(solver, i_index)
 
-            for j_index in range(self.iterations):
-                x_i_j = self.variables["x"][i_index][j_index]
-                constraint.SetCoefficient(x_i_j, 1)
+    def __add_min_cost_constraint(self, solver, i_index: int):
+        # \sum_{j=0}^M x_{i,j}  - y_i \cdot \underline{g}_i >= 0
+        constraint = solver.Constraint(0, solver.infinity())
+        y_i = self.variables["y"][i_index]
+        min_spend = self.portfolio.minimums[i_index]
+        constraint.SetCoefficient(y_i, -min_spend)
 
-    def constraint_partial_spends_respect_due_date(self, solver):
-        # x_{i,j} = 0 \,\,\, \textit{se } \, d_i < \delta - \delta_0 + (j-1) \cdot \delta
+        for x_i_j in self.variables["x"][i_index]:
+            constraint.SetCoefficient(x_i_j, 1)
 
-        for i_index in range(self.num_expenses):
-            for j_index in range(self.iterations):
-                expense_due_date = self.portfolio.expenses[i_index].due_date
-                period = expense_due_date - self.start_date
-                due_date_in_days = period.days
-                delta = self.portfolio.budget.recurrence
-                delta_0 = self.portfolio.budget.last_recurrence
-
-                if due_date_in_days < delta - delta_0 + (j_index - 1) * delta:
-                    x_i_j = self.variables["x"][i_index][j_index]
-                    constraint = solver.Constraint(0, 0)
-                    constraint.SetCoefficient(x_i_j, 1)
+        self.constraints["min_cost"].append(constraint)
 
     def constraint_total_spend_respect_iteration_budget(self, solver):
+        if self.budget_formulation == BudgetFormulation.PERIOD:
+            self.constraint_period_spend_respect_iteration_budget(solver=solver)
+            return
+
+        if self.budget_formulation == BudgetFormulation.CUMULATIVE:
+            self.constraint_cumulative_spend_respect_iteration_budget(solver=solver)
+            return
+
         for k_index in range(self.iterations):
             b_0 = self.portfolio.budget.initial
             b = self.portfolio.budget.recorrent
@@ -180,44 +385,287 @@ class OptimizerBuilder:
             constraint = solver.Constraint(0, max_budget)
 
             for i_index in range(self.num_expenses):
-                for j_index in range(k_index + 1):
-                    x_i_j = self.variables["x"][i_index][j_index]
+                for x_i_j in self.variables["x"][i_index][: k_index + 1]:
                     constraint.SetCoefficient(x_i_j, 1)
 
+            self.constraints["budget"].append(constraint)
+
+    def constraint_period_spend_respect_iteration_budget(self, solver):
+        # s_k = \sum_{i=1}^N x_{i,k}
+        for k_index in range(self.iterations):
+            constraint = solver.Constraint(0, 0)
+            constraint.SetCoefficient(self.variables["spend"][k_index], -1)
+
+            for i_index in range(self.num_expenses):
+                if k_index <= self.last_periods[i_index]:
+                    x_i_k = self.variables["x"][i_index][k_index]
+                    constraint.SetCoefficient(x_i_k, 1)
+
+            self.constraints["spend"].append(constraint)
+
+        # \sum_{j=0}^k s_j \le b_0 + k \cdot b
+        for k_index in range(self.iterations):
+            b_0 = self.portfolio.budget.initial
+            b = self.portfolio.budget.recorrent
+            max_budget = b_0 + b * k_index
+
+            constraint = solver.Constraint(0, max_budget)
+
+            for j_index in range(k_index + 1):
+                constraint.SetCoefficient(self.variables["spend"][j_index], 1)
+
+            self.constraints["budget"].append(constraint)
+
+    def constraint_cumulative_spend_respect_iteration_budget(self, solver):
+        # c_k = c_{k-1} + \sum_{i=1}^N x_{i,k}, with 0 \le c_k \le b_0 + k \cdot b
+        for k_index in range(self.iterations):
+            constraint = solver.Constraint(0, 0)
+            constraint.SetCoefficient(self.variables["spend"][k_index], 1)
+
+            if k_index > 0:
+                constraint.SetCoefficient(self.variables["spend"][k_index - 1], -1)
+
+            for i_index in range(self.num_expenses):
+                if k_index <= self.last_periods[i_index]:
+                    x_i_k = self.variables["x"][i_index][k_index]
+                    constraint.SetCoefficient(x_i_k, -1)
+
+            self.constraints["spend"].append(constraint)
+
     def constraint_absolute_error_definition(self, solver):
 
         # lower constraint
         for i_index in range(self.num_expenses):
-            target_value = self.portfolio.expenses[i_index].optimization_value_target[
-                self.__op_objective
-            ]
-            constraint = solver.Constraint(target_value, solver.infinity())
-
-            e_i = self.variables["epsilon"][i_index]
-            constraint.SetCoefficient(e_i, target_value)
-
-            for j_index in range(self.iterations):
-                x_i_j = self.variables["x"][i_index][j_index]
-                constraint.SetCoefficient(x_i_j, 1)
+            self.__add_target_lower_constraint(solver, i_index)
 
         # upper constraint
         for i_index in range(self.num_expenses):
-            target_value = self.portfolio.expenses[i_index].optimization_value_target[
-                self.__op_objective
-            ]
-            constraint = solver.Constraint(-solver.infinity(), target_value)
+            self.__add_target_upper_constraint(solver, i_index)
 
-            e_i = self.variables["epsilon"][i_index]
-            constraint.SetCoefficient(e_i, -target_value)
+    def __target_value(self, i_index: int) -> float:
+        return self.portfolio.targets(self.__op_objective)[i_index]
 
-            for j_index in range(self.iterations):
-                x_i_j = self.variables["x"][i_index][j_index]
-                constraint.SetCoefficient(x_i_j, 1)
+    def __add_target_lower_constraint(self, solver, i_index: int):
+        target_value = self.__target_value(i_index)
+        constraint = solver.Constraint(target_value, solver.infinity())
+
+        e_i = self.variables["epsilon"][i_index]
+        constraint.SetCoefficient(e_i, target_value)
+
+        for x_i_j in self.variables["x"][i_index]:
+            constraint.SetCoefficient(x_i_j, 1)
+
+        self.constraints["target_lower"].append(constraint)
+
+    def __add_target_upper_constraint(self, solver, i_index: int):
+        target_value = self.__target_value(i_index)
+        constraint = solver.Constraint(-solver.infinity(), target_value)
+
+        e_i = self.variables["epsilon"][i_index]
+        constraint.SetCoefficient(e_i, -target_value)
+
+        for x_i_j in self.variables["x"][i_index]:
+            constraint.SetCoefficient(x_i_j, 1)
+
+        self.constraints["target_upper"].append(constraint)
 
     def constraint_mandatory_expenses_must_be_attended(self, solver):
         for i_index in range(self.num_expenses):
+            self.__add_mandatory_constraint(solver, i_index)
+
+    def __add_mandatory_constraint(self, solver, i_index: int):
+        y_i = self.variables["y"][i_index]
+        f_i = int(self.portfolio.mandatory_flags[i_index])
+
+        constraint = solver.Constraint(f_i, 1)
+        constraint.SetCoefficient(y_i, 1)
+
+        self.constraints["mandatory"].append(constraint)
+
+    # Incremental changes: the methods below edit an already built model in
+    # place, so it can be solved again without running the build loops.
+
+    def add_expense(self, solver, expense: Expense):
+        self.portfolio = self.portfolio.with_expense(expense)
+        self.last_periods = self.portfolio.last_periods(self.start_date)
+        self.__check_feasibility()
+        i_index = self.num_expenses - 1
+
+        self.variables["x"].append(self.__new_x_variables(solver, i_index))
+        self.variables["y"].append(self.__new_y_variable(solver, i_index))
+        self.variables["epsilon"].append(self.__new_epsilon_variable(solver, i_index))
+        self.__set_expense_objective(solver, i_index)
+
+        self.__add_max_cost_constraint(solver, i_index)
+        self.__add_min_cost_constraint(solver, i_index)
+        self.__add_target_lower_constraint(solver, i_index)
+        self.__add_target_upper_constraint(solver, i_index)
+        self.__add_mandatory_constraint(solver, i_index)
+
+        x_i = self.variables["x"][i_index]
+        if self.budget_formulation == BudgetFormulation.EXPANDED:
+            for k_index, constraint in enumerate(self.constraints["budget"]):
+                for x_i_j in x_i[: k_index + 1]:
+                    constraint.SetCoefficient(x_i_j, 1)
+        else:
+            sign = 1 if self.budget_formulation == BudgetFormulation.PERIOD else -1
+            for x_i_k, constraint in zip(x_i, self.constraints["spend"]):
+                constraint.SetCoefficient(x_i_k, sign)
+
+    def remove_expense(self, solver, i_index: int):
+        # MPSolver can not delete variables, so the expense is fixed at zero,
+        # dropped from the objective and forgotten by the builder
+        objective = solver.Objective()
+        for x_i_j in self.variables["x"][i_index]:
+            x_i_j.SetBounds(0, 0)
+
+        self.variables["y"][i_index].SetBounds(0, 0)
+        self.constraints["mandatory"][i_index].SetBounds(0, 1)
+        objective.SetCoefficient(self.variables["y"][i_index], 0)
+        objective.SetCoefficient(self.variables["epsilon"][i_index], 0)
+
+        for name in ("x", "y", "epsilon"):
+            self.variables[name].pop(i_index)
+
+        for name in ("max_cost", "min_cost", "target_lower", "target_upper"):
+            self.constraints[name].pop(i_index)
+        self.constraints["mandatory"].pop(i_index)
+
+        self.portfolio = self.portfolio.without_expense(i_index)
+        self.last_periods = np.delete(self.last_periods, i_index)
+
+    def update_range(self, solver, i_index: int, expense_range: ExpenseRange):
+        self.__replace_expense(i_index, range=expense_range)
+
+        for x_i_j in self.variables["x"][i_index]:
+            x_i_j.SetBounds(0, expense_range.maximum)
+
+        y_i = self.variables["y"][i_index]
+        self.constraints["max_cost"][i_index].SetCoefficient(
+            y_i, -expense_range.maximum
+        )
+        self.constraints["min_cost"][i_index].SetCoefficient(
+            y_i, -expense_range.minimum
+        )
+
+        target_value = self.__target_value(i_index)
+        e_i = self.variables["epsilon"][i_index]
+
+        lower = self.constraints["target_lower"][i_index]
+        lower.SetBounds(target_value, solver.infinity())
+        lower.SetCoefficient(e_i, target_value)
+
+        upper = self.constraints["target_upper"][i_index]
+        upper.SetBounds(-solver.infinity(), target_value)
+        upper.SetCoefficient(e_i, -target_value)
+
+        self.__check_feasibility()
+
+    def update_priority(self, solver, i_index: int, priority: Priority):
+        self.__replace_expense(i_index, priority=priority)
+        self.__set_expense_objective(solver, i_index)
+
+    def update_budget(self, solver, budget: Budget):
+        current = self.portfolio.budget
+        if (
+            budget.iterations != current.iterations
+            or budget.recurrence != current.recurrence
+            or budget.last_recurrence != current.last_recurrence
+            or budget.monthly != current.monthly
+        ):
+            raise InvalidDataException(
+                "Only the initial and recorrent budget values can be updated"
+            )
+
+        self.portfolio = self.portfolio.with_budget(budget)
+        self.__check_feasibility()
+
+        capacities = budget.capacities
+        if self.budget_formulation == BudgetFormulation.CUMULATIVE:
+            bounded = self.variables["spend"]
+        else:
+            bounded = self.constraints["budget"]
+
+        for k_index, item in enumerate(bounded):
+            item.SetBounds(0, float(capacities[k_index]))
+
+    def fix_attended(self, solver, attended: np.ndarray):
+        for y_i, attended_i in zip(self.variables["y"], attended):
+            y_i.SetBounds(int(attended_i), int(attended_i))
+
+    def relax_expenses(self, solver, indices):
+        # y_i continuous and a single spend, in the last feasible period.
+        # Spending later never breaks a budget row and the objective only
+        # depends on the totals, so that spend loses nothing.
+        for i_index in indices:
+            self.variables["y"][i_index].SetInteger(False)
+            for x_i_j in self.variables["x"][i_index][:-1]:
+                x_i_j.SetBounds(0, 0)
+
+    def restore_expenses(self, solver, indices):
+        # undoes relax_expenses
+        maximums = self.portfolio.maximums
+        for i_index in indices:
+            self.variables["y"][i_index].SetInteger(True)
+            for x_i_j in self.variables["x"][i_index]:
+                x_i_j.SetBounds(0, float(maximums[i_index]))
+
+    def set_counts(self, solver, counts: np.ndarray):
+        # Expense i stands for n_i identical expenses. y_i becomes the number
+        # of them attended and x_{i,j}, \epsilon_i the sums over the class:
+        #   y_i \cdot \underline{g}_i \le \sum_j x_{i,j} \le y_i \cdot \overline{g}_i
+        #   g_i \cdot \epsilon_i \ge |\sum_j x_{i,j} - y_i \cdot g_i|
+        # with w_i (n_i - y_i) added to the objective for the ones left out.
+        # Splitting the sums evenly among the attended ones is optimal, the
+        # deviation being convex.
+        objective = solver.Objective()
+        big_a = self.parameters.deviation_weight
+        weights = 1 / self.portfolio.priorities**self.parameters.priority_exponent
+        targets = self.portfolio.targets(self.__op_objective)
+        maximums = self.portfolio.maximums
+        mandatory = self.portfolio.mandatory_flags
+
+        offset = 0.0
+        for i_index, count in enumerate(counts):
+            count = int(count)
             y_i = self.variables["y"][i_index]
-            f_i = int(self.portfolio.expenses[i_index].mandatory)
+            g_i = float(targets[i_index])
+            w_i = float(weights[i_index]) if g_i > 0 else 0.0
+
+            for x_i_j in self.variables["x"][i_index]:
+                x_i_j.SetBounds(0, count * maximums[i_index])
+
+            y_i.SetBounds(0, count)
+            self.constraints["mandatory"][i_index].SetBounds(
+                count * int(mandatory[i_index]), count
+            )
 
-            constraint = solver.Constraint(f_i, 1)
-            constraint.SetCoefficient(y_i, 1)
+            lower = self.constraints["target_lower"][i_index]
+            lower.SetCoefficient(y_i, -g_i)
+            lower.SetBounds(0, solver.infinity())
+
+            upper = self.constraints["target_upper"][i_index]
+            upper.SetCoefficient(y_i, -g_i)
+            upper.SetBounds(-solver.infinity(), 0)
+
+            objective.SetCoefficient(y_i, big_a - w_i)
+            offset += count * w_i
+
+        objective.SetOffset(offset)
+
+    def __replace_expense(self, i_index: int, **changes):
+        # expenses may be shared with other portfolios, so they are replaced
+        # instead of being changed in place
+        expense = self.portfolio.expenses[i_index]
+        fields = {
+            "description": expense.description,
+            "due_date": expense.due_date,
+            "priority": expense.priority,
+            "range": expense.range,
+            "mandatory": expense.mandatory,
+        }
+        fields.update(changes)
+
+        self.portfolio = self.portfolio.with_replaced_expense(
+            i_index, Expense(**fields)
+        )
@@ -0,0 +1,178 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Callable, Optional
+from expenses_opt.models.input import InputData
+
+
+def _normalize_expense(expense) -> dict:
+    return {
+        "description": expense.description,
+        "due_date": str(expense.due_date),
+        "priority": expense.priority.value,
+        "mandatory": bool(expense.mandatory),
+        "range": {
+            "minimum": expense.range.minimum,
+            "maximum": expense.range.maximum,
+            "target": expense.range.target,
+        },
+    }
+
+
+# Normalized form of the input, with the expenses sorted, and the position of
+# each sorted expense in the original portfolio. Inputs that only differ in the
+# order of their expenses share the same canonical form.
+def canonical_input(input_data: InputData) -> tuple[dict, list[int]]:
+    budget = input_data.portfolio.budget
+    parameters = {
+        name: value.value if isinstance(value, Enum) else value
+        for name, value in vars(input_data.optmization_parameters).items()
+    }
+    expenses = [
+        json.dumps(_normalize_expense(expense), sort_keys=True)
+        for expense in input_data.portfolio.expenses
+    ]
+    order = sorted(range(len(expenses)), key=lambda index: expenses[index])
+
+    normalized = {
+        "start_date": str(input_data.start_date),
+        "budget": {
+            "initial": budget.initial,
+            "recorrent": budget.recorrent,
+            "recurrence": budget.recurrence,
+            "last_recurrence": budget.last_recurrence,
+            "iterations": budget.iterations,
+            "monthly": budget.monthly,
+        },
+        "parameters": parameters,
+        "expenses": [json.loads(expenses[index]) for index in order],
+    }
+
+    return normalized, order
+
+
+def input_key(input_data: InputData) -> tuple[str, list[int]]:
+    normalized, order = canonical_input(input_data)
+    encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+    return hashlib.sha256(encoded.encode()).hexdigest(), order
+
+
+# LRU cache of solution dicts with an optional time to live, in seconds, and an
+# optional directory where entries are also stored as JSON files.
+class SolutionCache:
+    def __init__(
+        self,
+        max_entries: int = 128,
+        ttl: Optional[float] = None,
+        directory: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+        self.__clock = clock
+        self.__entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.__lock = threading.Lock()
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                entry = self.__load(key)
+            elif not self.__is_fresh(entry[0]):
+                self.__entries.pop(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.__entries[key] = entry
+            self.__entries.move_to_end(key)
+            self.__evict()
+            self.hits += 1
+
+            return copy.deepcopy(entry[1])
+
+    def set(self, key: str, solution: dict):
+        entry = (self.__clock(), copy.deepcopy(solution))
+
+        with self.__lock:
+            self.__entries[key] = entry
+            self.__entries.move_to_end(key)
+            self.__evict()
+
+            if self.directory is not None:
+                with open(self.__path(key), "w") as file:
+                    json.dump({"created": entry[0], "solution": entry[1]}, file)
+
+    def clear(self):
+        # the stored entries too, the directory belongs to the cache
+        with self.__lock:
+            self.__entries.clear()
+
+            if self.directory is not None:
+                for name in os.listdir(self.directory):
+                    if name.endswith(".json"):
+                        os.remove(os.path.join(self.directory, name))
+
+    def __is_fresh(self, created: float) -> bool:
+        return self.ttl is None or self.__clock() - created <= self.ttl
+
+    def __evict(self):
+        while len(self.__entries) > self.max_entries:
+            self.__entries.popitem(last=False)
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def __load(self, key: str) -> Optional[tuple[float, dict]]:
+        if self.directory is None or not os.path.exists(self.__path(key)):
+            return None
+
+        with open(self.__path(key)) as file:
+            stored = json.load(file)
+
+        if not self.__is_fresh(stored["created"]):
+            os.remove(self.__path(key))
+            return None
+
+        return stored["created"], stored["solution"]
+
+
+def to_canonical_order(solution: dict, order: list[int]) -> dict:
+    canonical = dict(solution)
+    if len(solution["expenses"]) == len(order):
+        canonical["expenses"] = [solution["expenses"][index] for index in order]
+
+    return canonical
+
+
+def from_canonical_order(solution: dict, order: list[int]) -> dict:
+    restored = dict(solution)
+    if len(solution["expenses"]) == len(order):
+        expenses = [None] * len(order)
+        for position, index in enumerate(order):
+            expenses[index] = solution["expenses"][position]
+        restored["expenses"] = expenses
+
+    return restored
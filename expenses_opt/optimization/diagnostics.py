@@ -0,0 +1,121 @@
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+from ortools.linear_solver import linear_solver_pb2
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+logger = logging.getLogger(__name__)
+
+# hook(event, data), called for every finished stage ("stage") and once with
+# the solver statistics ("solver")
+DiagnosticsHook = Callable[[str, dict], None]
+
+
+class Diagnostics:
+    def __init__(
+        self, track_memory: bool = False, hooks: Iterable[DiagnosticsHook] = ()
+    ) -> None:
+        self.track_memory = track_memory
+        self.hooks = list(hooks)
+        self.stages: dict[str, dict] = dict()
+        self.solver: dict = dict()
+
+        # running memory peak of each open stage, innermost last
+        self.__peaks: list[int] = list()
+        self.__started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str):
+        record = {"time": None, "peak_memory": None}
+        tracing = self.__enter_memory_stage()
+
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["time"] = time.perf_counter() - start
+            if tracing:
+                record["peak_memory"] = self.__exit_memory_stage()
+
+            self.stages[name] = record
+            self.emit("stage", {"name": name, **record})
+
+    def record_solver(self, solver, nonzeros: Optional[int] = None, mip: bool = True):
+        objective = solver.Objective()
+        value = objective.Value()
+        bound = objective.BestBound()
+
+        self.solver = {
+            "variables": solver.NumVariables(),
+            "constraints": solver.NumConstraints(),
+            "nonzeros": nonzeros,
+            # LP solvers have no branch and bound, and OR-Tools complains on
+            # stderr when asked for their nodes
+            "nodes": solver.nodes() if mip else None,
+            "iterations": solver.iterations(),
+            "objective": value,
+            "best_bound": bound,
+            "gap": abs(value - bound) / abs(value) if value else abs(bound),
+            "wall_time": solver.wall_time() / 1000,
+        }
+        self.emit("solver", self.solver)
+
+    def emit(self, event: str, data: dict):
+        logger.debug("%s %s", event, data)
+        for hook in self.hooks:
+            hook(event, data)
+
+    def to_dict(self) -> dict:
+        diagnostics = {
+            "stages": {name: dict(record) for name, record in self.stages.items()},
+            "solver": dict(self.solver),
+        }
+        if resource is not None:
+            # kilobytes on Linux, the peak of the whole process, solver included
+            diagnostics["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        return diagnostics
+
+    def __enter_memory_stage(self) -> bool:
+        if not (self.track_memory or self.__peaks):
+            return False
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracing = True
+
+        # the peak so far belongs to the enclosing stage
+        if self.__peaks:
+            self.__peaks[-1] = max(self.__peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.__peaks.append(0)
+
+        return True
+
+    def __exit_memory_stage(self) -> int:
+        peak = max(self.__peaks.pop(), tracemalloc.get_traced_memory()[1])
+
+        if self.__peaks:
+            self.__peaks[-1] = max(self.__peaks[-1], peak)
+        elif self.__started_tracing:
+            tracemalloc.stop()
+            self.__started_tracing = False
+
+        return peak
+
+
+def count_nonzeros(solver) -> int:
+    model = linear_solver_pb2.MPModelProto()
+    solver.ExportModelToProto(model)
+
+    return sum(
+        sum(1 for coefficient in constraint.coefficient if coefficient != 0)
+        for constraint in model.constraint
+    )
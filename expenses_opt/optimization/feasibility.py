@@ -0,0 +1,56 @@
+import numpy as np
+from expenses_opt.exceptions import InfeasibleProblemException
+from expenses_opt.models.portfolio import Portfolio
+
+# mandatory expenses named in the error, the largest minimums first
+MAX_NAMED_EXPENSES = 5
+
+
+def mandatory_requirements(
+    portfolio: Portfolio, last_periods: np.ndarray
+) -> np.ndarray:
+    # \sum \underline{g}_i over the mandatory expenses with last_i \le k, the
+    # least that must be spent by period k
+    due = portfolio.mandatory_flags & (last_periods >= 0)
+    demands = np.bincount(
+        last_periods[due],
+        weights=portfolio.minimums[due],
+        minlength=portfolio.budget.iterations,
+    )
+    return np.cumsum(demands)
+
+
+def check_mandatory_feasibility(portfolio: Portfolio, last_periods: np.ndarray):
+    # The budget rows bound the spend by period k with b_0 + k \cdot b, so the
+    # mandatory expenses due by k must fit in it. Catches what would otherwise
+    # be a full build and solve ending without a feasible solution.
+    mandatory = portfolio.mandatory_flags & (portfolio.minimums > 0)
+
+    overdue = np.flatnonzero(mandatory & (last_periods < 0))
+    if overdue.size:
+        raise InfeasibleProblemException(
+            "Mandatory expenses due before the first period: "
+            f"{_names(portfolio, overdue)}"
+        )
+
+    requirements = mandatory_requirements(portfolio, last_periods)
+    capacities = portfolio.budget.capacities
+    conflicts = np.flatnonzero(requirements > capacities)
+    if conflicts.size:
+        k_index = conflicts[0]
+        expenses = np.flatnonzero(mandatory & (last_periods <= k_index))
+        raise InfeasibleProblemException(
+            "Not enough budget to attend all mandatory expenses: "
+            f"{requirements[k_index]:.2f} must be spent by period {k_index} "
+            f"and the budget up to it is {capacities[k_index]:.2f}, "
+            f"for {_names(portfolio, expenses)}"
+        )
+
+
+def _names(portfolio: Portfolio, indices: np.ndarray) -> str:
+    indices = indices[np.argsort(-portfolio.minimums[indices], kind="stable")]
+    descriptions = portfolio.descriptions
+    names = ", ".join(descriptions[i_index] for i_index in indices[:MAX_NAMED_EXPENSES])
+    if indices.size > MAX_NAMED_EXPENSES:
+        names += f" and {indices.size - MAX_NAMED_EXPENSES} more"
+    return names
@@ -0,0 +1,122 @@
+import math
+import time
+import numpy as np
+import pendulum
+from ortools.linear_solver import pywraplp
+from expenses_opt.exceptions import InfeasibleProblemException
+from expenses_opt.models.portfolio import Portfolio
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.feasibility import check_mandatory_feasibility
+from expenses_opt.optimization.solution import Solution
+
+# Status of a heuristic schedule, which is feasible but not proven optimal,
+# as a MILP stopped by its time limit with an incumbent. 0 is kept for the
+# proven optima.
+HEURISTIC_STATUS = pywraplp.Solver.FEASIBLE
+
+
+class GreedyPlanner:
+    def __init__(
+        self,
+        portfolio: Portfolio,
+        parameters: OptmizationParameters,
+        start_date: pendulum.Date,
+    ) -> None:
+        self.portfolio = portfolio
+        self.parameters = parameters
+        self.start_date = start_date
+        self.last_periods = portfolio.last_periods(start_date)
+
+        check_mandatory_feasibility(portfolio, self.last_periods)
+
+    @property
+    def weights(self) -> np.ndarray:
+        # 1 / p_i^C, the objective coefficient of \epsilon_i
+        return 1 / self.portfolio.priorities**self.parameters.priority_exponent
+
+    @property
+    def targets(self) -> np.ndarray:
+        return self.portfolio.targets(self.parameters.objective)
+
+    def order(self) -> np.ndarray:
+        # mandatory expenses first, the earliest due first, then the others by
+        # weight, the earliest due first among equal weights
+        mandatory = self.portfolio.mandatory_flags
+        weights = self.weights
+        return np.lexsort(
+            (
+                np.where(mandatory, -weights, self.last_periods),
+                np.where(mandatory, self.last_periods, -weights),
+                ~mandatory,
+            )
+        )
+
+    def objective_value(self, spends: np.ndarray, attended: np.ndarray) -> float:
+        targets = self.targets
+        deviations = np.divide(
+            np.abs(spends.sum(axis=1) - targets),
+            targets,
+            out=np.zeros_like(targets),
+            where=targets > 0,
+        )
+        return float(
+            self.weights @ deviations
+            + self.parameters.deviation_weight * np.count_nonzero(attended)
+        )
+
+    def solve(self) -> Solution:
+        start = time.perf_counter()
+
+        num_expenses = len(self.portfolio)
+        capacities = self.portfolio.budget.capacities
+        cumulative = np.zeros(len(capacities))
+        spends = np.zeros((num_expenses, len(capacities)))
+        attended = np.zeros(num_expenses, bool)
+
+        targets = self.targets
+        minimums = self.portfolio.minimums
+        mandatory = self.portfolio.mandatory_flags
+        weights = self.weights
+        big_a = self.parameters.deviation_weight
+
+        for i_index in self.order():
+            last = self.last_periods[i_index]
+
+            # largest amount that can still be spent in period j without
+            # breaking the budget of j or of any later period
+            slack = np.minimum.accumulate((capacities - cumulative)[::-1])[::-1]
+            available = slack[last] if last >= 0 else 0.0
+            amount = self.__floor_cents(min(targets[i_index], max(available, 0.0)))
+
+            if last < 0 or amount < minimums[i_index]:
+                if mandatory[i_index]:
+                    raise InfeasibleProblemException(
+                        "Heuristic could not attend mandatory expense "
+                        f"{self.portfolio.descriptions[i_index]}"
+                    )
+                continue
+
+            # attending costs w_i (g_i - amount) / g_i + A instead of w_i
+            improves = targets[i_index] > 0 and (
+                big_a < weights[i_index] * amount / targets[i_index]
+            )
+            if not (improves or mandatory[i_index]):
+                continue
+
+            # the last feasible period leaves the most budget for the earlier
+            # due expenses, and can always take the whole amount
+            spends[i_index, last] = amount
+            cumulative[last:] += amount
+            attended[i_index] = True
+
+        return Solution(
+            status=HEURISTIC_STATUS,
+            spends=spends,
+            attended=attended,
+            objective_value=self.objective_value(spends, attended),
+            timings={"heuristic": time.perf_counter() - start},
+        )
+
+    @staticmethod
+    def __floor_cents(value: float) -> float:
+        return math.floor(value * 100 + 1e-6) / 100
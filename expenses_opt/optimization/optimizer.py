@@ -1,11 +1,19 @@
+import numpy as np
 import pendulum
+from ortools.linear_solver import linear_solver_pb2
 from expenses_opt.exceptions import InfeasibleProblemException
 from expenses_opt.optimization.builder import (
+    LP_BACKENDS,
     OptimizerBuilder,
     OptmizationParameters,
 )
-from expenses_opt.models.portfolio import Portfolio
-from expenses_opt.models.expense import Expense
+from expenses_opt.optimization.vectorized import VectorizedOptimizerBuilder
+from expenses_opt.optimization.solution import Solution
+from expenses_opt.optimization.heuristic import GreedyPlanner
+from expenses_opt.optimization.diagnostics import Diagnostics, count_nonzeros
+from expenses_opt.models.portfolio import Budget, Portfolio
+from expenses_opt.models.expense import Expense, ExpenseRange
+from expenses_opt.constants import ModelFormat, Priority
 
 
 class Optimizer:
@@ -14,11 +22,43 @@ class Optimizer:
         portfolio: Portfolio,
         parameters: OptmizationParameters,
         start_date: pendulum.DateTime,
+        diagnostics: Diagnostics = None,
+        counts: np.ndarray = None,
+        model_path: str = None,
     ) -> None:
-        self.__builder: OptimizerBuilder = OptimizerBuilder(
-            portfolio, parameters, start_date
+        self.__diagnostics = diagnostics or Diagnostics()
+        # number of identical expenses each expense stands for, see set_counts
+        self.__counts = counts
+
+        builder_class = (
+            VectorizedOptimizerBuilder if parameters.vectorized else OptimizerBuilder
+        )
+        self.__builder: OptimizerBuilder = builder_class(
+            portfolio, parameters, start_date, diagnostics=self.__diagnostics
         )
-        self.__solver = self.__builder.build_optimization_problem()
+
+        # a model exported by export_model is loaded instead of built
+        with self.__diagnostics.stage("build") as build:
+            if model_path is None:
+                self.__solver = self.__builder.build_optimization_problem()
+            else:
+                self.__solver = self.__builder.load_model(model_path)
+            if counts is not None:
+                self.__builder.set_counts(self.__solver, counts)
+        self.__build_time = build["time"]
+        self.__solver_parameters = self.__builder.solver_parameters()
+
+        # previous solution by solver variable index, used as a MIP hint
+        self.__hint: dict[int, float] = dict()
+        # solver index of x_{i,j}, -1 after the due date, see __x_indices
+        self.__x_index: np.ndarray = None
+        # every variable value of the last solve, by solver index
+        self.__values: np.ndarray = None
+        self.__heuristic_objective = None
+
+        # the greedy schedule is for single expenses, not classes
+        if parameters.warm_start and counts is None:
+            self.__warm_start(portfolio, parameters, start_date)
 
     @property
     def variables(self):
@@ -26,23 +66,172 @@ class Optimizer:
 
     @property
     def expenses(self) -> list[Expense]:
-        return self.__builder.portfolio.expenses
+        # copies, a change must go through the update methods to reach the model
+        return self.__builder.portfolio.copy().expenses
 
-    def solve_optimization_problem(self):
-        status = self.__solver.Solve()
+    @property
+    def y_values(self) -> np.ndarray:
+        # y of the last solve, the number attended for aggregated classes
+        return self.__values[self.__y_indices()]
+
+    def export_model(self, path: str, model_format: ModelFormat = None):
+        self.__builder.export_model(self.__solver, path, model_format)
+
+    def solve_optimization_problem(self) -> Solution:
+        if self.__hint:
+            self.__set_hint()
+
+        with self.__diagnostics.stage("solve") as solve:
+            status = self.__solver.Solve(self.__solver_parameters)
+        solve_time = solve["time"]
+
+        if self.__builder.parameters.diagnostics:
+            self.__diagnostics.record_solver(
+                self.__solver,
+                nonzeros=count_nonzeros(self.__solver),
+                mip=self.__builder.parameters.solver not in LP_BACKENDS,
+            )
 
-        if status in [self.__solver.FEASIBLE, self.__solver.OPTIMAL]:
-            self.build_solution_from_solver()
-        else:
+        if status not in [self.__solver.FEASIBLE, self.__solver.OPTIMAL]:
             raise InfeasibleProblemException(
                 "Optimizer did not found a feasible solution"
             )
 
-        return status
+        self.__values = self.__solution_values()
+        self.__hint = dict(enumerate(self.__values.tolist()))
 
-    def build_solution_from_solver(self):
-        for i_index, expense in enumerate(self.expenses):
-            for j_index in range(self.__builder.iterations):
-                expense.add_partial_spend(
-                    round(self.variables["x"][i_index][j_index].solution_value(), 2)
+        solution = self.build_solution_from_solver(
+            status=status,
+            timings={"build": self.__build_time, "solve": solve_time},
+            heuristic_objective=self.__heuristic_objective,
+        )
+        # the greedy schedule only seeds the first solve
+        self.__heuristic_objective = None
+
+        return solution
+
+    def build_solution_from_solver(
+        self,
+        status: int,
+        timings: dict[str, float] = None,
+        heuristic_objective: float = None,
+    ) -> Solution:
+        with self.__diagnostics.stage("extraction") as extraction:
+            portfolio = self.__builder.portfolio
+            if self.__values is None:
+                self.__values = self.__solution_values()
+
+            # periods after the due date have no x variable and stay zero
+            x_index = self.__x_indices()
+            spends = np.where(
+                x_index >= 0, self.__values[np.maximum(x_index, 0)], 0.0
+            ).round(2)
+
+            maximums = portfolio.maximums
+            if self.__counts is not None:
+                maximums = maximums * self.__counts
+            exceeded = np.flatnonzero(spends.sum(axis=1) > maximums)
+            if exceeded.size:
+                raise ValueError(
+                    "Maximum spend achived for expense "
+                    f"{portfolio.descriptions[exceeded[0]]}"
                 )
+
+            attended = self.y_values > 0.5
+
+        timings = dict(timings or {})
+        timings["extraction"] = extraction["time"]
+
+        return Solution(
+            status=status,
+            spends=spends,
+            attended=attended,
+            objective_value=self.__solver.Objective().Value(),
+            timings=timings,
+            heuristic_objective=heuristic_objective,
+        )
+
+    # Incremental changes to the built model. The next solve starts from the
+    # previous solution, passed as a hint to the backends that support it.
+
+    def add_expense(self, expense: Expense):
+        self.__builder.add_expense(self.__solver, expense)
+        self.__x_index = None
+
+    def remove_expense(self, index: int):
+        for var in self.variables["x"][index] + [self.variables["y"][index]]:
+            self.__hint[var.index()] = 0
+
+        self.__builder.remove_expense(self.__solver, index)
+        self.__x_index = None
+
+    def update_range(self, index: int, expense_range: ExpenseRange):
+        self.__builder.update_range(self.__solver, index, expense_range)
+
+    def update_priority(self, index: int, priority: Priority):
+        self.__builder.update_priority(self.__solver, index, priority)
+
+    def update_budget(self, budget: Budget):
+        self.__builder.update_budget(self.__solver, budget)
+
+    def fix_attended(self, attended: np.ndarray):
+        self.__builder.fix_attended(self.__solver, attended)
+
+    def relax_expenses(self, indices):
+        self.__builder.relax_expenses(self.__solver, indices)
+
+    def restore_expenses(self, indices):
+        self.__builder.restore_expenses(self.__solver, indices)
+
+    def freeze_expenses(self, indices):
+        # x_{i,j} and y_i fixed to the values of the last solve
+        for i_index in indices:
+            for x_i_j in self.variables["x"][i_index]:
+                value = float(self.__values[x_i_j.index()])
+                x_i_j.SetBounds(value, value)
+
+            y_i = self.variables["y"][i_index]
+            value = round(float(self.__values[y_i.index()]))
+            y_i.SetBounds(value, value)
+
+    def set_time_limit(self, max_time: float):
+        # in milliseconds, for the next solves
+        self.__solver.SetTimeLimit(max(int(max_time), 1))
+
+    def __warm_start(self, portfolio, parameters, start_date):
+        try:
+            with self.__diagnostics.stage("heuristic"):
+                schedule = GreedyPlanner(portfolio, parameters, start_date).solve()
+        except InfeasibleProblemException:
+            # the MILP may still find a schedule the greedy planner missed
+            return
+
+        self.__hint = self.__builder.hint_from_schedule(
+            schedule.spends, schedule.attended
+        )
+        self.__heuristic_objective = schedule.objective_value
+
+    def __set_hint(self):
+        variables = self.__solver.variables()
+        values = [self.__hint.get(var.index(), 0.0) for var in variables]
+        self.__solver.SetHint(variables, values)
+
+    def __solution_values(self) -> np.ndarray:
+        # one call for every variable value, instead of one per variable
+        response = linear_solver_pb2.MPSolutionResponse()
+        self.__solver.FillSolutionResponseProto(response)
+        return np.array(response.variable_value)
+
+    def __x_indices(self) -> np.ndarray:
+        # kept until an expense is added or removed
+        if self.__x_index is None:
+            x_index = np.full(
+                (self.__builder.num_expenses, self.__builder.iterations), -1
+            )
+            for i_index, x_i in enumerate(self.variables["x"]):
+                x_index[i_index, : len(x_i)] = [x_i_j.index() for x_i_j in x_i]
+            self.__x_index = x_index
+        return self.__x_index
+
+    def __y_indices(self) -> np.ndarray:
+        return np.array([y_i.index() for y_i in self.variables["y"]], dtype=int)
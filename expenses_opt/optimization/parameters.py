@@ -0,0 +1,93 @@
+from expenses_opt.constants import (
+    BudgetFormulation,
+    OptimizationObjective,
+    SolveMode,
+    SolverBackend,
+)
+from expenses_opt.exceptions import InvalidDataException
+
+
+# TODO use dataclass
+class OptmizationParameters:
+    def __init__(
+        self,
+        priority_exponent: float,
+        deviation_weight: float,
+        max_time: float,
+        vectorized: bool = False,
+        variable_names: bool = False,
+        budget_formulation: BudgetFormulation = BudgetFormulation.EXPANDED,
+        objective: OptimizationObjective = OptimizationObjective.TARGET,
+        solver: SolverBackend = SolverBackend.CBC,
+        num_threads: int = None,
+        relative_gap: float = None,
+        presolve: bool = None,
+        mode: SolveMode = SolveMode.MILP,
+        warm_start: bool = False,
+        diagnostics: bool = False,
+        decompose: bool = False,
+        aggregate: bool = False,
+        rolling_horizon: int = None,
+    ) -> None:
+
+        if priority_exponent < 1:
+            raise InvalidDataException(
+                "Priority exponent must be equal or greater than 1"
+            )
+
+        if deviation_weight < 0:
+            raise InvalidDataException("Weight must be a positive float")
+
+        if max_time < 0:
+            raise InvalidDataException("Max optimization time must be a positive float")
+
+        try:
+            budget_formulation = BudgetFormulation(budget_formulation)
+        except ValueError:
+            raise InvalidDataException(
+                f"Unknown budget formulation: {budget_formulation}"
+            )
+
+        try:
+            objective = OptimizationObjective(objective)
+        except ValueError:
+            raise InvalidDataException(f"Unknown optimization objective: {objective}")
+
+        try:
+            solver = SolverBackend(solver)
+        except ValueError:
+            raise InvalidDataException(f"Unknown solver backend: {solver}")
+
+        try:
+            mode = SolveMode(mode)
+        except ValueError:
+            raise InvalidDataException(f"Unknown solve mode: {mode}")
+
+        if num_threads is not None and num_threads < 1:
+            raise InvalidDataException("Number of threads must be at least 1")
+
+        if relative_gap is not None and relative_gap < 0:
+            raise InvalidDataException("Relative gap must be a positive float")
+
+        if rolling_horizon is not None and rolling_horizon < 1:
+            raise InvalidDataException("Rolling horizon must be at least 1 period")
+
+        self.priority_exponent = priority_exponent
+        self.deviation_weight = deviation_weight
+        self.max_time = max_time
+        self.vectorized = vectorized
+        self.variable_names = variable_names
+        self.budget_formulation = budget_formulation
+        self.objective = objective
+        self.solver = solver
+        self.num_threads = num_threads
+        self.relative_gap = relative_gap
+        self.presolve = presolve
+        self.mode = mode
+        self.warm_start = warm_start
+        self.diagnostics = diagnostics
+        self.decompose = decompose
+        self.aggregate = aggregate
+        # periods solved in detail by each window of the rolling horizon,
+        # None solves the whole horizon at once
+        self.rolling_horizon = rolling_horizon
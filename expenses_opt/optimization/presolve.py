@@ -0,0 +1,229 @@
+import numpy as np
+import pendulum
+from ortools.linear_solver import pywraplp
+from expenses_opt.exceptions import InfeasibleProblemException
+from expenses_opt.models.portfolio import Budget, Portfolio
+from expenses_opt.optimization.aggregation import AggregatedOptimizer
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.diagnostics import Diagnostics
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.solution import Solution
+
+
+class Presolve:
+    # Splits a portfolio before the MILP is built. Expenses only interact
+    # through the budget rows \sum_{j \le k} \sum_i x_{i,j} \le b_0 + k \cdot b,
+    # and an expense never gains from spending above its target, so:
+    #   - an optional expense is never attended when w_i \le A, or when its
+    #     minimum does not fit the budget left from its last period on
+    #   - a budget row k can't bind when the expenses due up to k fit under it
+    #     at their targets, whatever the ones due before k spend
+    #   - expenses due after the last row that can bind are separable, they
+    #     spend their target and cost A
+    # Only the expenses due up to that row are left to the MILP, on a horizon
+    # that ends with it.
+
+    def __init__(
+        self,
+        portfolio: Portfolio,
+        parameters: OptmizationParameters,
+        start_date: pendulum.Date,
+    ) -> None:
+        self.portfolio = portfolio
+        self.parameters = parameters
+        self.last_periods = portfolio.last_periods(start_date)
+
+        self.skipped = self.__never_attended()
+        self.horizon = self.__binding_horizon()
+
+        candidates = ~self.skipped
+        self.coupled = candidates & (self.last_periods < self.horizon)
+        self.separable = candidates & ~self.coupled
+
+    @property
+    def targets(self) -> np.ndarray:
+        return self.portfolio.targets(self.parameters.objective)
+
+    @property
+    def costs(self) -> np.ndarray:
+        # w_i = 1 / p_i^C, the cost of not attending, none when g_i = 0
+        weights = 1 / self.portfolio.priorities**self.parameters.priority_exponent
+        return np.where(self.targets > 0, weights, 0.0)
+
+    def __never_attended(self) -> np.ndarray:
+        capacities = self.portfolio.budget.capacities
+        # budget left from period j on, when nothing else is spent
+        slack = np.minimum.accumulate(capacities[::-1])[::-1]
+        last = self.last_periods
+
+        reachable = last >= 0
+        reachable[reachable] = (
+            self.portfolio.minimums[reachable] <= slack[last[reachable]]
+        )
+
+        mandatory = self.portfolio.mandatory_flags
+        unreachable = np.flatnonzero(mandatory & ~reachable)
+        if unreachable.size:
+            raise InfeasibleProblemException(
+                "Not enough budget to attend mandatory expense "
+                f"{self.portfolio.descriptions[unreachable[0]]}"
+            )
+
+        worthless = self.costs <= self.parameters.deviation_weight
+        return ~mandatory & (worthless | ~reachable)
+
+    def __binding_horizon(self) -> int:
+        # number of leading periods whose budget rows can bind. U_k bounds
+        # the spend of the expenses due up to k, row k can bind when
+        # U_{k-1} + \sum_{last_i = k} g_i exceeds b_0 + k \cdot b
+        capacities = self.portfolio.budget.capacities
+        candidates = ~self.skipped & (self.last_periods >= 0)
+        demands = np.bincount(
+            self.last_periods[candidates],
+            weights=self.targets[candidates],
+            minlength=len(capacities),
+        )
+
+        horizon = 0
+        self.__bounds = np.zeros(len(capacities))
+        bound = 0.0
+        for k_index, (demand, capacity) in enumerate(zip(demands, capacities)):
+            if bound + demand > capacity:
+                horizon = k_index + 1
+            bound = min(bound + demand, capacity)
+            self.__bounds[k_index] = bound
+
+        return horizon
+
+    @property
+    def coupled_bound(self) -> float:
+        # most the coupled expenses can spend without exceeding their targets
+        return float(self.__bounds[self.horizon - 1]) if self.horizon else 0.0
+
+    def separable_schedule(self) -> np.ndarray:
+        # target of each separable expense in the earliest period after the
+        # horizon where it fits, the earliest due first
+        capacities = self.portfolio.budget.capacities
+        cumulative = np.zeros(len(capacities))
+        cumulative[self.horizon :] = self.coupled_bound
+        spends = np.zeros((len(self.portfolio), len(capacities)))
+
+        indices = np.flatnonzero(self.separable)
+        for i_index in indices[np.argsort(self.last_periods[indices], kind="stable")]:
+            amount = self.targets[i_index]
+            slack = np.minimum.accumulate((capacities - cumulative)[::-1])[::-1]
+            first = self.horizon + np.argmax(
+                slack[self.horizon : self.last_periods[i_index] + 1] >= amount - 1e-9
+            )
+
+            spends[i_index, first] = amount
+            cumulative[first:] += amount
+
+        return spends
+
+    def objective_value(self) -> float:
+        # cost of the expenses solved here, A for the separable ones and w_i
+        # for the ones never attended
+        return float(
+            self.parameters.deviation_weight * np.count_nonzero(self.separable)
+            + self.costs[self.skipped].sum()
+        )
+
+    def coupled_portfolio(self) -> Portfolio:
+        budget = self.portfolio.budget
+        return self.portfolio.subset(
+            np.flatnonzero(self.coupled),
+            Budget(
+                initial=budget.initial,
+                recorrent=budget.recorrent,
+                recurrence=budget.recurrence,
+                last_recurrence=budget.last_recurrence,
+                iterations=self.horizon,
+                monthly=budget.monthly,
+            ),
+        )
+
+
+class DecomposedOptimizer:
+    # Same results as Optimizer, solving only the expenses the presolve could
+    # not settle. Falls back to the full model when nothing is separable or
+    # the reduced solution breaks a budget row.
+
+    def __init__(
+        self,
+        portfolio: Portfolio,
+        parameters: OptmizationParameters,
+        start_date: pendulum.DateTime,
+        diagnostics: Diagnostics = None,
+    ) -> None:
+        self.portfolio = portfolio
+        self.parameters = parameters
+        self.start_date = start_date
+        self.__diagnostics = diagnostics or Diagnostics()
+
+        with self.__diagnostics.stage("presolve") as presolve:
+            self.presolve = Presolve(portfolio, parameters, start_date)
+        self.__presolve_time = presolve["time"]
+
+    @property
+    def reduced(self) -> bool:
+        return bool(np.isfinite(self.presolve.targets).all()) and (
+            np.count_nonzero(self.presolve.coupled) < len(self.portfolio)
+        )
+
+    def solve_optimization_problem(self) -> Solution:
+        if not self.reduced:
+            return self.__solve_full()
+
+        presolve = self.presolve
+        spends = presolve.separable_schedule()
+        attended = presolve.separable.copy()
+        objective_value = presolve.objective_value()
+        timings = {"presolve": self.__presolve_time}
+        status = pywraplp.Solver.OPTIMAL
+        heuristic_objective = None
+
+        if presolve.horizon:
+            solution = self.__optimizer_class(
+                portfolio=presolve.coupled_portfolio(),
+                parameters=self.parameters,
+                start_date=self.start_date,
+                diagnostics=self.__diagnostics,
+            ).solve_optimization_problem()
+
+            # the separable schedule assumed the coupled spend stays under
+            # the bound, up to the rounding of each spend to cents
+            tolerance = 0.005 * solution.num_expenses
+            if solution.spends.sum() > presolve.coupled_bound + tolerance:
+                return self.__solve_full()
+
+            spends[presolve.coupled, : presolve.horizon] = solution.spends
+            attended[presolve.coupled] = solution.attended
+            objective_value += solution.objective_value
+            timings.update(solution.timings)
+            status = solution.status
+            if solution.heuristic_objective is not None:
+                heuristic_objective = (
+                    solution.heuristic_objective + presolve.objective_value()
+                )
+
+        return Solution(
+            status=status,
+            spends=spends,
+            attended=attended,
+            objective_value=objective_value,
+            timings=timings,
+            heuristic_objective=heuristic_objective,
+        )
+
+    @property
+    def __optimizer_class(self):
+        return AggregatedOptimizer if self.parameters.aggregate else Optimizer
+
+    def __solve_full(self) -> Solution:
+        return self.__optimizer_class(
+            portfolio=self.portfolio,
+            parameters=self.parameters,
+            start_date=self.start_date,
+            diagnostics=self.__diagnostics,
+        ).solve_optimization_problem()
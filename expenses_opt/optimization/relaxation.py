@@ -0,0 +1,84 @@
+import copy
+import numpy as np
+import pendulum
+from expenses_opt.constants import SolverBackend
+from expenses_opt.exceptions import InfeasibleProblemException
+from expenses_opt.models.portfolio import Portfolio
+from expenses_opt.optimization.builder import LP_BACKENDS, OptmizationParameters
+from expenses_opt.optimization.diagnostics import Diagnostics
+from expenses_opt.optimization.heuristic import HEURISTIC_STATUS
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.solution import Solution
+
+# a relaxed y_i above 1 - FRACTIONAL_TOLERANCE is taken as attended, and a
+# relaxed spend within it of the minimum reaches it
+FRACTIONAL_TOLERANCE = 1e-6
+
+
+class RelaxAndRoundOptimizer:
+    # Solves the model of OptimizerBuilder with an LP backend, which drops the
+    # integrality of y_i, for a bound on the MILP optimum. The expenses whose
+    # relaxed spend reaches their minimum are then attended, y_i fixed to 1
+    # and the others to 0, and the pure LP left gives a feasible plan. y_i
+    # itself is not rounded: it only has to cover \sum_j x_{i,j} / max_i and
+    # costs A y_i, so the LP keeps it at that ratio and an expense funded
+    # below half its maximum would be rounded out. The relaxed plan, without
+    # the spends of the expenses left out, already fits the rounded model;
+    # the integral y_i are a fallback for numerical trouble.
+
+    def __init__(
+        self,
+        portfolio: Portfolio,
+        parameters: OptmizationParameters,
+        start_date: pendulum.DateTime,
+        diagnostics: Diagnostics = None,
+    ) -> None:
+        self.portfolio = portfolio
+        self.__diagnostics = diagnostics or Diagnostics()
+
+        lp_parameters = copy.copy(parameters)
+        if lp_parameters.solver not in LP_BACKENDS:
+            lp_parameters.solver = SolverBackend.GLOP
+        # the greedy hint is for the MILP, LP backends don't take one
+        lp_parameters.warm_start = False
+
+        self.optimizer = Optimizer(
+            portfolio, lp_parameters, start_date, diagnostics=self.__diagnostics
+        )
+
+    def solve_optimization_problem(self) -> Solution:
+        relaxed = self.optimizer.solve_optimization_problem()
+        relaxed_y = self.optimizer.y_values
+        relaxed_totals = relaxed.spends.sum(axis=1)
+        mandatory = self.portfolio.mandatory_flags
+
+        timings = dict(relaxed.timings)
+        solution = None
+        for attended in (
+            (relaxed_totals > FRACTIONAL_TOLERANCE)
+            & (relaxed_totals >= self.portfolio.minimums - FRACTIONAL_TOLERANCE),
+            relaxed_y > 1 - FRACTIONAL_TOLERANCE,
+        ):
+            self.optimizer.fix_attended(attended | mandatory)
+            with self.__diagnostics.stage("rounding") as rounding:
+                try:
+                    solution = self.optimizer.solve_optimization_problem()
+                except InfeasibleProblemException:
+                    solution = None
+            timings["rounding"] = timings.get("rounding", 0.0) + rounding["time"]
+            if solution is not None:
+                break
+
+        if solution is None:
+            raise InfeasibleProblemException(
+                "Optimizer did not found a feasible rounding of the LP relaxation"
+            )
+
+        return Solution(
+            status=HEURISTIC_STATUS,
+            spends=solution.spends,
+            attended=solution.attended,
+            objective_value=solution.objective_value,
+            timings=timings,
+            bound=relaxed.objective_value,
+        )
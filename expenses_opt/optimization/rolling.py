@@ -0,0 +1,94 @@
+import math
+import time
+import numpy as np
+import pendulum
+from expenses_opt.models.portfolio import Portfolio
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.diagnostics import Diagnostics
+from expenses_opt.optimization.heuristic import HEURISTIC_STATUS, GreedyPlanner
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.solution import Solution
+
+
+class RollingHorizonOptimizer:
+    # Plans long horizons K periods at a time, on one model built by
+    # Optimizer. A window [s, s + K) solves the expenses due in it exactly,
+    # with the expenses due before it frozen to their decided spends and
+    # those due after it relaxed by relax_expenses: y_i continuous and one
+    # spend in the last feasible period. The expenses due in the window are
+    # then frozen and the next window starts K periods later, so there are
+    # ceil(M / K) solves, each with only the binaries of one window. Every
+    # solve is hinted with the previous one, the first with the greedy
+    # schedule when warm_start is set.
+
+    def __init__(
+        self,
+        portfolio: Portfolio,
+        parameters: OptmizationParameters,
+        start_date: pendulum.DateTime,
+        diagnostics: Diagnostics = None,
+    ) -> None:
+        self.portfolio = portfolio
+        self.parameters = parameters
+        self.start_date = start_date
+        self.last_periods = portfolio.last_periods(start_date)
+        self.__diagnostics = diagnostics or Diagnostics()
+
+        self.__planner = GreedyPlanner(portfolio, parameters, start_date)
+        self.__optimizer = Optimizer(
+            portfolio, parameters, start_date, diagnostics=self.__diagnostics
+        )
+
+    @property
+    def iterations(self) -> int:
+        return self.portfolio.budget.iterations
+
+    @property
+    def detailed(self) -> int:
+        return self.parameters.rolling_horizon
+
+    @property
+    def num_windows(self) -> int:
+        return max(math.ceil(self.iterations / self.detailed), 1)
+
+    def solve_optimization_problem(self) -> Solution:
+        optimizer = self.__optimizer
+        spends = np.zeros((len(self.portfolio), self.iterations))
+        attended = np.zeros(len(self.portfolio), bool)
+        # the model is built once, in __init__
+        timings = {"solve": 0.0, "extraction": 0.0}
+
+        num_windows = self.num_windows
+        deadline = time.perf_counter() + self.parameters.max_time / 1000
+
+        for window in range(num_windows):
+            end = (window + 1) * self.detailed
+            # the first window also has the expenses that can't spend at all
+            due = self.last_periods < end
+            if window > 0:
+                due &= self.last_periods >= end - self.detailed
+            due = np.flatnonzero(due)
+
+            optimizer.restore_expenses(due)
+            optimizer.relax_expenses(np.flatnonzero(self.last_periods >= end))
+
+            # the time left is shared among the windows left
+            optimizer.set_time_limit(
+                (deadline - time.perf_counter()) / (num_windows - window) * 1000
+            )
+            solution = optimizer.solve_optimization_problem()
+            timings["build"] = solution.timings["build"]
+            for name in ["solve", "extraction"]:
+                timings[name] += solution.timings[name]
+
+            optimizer.freeze_expenses(due)
+            spends[due] = solution.spends[due]
+            attended[due] = solution.attended[due]
+
+        return Solution(
+            status=HEURISTIC_STATUS,
+            spends=spends,
+            attended=attended,
+            objective_value=self.__planner.objective_value(spends, attended),
+            timings=timings,
+        )
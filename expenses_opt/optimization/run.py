@@ -1,54 +1,212 @@
 import json
+import os
+import pendulum
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
 from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.heuristic import GreedyPlanner
+from expenses_opt.optimization.presolve import DecomposedOptimizer
+from expenses_opt.optimization.aggregation import AggregatedOptimizer
+from expenses_opt.optimization.rolling import RollingHorizonOptimizer
+from expenses_opt.optimization.relaxation import RelaxAndRoundOptimizer
+from expenses_opt.constants import SolveMode
+from expenses_opt.optimization.builder import OptmizationParameters
 from expenses_opt.models.input import InputData, build_input_data
 from expenses_opt.exceptions import InfeasibleProblemException
+from expenses_opt.optimization.diagnostics import Diagnostics
+from expenses_opt.optimization.solution import Solution
+from expenses_opt.models.portfolio import Portfolio
+from expenses_opt.optimization.cache import (
+    SolutionCache,
+    input_key,
+    from_canonical_order,
+    to_canonical_order,
+)
 
 
-def run_optimization(input_data: InputData) -> Optimizer:
+def solution_to_dict(
+    portfolio: Portfolio,
+    solution: Optional[Solution],
+    status: int,
+    error: str = "",
+    start_date: pendulum.Date = None,
+) -> dict:
+    # one row sum and one conversion for the whole matrix, not per expense
+    descriptions = portfolio.descriptions
+    num_expenses = len(descriptions)
+    if solution is not None:
+        total_costs = solution.total_costs.tolist()
+        partial_spends = solution.spends.tolist()
+    else:
+        total_costs = [0] * num_expenses
+        partial_spends = [[] for _ in range(num_expenses)]
+
+    # the OR-Tools status: 0 for a proven optimum, 1 for a feasible plan,
+    # heuristic or stopped by a limit, and 1 with an error when none was found
+    solution_dict = {
+        "status": status,
+        "expenses": [
+            {
+                "expense": description,
+                "total_cost": total_cost,
+                "partial_spends": spends,
+            }
+            for description, total_cost, spends in zip(
+                descriptions, total_costs, partial_spends
+            )
+        ],
+        "error": error,
+    }
+
+    # first day of the period of each partial spend
+    if start_date is not None:
+        calendar = portfolio.budget.calendar(start_date)
+        solution_dict["periods"] = [str(date) for date in calendar.start_dates()]
+
+    if solution is not None and solution.heuristic_gap is not None:
+        solution_dict["heuristic_gap"] = solution.heuristic_gap
+
+    if solution is not None and solution.bound is not None:
+        solution_dict["bound"] = solution.bound
+        solution_dict["gap"] = solution.gap
+
+    return solution_dict
+
+
+def run_optimization(input_data: InputData, diagnostics: Diagnostics = None) -> dict:
 
     error_msg = ""
+    solution = None
+    parameters = input_data.optmization_parameters
+
+    diagnostics = diagnostics or Diagnostics()
+    diagnostics.track_memory = diagnostics.track_memory or parameters.diagnostics
+
     try:
-        optimizer = Optimizer(
-            portfolio=input_data.portfolio,
-            parameters=input_data.optmization_parameters,
-            start_date=input_data.start_date,
-        )
-        status = optimizer.solve_optimization_problem()
+        if parameters.mode == SolveMode.HEURISTIC:
+            planner = GreedyPlanner(
+                portfolio=input_data.portfolio,
+                parameters=parameters,
+                start_date=input_data.start_date,
+            )
+            with diagnostics.stage("heuristic"):
+                solution = planner.solve()
+        else:
+            if parameters.mode == SolveMode.RELAX:
+                optimizer_class = RelaxAndRoundOptimizer
+            elif parameters.rolling_horizon is not None:
+                optimizer_class = RollingHorizonOptimizer
+            elif parameters.decompose:
+                optimizer_class = DecomposedOptimizer
+            elif parameters.aggregate:
+                optimizer_class = AggregatedOptimizer
+            else:
+                optimizer_class = Optimizer
+            optimizer = optimizer_class(
+                portfolio=input_data.portfolio,
+                parameters=parameters,
+                start_date=input_data.start_date,
+                diagnostics=diagnostics,
+            )
+            solution = optimizer.solve_optimization_problem()
+        status = solution.status
     except InfeasibleProblemException as err:
         status = 1
         error_msg = str(err)
 
-    solution_dict = {
-        "status": status,
-        "expenses": list(
-            map(
-                lambda expense: {
-                    "expense": expense.description,
-                    "total_cost": expense.cost,
-                    "partial_spends": expense.partial_spends,
-                },
-                input_data.portfolio.expenses,
-            )
-        ),
-        "error": error_msg,
-    }
+    with diagnostics.stage("serialization"):
+        solution_dict = solution_to_dict(
+            input_data.portfolio,
+            solution,
+            status=status,
+            error=error_msg,
+            start_date=input_data.start_date,
+        )
+
+    if parameters.diagnostics:
+        solution_dict["diagnostics"] = diagnostics.to_dict()
 
     return solution_dict
 
 
-def run_optimization_from_json(path: str):
-    with open(path) as file:
-        raw_data = json.load(file)
+def run_optimization_from_json(
+    path: str, cache: SolutionCache = None, diagnostics: Diagnostics = None
+):
+    diagnostics = diagnostics or Diagnostics()
+    with diagnostics.stage("load_json"):
+        with open(path) as file:
+            raw_data = json.load(file)
+
+    return run_optimization_from_raw_data(
+        raw_data, cache=cache, diagnostics=diagnostics
+    )
+
+
+def run_optimization_from_raw_data(
+    raw_data: dict, cache: SolutionCache = None, diagnostics: Diagnostics = None
+):
+    diagnostics = diagnostics or Diagnostics()
+    with diagnostics.stage("build_input_data"):
+        input_data = build_input_data(raw_data)
+
+    if cache is None:
+        return run_optimization(input_data, diagnostics=diagnostics)
 
-    return run_optimization_from_raw_data(raw_data)
+    key, order = input_key(input_data)
+    cached = cache.get(key)
+    if cached is not None:
+        return from_canonical_order(cached, order)
 
-def run_optimization_from_raw_data(raw_data:dict):
-    input_data = build_input_data(raw_data)
+    solution = run_optimization(input_data, diagnostics=diagnostics)
+    # diagnostics describe this run only, a cache hit reports none
+    stored = {name: value for name, value in solution.items() if name != "diagnostics"}
+    cache.set(key, to_canonical_order(stored, order))
+
+    return solution
+
+
+# Input data shared by every scenario of a batch. It is sent to each worker
+# process once, when the worker starts, instead of once per scenario.
+_batch_input_data: InputData = None
+
+
+def _init_batch_worker(input_data: InputData):
+    global _batch_input_data
+    _batch_input_data = input_data
+
+
+def _run_batch_scenario(parameters: OptmizationParameters) -> dict:
+    input_data = InputData(
+        start_date=_batch_input_data.start_date,
+        portfolio=_batch_input_data.portfolio,
+        optmization_parameters=parameters,
+    )
 
     return run_optimization(input_data)
 
 
-if __name__ == "__main__":
-    from pprint import pprint
+def run_optimizations_batch(
+    input_data: InputData,
+    scenarios: list[OptmizationParameters],
+    workers: int = None,
+) -> list[dict]:
+    workers = workers or os.cpu_count()
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, max(len(scenarios), 1)),
+        initializer=_init_batch_worker,
+        initargs=(input_data,),
+    ) as executor:
+        futures = [
+            executor.submit(_run_batch_scenario, scenario) for scenario in scenarios
+        ]
+
+        results = list()
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as err:
+                # a failed scenario is reported in its slot, the batch goes on
+                results.append({"status": 1, "expenses": [], "error": str(err)})
 
-    pprint(run_optimization_from_json(path="input.json"))
+    return results
@@ -0,0 +1,155 @@
+import json
+import math
+import os
+import tempfile
+from ortools.linear_solver import linear_solver_pb2
+from ortools.linear_solver.python import model_builder
+from expenses_opt.constants import ModelFormat
+from expenses_opt.exceptions import InvalidDataException
+
+EXTENSIONS = {".mps": ModelFormat.MPS, ".lp": ModelFormat.LP}
+
+
+def layout_path(path: str) -> str:
+    # sidecar file with the index of every variable and constraint group
+    return f"{path}.layout.json"
+
+
+def model_format_from_path(path: str) -> ModelFormat:
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), ModelFormat.PROTO)
+
+
+def write_model(
+    model_proto: linear_solver_pb2.MPModelProto,
+    layout: dict,
+    path: str,
+    model_format: ModelFormat,
+    lp_text: str = None,
+):
+    if model_format == ModelFormat.PROTO:
+        with open(path, "wb") as file:
+            file.write(model_proto.SerializeToString())
+    elif model_format == ModelFormat.MPS:
+        with open(path, "w") as file:
+            file.write(to_mps(model_proto))
+    else:
+        with open(path, "w") as file:
+            file.write(lp_text)
+
+    with open(layout_path(path), "w") as file:
+        json.dump(dict(layout, format=model_format.value), file)
+
+
+def read_model(path: str) -> tuple[linear_solver_pb2.MPModelProto, dict]:
+    with open(layout_path(path)) as file:
+        layout = json.load(file)
+    model_format = ModelFormat(layout["format"])
+
+    if model_format == ModelFormat.PROTO:
+        with open(path, "rb") as file:
+            return linear_solver_pb2.MPModelProto.FromString(file.read()), layout
+
+    if model_format == ModelFormat.LP:
+        # the OR-Tools LP parser reads another dialect than its exporter writes
+        raise InvalidDataException("LP models can only be exported, use MPS or proto")
+
+    helper = model_builder.ModelBuilder().helper
+    with open(path) as file:
+        if not helper.import_from_mps_string(file.read()):
+            raise InvalidDataException(f"Could not read MPS model {path}")
+
+    # as in VectorizedOptimizerBuilder, the helper only writes the proto to files
+    with tempfile.TemporaryDirectory() as directory:
+        proto_path = os.path.join(directory, "model.pb")
+        helper.write_model_to_file(proto_path)
+        with open(proto_path, "rb") as file:
+            model_proto = linear_solver_pb2.MPModelProto.FromString(file.read())
+
+    return model_proto, layout
+
+
+def _number(value: float) -> str:
+    # shortest text that reads back as the same float
+    return repr(float(value))
+
+
+def to_mps(model_proto: linear_solver_pb2.MPModelProto) -> str:
+    # Free MPS with every column in variable index order and full precision.
+    # The OR-Tools exporter moves the integer columns first and keeps 6
+    # significant digits, which breaks the layout and rounds the amounts.
+    columns = [f"v{index}" for index in range(len(model_proto.variable))]
+    rows = [f"c{index}" for index in range(len(model_proto.constraint))]
+
+    lines = ["NAME          " + (model_proto.name or "expenses_opt")]
+    if model_proto.maximize:
+        lines += ["OBJSENSE", "    MAX"]
+
+    lines.append("ROWS")
+    lines.append(" N  COST")
+    rhs = list()
+    ranges = list()
+    entries = [list() for _ in columns]
+    for row, constraint in zip(rows, model_proto.constraint):
+        lower, upper = constraint.lower_bound, constraint.upper_bound
+        if lower == upper:
+            sense, value = "E", lower
+        elif math.isinf(lower) and math.isinf(upper):
+            # a free row is kept as an N row, read back as a free constraint
+            # after the objective, the first N row
+            sense, value = "N", None
+        elif math.isinf(lower):
+            sense, value = "L", upper
+        else:
+            sense, value = "G", lower
+            if not math.isinf(upper):
+                ranges.append((row, upper - lower))
+
+        lines.append(f" {sense}  {row}")
+        if value:
+            rhs.append((row, value))
+        for index, coefficient in zip(constraint.var_index, constraint.coefficient):
+            entries[index].append((row, coefficient))
+
+    lines.append("COLUMNS")
+    for column, variable, column_entries in zip(columns, model_proto.variable, entries):
+        if variable.objective_coefficient:
+            column_entries = [("COST", variable.objective_coefficient)] + column_entries
+        if variable.is_integer:
+            lines.append(f"    M{column}  'MARKER'  'INTORG'")
+        # a column without entries still declares the variable
+        for row, coefficient in column_entries or [("COST", 0.0)]:
+            lines.append(f"    {column}  {row}  {_number(coefficient)}")
+        if variable.is_integer:
+            lines.append(f"    M{column}  'MARKER'  'INTEND'")
+
+    lines.append("RHS")
+    if model_proto.objective_offset:
+        # the right hand side of the objective is minus its offset
+        lines.append(f"    RHS  COST  {_number(-model_proto.objective_offset)}")
+    for row, value in rhs:
+        lines.append(f"    RHS  {row}  {_number(value)}")
+
+    if ranges:
+        lines.append("RANGES")
+        for row, value in ranges:
+            lines.append(f"    RNG  {row}  {_number(value)}")
+
+    lines.append("BOUNDS")
+    for column, variable in zip(columns, model_proto.variable):
+        lower, upper = variable.lower_bound, variable.upper_bound
+        if lower == upper:
+            lines.append(f" FX BND  {column}  {_number(lower)}")
+            continue
+
+        if math.isinf(lower):
+            lines.append(f" MI BND  {column}")
+        else:
+            lines.append(f" LO BND  {column}  {_number(lower)}")
+        if math.isinf(upper):
+            lines.append(f" PL BND  {column}")
+        else:
+            lines.append(f" UP BND  {column}  {_number(upper)}")
+
+    lines.append("ENDATA")
+
+    return "\n".join(lines) + "\n"
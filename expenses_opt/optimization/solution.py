@@ -0,0 +1,66 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Solution:
+    status: int
+    spends: np.ndarray
+    attended: np.ndarray
+    objective_value: float
+    timings: Mapping[str, float] = field(default_factory=dict)
+    # objective of the greedy schedule used as warm start, if any
+    heuristic_objective: Optional[float] = None
+    # lower bound on the MILP optimum, e.g. from its LP relaxation
+    bound: Optional[float] = None
+
+    def __post_init__(self):
+        # results are shared between threads and runs, so nothing is writable
+        spends = np.array(self.spends, dtype=float)
+        attended = np.array(self.attended, dtype=bool)
+        spends.flags.writeable = False
+        attended.flags.writeable = False
+
+        object.__setattr__(self, "spends", spends)
+        object.__setattr__(self, "attended", attended)
+        object.__setattr__(self, "timings", MappingProxyType(dict(self.timings)))
+
+    @property
+    def num_expenses(self):
+        return self.spends.shape[0]
+
+    @property
+    def iterations(self):
+        return self.spends.shape[1]
+
+    @property
+    def total_costs(self) -> np.ndarray:
+        return self.spends.sum(axis=1)
+
+    @property
+    def heuristic_gap(self) -> Optional[float]:
+        # relative gap of the greedy schedule against this solution
+        if self.heuristic_objective is None:
+            return None
+        if self.objective_value == 0:
+            return 0.0 if self.heuristic_objective == 0 else float("inf")
+        return (self.heuristic_objective - self.objective_value) / abs(
+            self.objective_value
+        )
+
+    @property
+    def gap(self) -> Optional[float]:
+        # relative gap of this solution against the bound, as the solver reports it
+        if self.bound is None:
+            return None
+        if self.objective_value == 0:
+            return abs(self.bound)
+        return abs(self.objective_value - self.bound) / abs(self.objective_value)
+
+    def cost(self, index: int) -> float:
+        return float(self.total_costs[index])
+
+    def partial_spends(self, index: int) -> list[float]:
+        return self.spends[index].tolist()
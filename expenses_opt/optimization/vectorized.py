@@ -0,0 +1,325 @@
+import os
+import tempfile
+import numpy as np
+import pendulum
+from scipy import sparse
+from ortools.linear_solver import linear_solver_pb2
+from ortools.linear_solver.python import model_builder
+
+from expenses_opt.models.portfolio import Portfolio
+from expenses_opt.constants import BudgetFormulation, OptimizationObjective
+from expenses_opt.optimization.diagnostics import Diagnostics
+from expenses_opt.optimization.builder import (
+    OptimizerBuilder,
+    OptmizationParameters,
+)
+
+
+# Same model as OptimizerBuilder, but the portfolio is read into NumPy arrays
+# and every variable and constraint block is loaded into the solver at once.
+class VectorizedOptimizerBuilder(OptimizerBuilder):
+    def __init__(
+        self,
+        portfolio: Portfolio,
+        parameters: OptmizationParameters,
+        start_date: pendulum.Date,
+        objective: OptimizationObjective = None,
+        diagnostics: Diagnostics = None,
+    ) -> None:
+        super().__init__(portfolio, parameters, start_date, objective, diagnostics)
+
+        self.__rows: list[tuple] = list()
+
+        # index of x_{i,j} in the solver, -1 where the period is after the due date
+        mask = self.period_mask
+        self.x_indices = np.full(mask.shape, -1)
+        self.x_indices[mask] = np.arange(mask.sum())
+
+    @property
+    def named_variables(self) -> bool:
+        return self.parameters.variable_names
+
+    @property
+    def num_x(self):
+        return int(np.sum(self.last_periods + 1))
+
+    @property
+    def num_aggregates(self):
+        if self.budget_formulation == BudgetFormulation.EXPANDED:
+            return 0
+        return self.iterations
+
+    @property
+    def num_variables(self):
+        return self.num_x + 2 * self.num_expenses + self.num_aggregates
+
+    @property
+    def y_indices(self) -> np.ndarray:
+        return self.num_x + np.arange(self.num_expenses)
+
+    @property
+    def epsilon_indices(self) -> np.ndarray:
+        return self.y_indices + self.num_expenses
+
+    @property
+    def spend_indices(self) -> np.ndarray:
+        start = self.num_x + 2 * self.num_expenses
+        return start + np.arange(self.num_aggregates)
+
+    def build_optimization_problem(self):
+        solver = super().build_optimization_problem()
+        with self.diagnostics.stage("load_model"):
+            self.__load_model(solver)
+
+        return solver
+
+    def create_variables(self, solver):
+        n_x = self.num_x
+
+        self.__lower_bounds = np.zeros(self.num_variables)
+        self.__upper_bounds = np.concatenate(
+            [
+                np.repeat(self.portfolio.maximums, self.last_periods + 1),
+                np.ones(self.num_expenses),
+                np.full(self.num_expenses, np.inf),
+                self.__aggregate_upper_bounds(),
+            ]
+        )
+        self.__integers = np.arange(n_x, n_x + self.num_expenses)
+        self.__objective = np.zeros(self.num_variables)
+
+    def set_objective_function(self, solver):
+        big_c = self.parameters.priority_exponent
+        big_a = self.parameters.deviation_weight
+
+        self.__objective[self.epsilon_indices] = 1 / (self.portfolio.priorities**big_c)
+        self.__objective[self.y_indices] = big_a
+
+    def constraint_total_spend_respect_max_cost(self, solver):
+        # \sum_{j=0}^M x_{i,j} <= \overline{g}_i
+        self.__add_sum_rows(
+            "max_cost",
+            coefficients=-self.portfolio.maximums,
+            extra_indices=self.y_indices,
+            lower=np.full(self.num_expenses, -np.inf),
+            upper=np.zeros(self.num_expenses),
+        )
+
+    def constraint_respect_min_cost(self, solver):
+        # \sum_{j=0}^M x_{i,j}  - y_i \cdot \underline{g}_i >= 0
+        self.__add_sum_rows(
+            "min_cost",
+            coefficients=-self.portfolio.minimums,
+            extra_indices=self.y_indices,
+            lower=np.zeros(self.num_expenses),
+            upper=np.full(self.num_expenses, np.inf),
+        )
+
+    def constraint_total_spend_respect_iteration_budget(self, solver):
+        if self.budget_formulation == BudgetFormulation.PERIOD:
+            self.constraint_period_spend_respect_iteration_budget(solver=solver)
+            return
+
+        if self.budget_formulation == BudgetFormulation.CUMULATIVE:
+            self.constraint_cumulative_spend_respect_iteration_budget(solver=solver)
+            return
+
+        # \sum_{i=1}^N \sum_{j=0}^k x_{i,j} <= b_0 + k \cdot b
+        x_indices = self.x_indices
+        columns = [
+            x_indices[:, : k_index + 1][self.period_mask[:, : k_index + 1]]
+            for k_index in range(self.iterations)
+        ]
+        sizes = [len(cols) for cols in columns]
+
+        self.__add_rows(
+            "budget",
+            row_indices=np.repeat(np.arange(self.iterations), sizes),
+            col_indices=np.concatenate(columns) if columns else np.zeros(0, int),
+            values=np.ones(sum(sizes)),
+            lower=np.zeros(self.iterations),
+            upper=self.portfolio.budget.capacities,
+        )
+
+    def constraint_period_spend_respect_iteration_budget(self, solver):
+        # s_k = \sum_{i=1}^N x_{i,k}
+        self.__add_aggregate_rows(spend_coefficient=-1, x_coefficient=1)
+
+        # \sum_{j=0}^k s_j \le b_0 + k \cdot b
+        rows, cols = np.tril_indices(self.iterations)
+        self.__add_rows(
+            "budget",
+            row_indices=rows,
+            col_indices=self.spend_indices[cols],
+            values=np.ones(len(rows)),
+            lower=np.zeros(self.iterations),
+            upper=self.portfolio.budget.capacities,
+        )
+
+    def constraint_cumulative_spend_respect_iteration_budget(self, solver):
+        # c_k = c_{k-1} + \sum_{i=1}^N x_{i,k}, with 0 \le c_k \le b_0 + k \cdot b
+        self.__add_aggregate_rows(spend_coefficient=1, x_coefficient=-1)
+
+    def constraint_absolute_error_definition(self, solver):
+        targets = self.portfolio.targets(self.objective)
+
+        # lower constraint
+        self.__add_sum_rows(
+            "target_lower",
+            coefficients=targets,
+            extra_indices=self.epsilon_indices,
+            lower=targets,
+            upper=np.full(self.num_expenses, np.inf),
+        )
+
+        # upper constraint
+        self.__add_sum_rows(
+            "target_upper",
+            coefficients=-targets,
+            extra_indices=self.epsilon_indices,
+            lower=np.full(self.num_expenses, -np.inf),
+            upper=targets,
+        )
+
+    def constraint_mandatory_expenses_must_be_attended(self, solver):
+        self.__add_rows(
+            "mandatory",
+            row_indices=np.arange(self.num_expenses),
+            col_indices=self.y_indices,
+            values=np.ones(self.num_expenses),
+            lower=self.portfolio.mandatory_flags.astype(float),
+            upper=np.ones(self.num_expenses),
+        )
+
+    def __add_sum_rows(self, name, coefficients, extra_indices, lower, upper):
+        # one row per expense: \sum_j x_{i,j} + coefficient_i \cdot extra_i
+        expenses = np.arange(self.num_expenses)
+        self.__add_rows(
+            name,
+            row_indices=np.concatenate(
+                [np.repeat(expenses, self.last_periods + 1), expenses]
+            ),
+            col_indices=np.concatenate(
+                [self.x_indices[self.period_mask], extra_indices]
+            ),
+            values=np.concatenate([np.ones(self.num_x), coefficients]),
+            lower=lower,
+            upper=upper,
+        )
+
+    def __add_aggregate_rows(self, spend_coefficient, x_coefficient):
+        # one row per period: spend_coefficient \cdot a_k + x_coefficient \cdot \sum_i x_{i,k}
+        # (minus a_{k-1} for the cumulative formulation)
+        m = self.iterations
+        mask = self.period_mask.T
+        rows = [np.arange(m), np.repeat(np.arange(m), mask.sum(axis=1))]
+        cols = [self.spend_indices, self.x_indices.T[mask]]
+        values = [
+            np.full(m, spend_coefficient, float),
+            np.full(self.num_x, x_coefficient, float),
+        ]
+
+        if self.budget_formulation == BudgetFormulation.CUMULATIVE:
+            rows.append(np.arange(1, m))
+            cols.append(self.spend_indices[:-1])
+            values.append(np.full(m - 1, -1.0))
+
+        self.__add_rows(
+            "spend",
+            row_indices=np.concatenate(rows),
+            col_indices=np.concatenate(cols),
+            values=np.concatenate(values),
+            lower=np.zeros(m),
+            upper=np.zeros(m),
+        )
+
+    def __aggregate_upper_bounds(self):
+        if self.budget_formulation == BudgetFormulation.CUMULATIVE:
+            return self.portfolio.budget.capacities
+        return np.full(self.num_aggregates, np.inf)
+
+    def __add_rows(self, name, row_indices, col_indices, values, lower, upper):
+        matrix = sparse.csr_matrix(
+            (values, (row_indices, col_indices)),
+            shape=(len(lower), self.num_variables),
+        )
+        self.__rows.append((name, matrix, lower, upper))
+
+    def __load_model(self, solver):
+        helper = model_builder.ModelBuilder().helper
+
+        if self.__rows:
+            matrix = sparse.vstack([rows[1] for rows in self.__rows], format="csr")
+            lower = np.concatenate([rows[2] for rows in self.__rows])
+            upper = np.concatenate([rows[3] for rows in self.__rows])
+        else:
+            matrix = sparse.csr_matrix((0, self.num_variables))
+            lower = upper = np.zeros(0)
+        matrix.eliminate_zeros()
+
+        helper.fill_model_from_sparse_data(
+            self.__lower_bounds,
+            self.__upper_bounds,
+            self.__objective,
+            lower.astype(float),
+            upper.astype(float),
+            matrix,
+        )
+        for index in self.__integers:
+            helper.set_var_integrality(int(index), True)
+
+        if self.parameters.variable_names:
+            self.__set_variable_names(helper)
+
+        # The model builder helper has no in-memory proto export, so the model
+        # goes through a temporary binary MPModelProto file. It is still the
+        # fastest way in: on 10000 expenses x 24 periods (145k variables, 2.6M
+        # nonzeros) the fill and file round trip take 0.33 s, while adding
+        # the variables and extending the rows of an MPModelProto from Python
+        # takes 1.0 s. LoadModelFromProto, 0.3 to 0.6 s, is paid either way.
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "model.pb")
+            helper.write_model_to_file(path)
+            with open(path, "rb") as file:
+                model_proto = linear_solver_pb2.MPModelProto.FromString(file.read())
+
+        error = solver.LoadModelFromProto(model_proto)
+        if error:
+            raise RuntimeError(f"Could not load vectorized model: {error}")
+
+        variables = solver.variables()
+        n_x = self.num_x
+        ends = np.cumsum(self.last_periods + 1)
+        self.variables["x"] = [
+            variables[end - size : end]
+            for end, size in zip(ends, self.last_periods + 1)
+        ]
+        self.variables["y"] = variables[n_x : n_x + self.num_expenses]
+        self.variables["epsilon"] = variables[
+            n_x + self.num_expenses : n_x + 2 * self.num_expenses
+        ]
+        self.variables["spend"] = variables[n_x + 2 * self.num_expenses :]
+
+        constraints = solver.constraints()
+        start = 0
+        for name, matrix, _, _ in self.__rows:
+            end = start + matrix.shape[0]
+            self.constraints[name].extend(constraints[start:end])
+            start = end
+
+        self.__rows = list()
+
+    def __set_variable_names(self, helper):
+        for i_index in range(self.num_expenses):
+            for j_index in range(self.last_periods[i_index] + 1):
+                helper.set_var_name(
+                    int(self.x_indices[i_index, j_index]), f"x[{i_index}, {j_index}]"
+                )
+            helper.set_var_name(int(self.y_indices[i_index]), f"y[{i_index}]")
+            helper.set_var_name(
+                int(self.epsilon_indices[i_index]), f"epsilon[{i_index}]"
+            )
+
+        prefix = "s" if self.budget_formulation == BudgetFormulation.PERIOD else "c"
+        for k_index, index in enumerate(self.spend_indices):
+            helper.set_var_name(int(index), f"{prefix}[{k_index}]")
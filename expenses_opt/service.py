@@ -0,0 +1,315 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from typing import Callable, Optional
+from expenses_opt.exceptions import ExpectedExpcetion
+from expenses_opt.optimization.run import run_optimization_from_raw_data
+
+# part of the deadline kept to send the answer back, in seconds
+DEADLINE_MARGIN = 0.2
+
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+# request deadline, in milliseconds from the moment the request is received
+DEADLINE_HEADER = "x-deadline-ms"
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        self.status = status
+        self.message = message
+        super().__init__(message)
+
+
+class DeadlineExceeded(ExpectedExpcetion):
+    pass
+
+
+def apply_deadline(raw_data: dict, deadline: Optional[float]) -> dict:
+    # The solver time limit is what is left of the deadline when the solve
+    # starts, so the time spent waiting for a worker is taken from it.
+    if deadline is None:
+        return raw_data
+
+    remaining = (deadline - time.time() - DEADLINE_MARGIN) * 1000
+    if remaining <= 0:
+        raise DeadlineExceeded("Deadline expired before the solve started")
+
+    parameters = dict(raw_data.get("optimization_parameters", {}))
+    max_time = parameters.get("max_time")
+    parameters["max_time"] = remaining if max_time is None else min(max_time, remaining)
+
+    return dict(raw_data, optimization_parameters=parameters)
+
+
+def solve_request(raw_data: dict, deadline: Optional[float]) -> dict:
+    return run_optimization_from_raw_data(apply_deadline(raw_data, deadline))
+
+
+def _error(message: str) -> dict:
+    return {"status": 1, "expenses": [], "error": message}
+
+
+class OptimizationService:
+    # HTTP front end over a process pool of solvers, on the standard library
+    # only. POST /optimize takes the JSON read by build_input_data and answers
+    # with the result of run_optimization. At most max_pending requests are
+    # solved or waiting for a worker, the next ones get 503 right away.
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        workers: int = None,
+        max_pending: int = None,
+        default_deadline: float = None,
+        solve: Callable[[dict, Optional[float]], dict] = solve_request,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count()
+        self.max_pending = max_pending or 2 * self.workers
+        # in milliseconds, for the requests without a deadline header
+        self.default_deadline = default_deadline
+        self.pending = 0
+
+        self.__solve = solve
+        self.__executor: Optional[ProcessPoolExecutor] = None
+        self.__server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self.__executor = self.__new_executor()
+        self.__server = await asyncio.start_server(self.__handle, self.host, self.port)
+        # the bound port, when 0 was given
+        self.port = self.__server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    async def serve_forever(self):
+        await self.__server.serve_forever()
+
+    async def __aenter__(self) -> "OptimizationService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def __handle(self, reader, writer):
+        # every connection is answered, or dropped when its client is gone,
+        # and closed whatever happens
+        try:
+            try:
+                method, path, headers, body = await self.__read_request(reader)
+                status, payload = await self.__route(method, path, headers, body)
+            except HTTPError as err:
+                status, payload = err.status, _error(err.message)
+            except ConnectionError:
+                return
+            except Exception as err:
+                status = HTTPStatus.INTERNAL_SERVER_ERROR
+                payload = _error(f"Internal error: {err!r}")
+
+            extra_headers = dict()
+            if status == HTTPStatus.SERVICE_UNAVAILABLE:
+                extra_headers["Retry-After"] = "1"
+
+            self.__write_response(writer, status, payload, extra_headers)
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def __route(self, method: str, path: str, headers: dict, body: bytes):
+        if path == "/health":
+            if method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Use GET")
+            return HTTPStatus.OK, {
+                "workers": self.workers,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+            }
+
+        if path == "/optimize":
+            if method != "POST":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST")
+            return await self.__optimize(headers, body)
+
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown path {path}")
+
+    async def __optimize(self, headers: dict, body: bytes):
+        if self.pending >= self.max_pending:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Too many pending requests")
+
+        deadline = self.__deadline(headers)
+        try:
+            raw_data = json.loads(body)
+        except ValueError as err:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {err}")
+        if not isinstance(raw_data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected a JSON object")
+
+        loop = asyncio.get_running_loop()
+        future = self.__submit(raw_data, deadline)
+        executor = self.__executor
+
+        # the request stays pending until its worker is done with it, even
+        # when the client was already answered
+        self.pending += 1
+        future.add_done_callback(lambda _: self.__release(loop))
+
+        timeout = None if deadline is None else max(deadline - time.time(), 0)
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), timeout
+            )
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            # a solve still waiting for a worker is dropped
+            future.cancel()
+            raise HTTPError(HTTPStatus.GATEWAY_TIMEOUT, "Deadline exceeded")
+        except BrokenProcessPool:
+            # the worker died, with every solve it was running or waiting for
+            self.__replace_broken_executor(executor)
+            raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, "Solver process died")
+        except (ExpectedExpcetion, KeyError, ValueError, TypeError) as err:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid input: {err!r}")
+        except Exception as err:
+            raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, str(err))
+
+        return HTTPStatus.OK, result
+
+    def __new_executor(self) -> ProcessPoolExecutor:
+        # forked workers would inherit the open client sockets and keep them
+        # from closing, spawned ones start clean
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def __submit(self, raw_data: dict, deadline: Optional[float]) -> Future:
+        try:
+            return self.__executor.submit(self.__solve, raw_data, deadline)
+        except BrokenProcessPool:
+            self.__replace_broken_executor(self.__executor)
+            return self.__executor.submit(self.__solve, raw_data, deadline)
+
+    def __replace_broken_executor(self, broken: ProcessPoolExecutor):
+        # A dead worker breaks the whole pool, every later submit would fail.
+        # Requests of the same pool all see it broken, it is replaced once.
+        if self.__executor is broken:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = self.__new_executor()
+
+    def __release(self, loop):
+        # called by the executor, the counter is changed on the event loop
+        try:
+            loop.call_soon_threadsafe(self.__decrement)
+        except RuntimeError:
+            # the loop was closed with the service stopped
+            pass
+
+    def __decrement(self):
+        self.pending -= 1
+
+    def __deadline(self, headers: dict) -> Optional[float]:
+        milliseconds = headers.get(DEADLINE_HEADER, self.default_deadline)
+        if milliseconds is None:
+            return None
+
+        try:
+            milliseconds = float(milliseconds)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid {DEADLINE_HEADER}")
+        if milliseconds <= 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid {DEADLINE_HEADER}")
+
+        return time.time() + milliseconds / 1000
+
+    @staticmethod
+    async def __read_request(reader) -> tuple[str, str, dict, bytes]:
+        try:
+            request_line = (await reader.readline()).decode("latin-1")
+            method, target, _ = request_line.split()
+
+            headers = dict()
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed HTTP request")
+
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request too large")
+
+        try:
+            body = await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Incomplete request body")
+
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    @staticmethod
+    def __write_response(writer, status: HTTPStatus, payload: dict, headers: dict):
+        body = json.dumps(payload).encode()
+        lines = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ] + [f"{name}: {value}" for name, value in headers.items()]
+
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+
+async def serve(**kwargs):
+    async with OptimizationService(**kwargs) as service:
+        print(f"Serving on http://{service.host}:{service.port}")
+        await service.serve_forever()
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Optimization HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, help="solver processes")
+    parser.add_argument(
+        "--max-pending", type=int, help="requests solving or queued before 503"
+    )
+    parser.add_argument(
+        "--deadline-ms", type=float, help="deadline of the requests without one"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(
+            serve(
+                host=args.host,
+                port=args.port,
+                workers=args.workers,
+                max_pending=args.max_pending,
+                default_deadline=args.deadline_ms,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import json
+import numpy as np
+import pytest
+from expenses_opt.models.input import build_input_data
+from expenses_opt.models.portfolio import Budget, Portfolio
+from expenses_opt.optimization.aggregation import AggregatedOptimizer, ExpenseClasses
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.run import run_optimization
+from expenses_opt.benchmarks.generator import START_DATE, random_portfolio
+
+
+def _parameters(**kwargs):
+    return OptmizationParameters(
+        priority_exponent=2, deviation_weight=0.1, max_time=30000, **kwargs
+    )
+
+
+def _repeated_portfolio(seed, copies, budget_ratio=0.3):
+    base = random_portfolio(
+        num_expenses=10, iterations=6, seed=seed, budget_ratio=budget_ratio
+    )
+    budget = base.budget
+    return Portfolio(
+        [expense for expense in base.expenses for _ in range(copies)],
+        Budget(
+            initial=budget.initial * copies,
+            recorrent=budget.recorrent * copies,
+            recurrence=budget.recurrence,
+            last_recurrence=budget.last_recurrence,
+            iterations=budget.iterations,
+        ),
+    )
+
+
+def test_classes_group_identical_expenses():
+    portfolio = _repeated_portfolio(seed=0, copies=3)
+    classes = ExpenseClasses(portfolio, portfolio.last_periods(START_DATE))
+
+    assert len(classes) == 10
+    assert classes.representatives.tolist() == list(range(0, 30, 3))
+    assert classes.classes.tolist() == np.repeat(np.arange(10), 3).tolist()
+    assert classes.counts.tolist() == [3] * 10
+    assert classes.ranks.tolist() == [0, 1, 2] * 10
+
+
+def test_split_spends_evenly_in_cents():
+    portfolio = _repeated_portfolio(seed=0, copies=3)
+    classes = ExpenseClasses(portfolio, portfolio.last_periods(START_DATE))
+
+    spends = np.zeros((10, 6))
+    spends[0, 1] = 100
+    attended = np.zeros(10)
+    attended[0] = 3
+
+    expense_spends, expense_attended = classes.split(spends, attended)
+
+    assert expense_spends[:3, 1].tolist() == [33.34, 33.33, 33.33]
+    assert expense_spends[:3].sum() == pytest.approx(100)
+    assert expense_attended.tolist() == [True] * 3 + [False] * 27
+
+
+@pytest.mark.parametrize("seed", [0, 2, 4])
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_aggregated_model_matches_full_model(seed, vectorized):
+    portfolio = _repeated_portfolio(seed=seed, copies=3)
+    parameters = _parameters(vectorized=vectorized)
+
+    full = Optimizer(portfolio, parameters, START_DATE).solve_optimization_problem()
+    optimizer = AggregatedOptimizer(portfolio, parameters, START_DATE)
+    solution = optimizer.solve_optimization_problem()
+
+    assert optimizer.aggregated
+    assert solution.objective_value == pytest.approx(full.objective_value, abs=1e-6)
+
+    totals = solution.total_costs
+    spent_by_period = np.cumsum(solution.spends.sum(axis=0))
+    assert np.all(spent_by_period <= portfolio.budget.capacities + 0.01)
+    assert np.all(solution.attended[portfolio.mandatory_flags])
+    assert np.all(
+        totals[solution.attended] >= portfolio.minimums[solution.attended] - 0.01
+    )
+    assert np.all(totals <= portfolio.maximums + 0.01)
+    assert np.all(totals[~solution.attended] == 0)
+
+
+def test_aggregate_option_from_json():
+    with open("test_input.json") as file:
+        raw_data = json.load(file)
+    expected = run_optimization(build_input_data(raw_data))
+
+    raw_data["optimization_parameters"]["aggregate"] = True
+    solution = run_optimization(build_input_data(raw_data))
+
+    assert solution == expected
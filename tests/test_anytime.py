@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import numpy as np
+import pytest
+from expenses_opt.optimization.anytime import AnytimeSolver
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.benchmarks.generator import START_DATE, random_portfolio
+
+
+def _parameters(max_time=20000, **kwargs):
+    return OptmizationParameters(
+        priority_exponent=2, deviation_weight=0.1, max_time=max_time, **kwargs
+    )
+
+
+@pytest.mark.parametrize("warm_start", [False, True])
+def test_incumbents_improve_up_to_the_optimum(warm_start):
+    portfolio = random_portfolio(num_expenses=40, iterations=6, seed=1)
+    parameters = _parameters(warm_start=warm_start)
+
+    incumbents = list(AnytimeSolver(portfolio, parameters, START_DATE).solutions())
+    objectives = [incumbent.solution.objective_value for incumbent in incumbents]
+
+    assert objectives == sorted(objectives, reverse=True)
+    assert incumbents[-1].optimal and incumbents[-1].gap == 0
+    assert all(not incumbent.optimal for incumbent in incumbents[:-1])
+    assert [incumbent.solution.status for incumbent in incumbents] == [1] * (
+        len(incumbents) - 1
+    ) + [0]
+
+    # in whole cents, so no better than the continuous model
+    milp = Optimizer(portfolio, parameters, START_DATE).solve_optimization_problem()
+    assert objectives[-1] == pytest.approx(milp.objective_value, rel=1e-3)
+
+    solution = incumbents[-1].solution
+    spent_by_period = np.cumsum(solution.spends.sum(axis=0))
+    assert np.all(spent_by_period <= portfolio.budget.capacities + 1e-6)
+    assert np.all(solution.attended[portfolio.mandatory_flags])
+
+
+def test_closing_the_stream_stops_the_search():
+    portfolio = random_portfolio(num_expenses=1000, iterations=12, seed=0)
+    solver = AnytimeSolver(portfolio, _parameters(max_time=600000), START_DATE)
+
+    threads = threading.active_count()
+    stream = solver.solutions()
+    first = next(stream)
+    assert threading.active_count() == threads + 1
+    # returns once the search thread is done, long before max_time
+    stream.close()
+
+    assert first.solution.num_expenses == 1000
+    assert threading.active_count() == threads
+
+
+def test_async_stream():
+    portfolio = random_portfolio(num_expenses=20, iterations=4, seed=2)
+    solver = AnytimeSolver(portfolio, _parameters(), START_DATE)
+
+    async def collect():
+        return [incumbent async for incumbent in solver.asolutions()]
+
+    incumbents = asyncio.run(collect())
+    assert incumbents[-1].optimal
@@ -0,0 +1,83 @@
+import json
+from expenses_opt.benchmarks import rolling_horizon, startup, suite
+from expenses_opt.benchmarks.generator import (
+    START_DATE,
+    random_portfolio,
+    random_raw_data,
+)
+from expenses_opt.models.input import build_input_data
+
+
+def test_generator_knobs():
+    portfolio = random_portfolio(
+        num_expenses=200, iterations=6, seed=1, mandatory_ratio=0.5, due_spread=0.5
+    )
+
+    mandatory = sum(expense.mandatory for expense in portfolio.expenses)
+    assert 60 < mandatory < 140
+    assert max(portfolio.due_dates_in_days(START_DATE)) <= 0.5 * 6 * 30
+
+    same = random_portfolio(
+        num_expenses=200, iterations=6, seed=1, mandatory_ratio=0.5, due_spread=0.5
+    )
+    assert [repr(expense) for expense in same.expenses] == [
+        repr(expense) for expense in portfolio.expenses
+    ]
+
+
+def test_raw_data_builds_the_same_portfolio():
+    portfolio = random_portfolio(num_expenses=20, iterations=4, seed=2)
+    input_data = build_input_data(
+        random_raw_data(num_expenses=20, iterations=4, seed=2)
+    )
+
+    assert input_data.start_date == START_DATE
+    assert input_data.portfolio.budget.capacities.tolist() == (
+        portfolio.budget.capacities.tolist()
+    )
+    assert [
+        (expense.description, expense.due_date, expense.mandatory)
+        for expense in input_data.portfolio.expenses
+    ] == [
+        (expense.description, expense.due_date, expense.mandatory)
+        for expense in portfolio.expenses
+    ]
+
+
+def test_suite_writes_comparable_json(tmp_path):
+    baseline_path = tmp_path / "baseline.json"
+    argv = ["--expenses", "10", "--iterations", "3", "--repeat", "1"]
+
+    suite.main(argv + ["--output", str(baseline_path)])
+    report = suite.main(argv + ["--compare", str(baseline_path)])
+
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+
+    assert baseline["results"][0]["case"]["expenses"] == 10
+    assert set(baseline["results"][0]["times"]) == set(suite.STAGES)
+
+    comparison = suite.compare(baseline, report)
+    assert len(comparison) == 1
+    assert set(comparison[0]["ratios"]) == set(suite.STAGES)
+
+
+def test_rolling_horizon_benchmark():
+    results = rolling_horizon.main(
+        ["--expenses", "20", "--iterations", "6", "--rolling-horizon", "2"]
+    )
+
+    assert len(results) == 1
+    assert results[0]["loss"] < 0.01
+    assert results[0]["speedup"] > 0
+
+
+def test_validate_starts_without_the_solvers():
+    command = ["validate", "test_input.json"]
+
+    assert startup.loaded_modules(command) == []
+    # the time budget is checked by the benchmark, not here, where the
+    # machine load decides it
+    report = startup.time_startup(command, repeat=1)
+    assert report["command"] == "validate test_input.json"
+    assert report["time"] > 0 and report["interpreter"] > 0
@@ -0,0 +1,88 @@
+import json
+import pytest
+from expenses_opt.bulk import read_checkpoint, run_bulk_files, solve_record
+from expenses_opt.optimization.run import run_optimization_from_raw_data
+
+
+@pytest.fixture
+def records():
+    with open("test_input.json") as file:
+        raw_data = json.load(file)
+
+    records = list()
+    for index, exponent in enumerate((1, 2, 3)):
+        parameters = dict(raw_data["optimization_parameters"])
+        parameters["priority_exponent"] = exponent
+        records.append(
+            dict(raw_data, id=f"household-{index}", optimization_parameters=parameters)
+        )
+    return records
+
+
+def _write_input(path, records):
+    with open(path, "w") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+        file.write("\n")
+        file.write("not json\n")
+
+
+def _read_output(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+
+@pytest.mark.parametrize("ordered", [False, True])
+def test_bulk_matches_single_runs(tmp_path, records, ordered):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(input_path, records)
+
+    written = run_bulk_files(str(input_path), str(output_path), 2, ordered=ordered)
+
+    results = _read_output(output_path)
+    assert written == len(results) == 4
+    if ordered:
+        assert [result["record"] for result in results] == [0, 1, 2, 4]
+
+    by_record = {result.pop("record"): result for result in results}
+    for index, record in enumerate(records):
+        expected = run_optimization_from_raw_data(record)
+        assert by_record[index] == dict(id=record["id"], **expected)
+    assert by_record[4]["status"] == 1
+    assert by_record[4]["error"]
+
+
+def test_bulk_resumes_from_its_output(tmp_path, records):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(input_path, records)
+    with open(output_path, "w") as file:
+        file.write(json.dumps({"record": 1, "status": 0}) + "\n")
+        # cut by a crash while writing
+        file.write('{"record": 2, "sta')
+
+    assert read_checkpoint(str(output_path)) == {1}
+
+    written = run_bulk_files(str(input_path), str(output_path), 2, resume=True)
+
+    results = _read_output(output_path)
+    assert written == 3
+    assert sorted(result["record"] for result in results) == [0, 1, 2, 4]
+
+
+def test_record_time_limit_is_capped(records, monkeypatch):
+    limits = list()
+
+    def run(raw_data):
+        limits.append(raw_data["optimization_parameters"]["max_time"])
+        return run_optimization_from_raw_data(raw_data)
+
+    monkeypatch.setattr("expenses_opt.bulk.run_optimization_from_raw_data", run)
+    records[0]["optimization_parameters"]["max_time"] = 60000
+    records[1]["optimization_parameters"]["max_time"] = 1000
+
+    results = [
+        solve_record(json.dumps(record), max_time=5000) for record in records[:2]
+    ]
+
+    assert limits == [5000, 1000]
+    assert [result["id"] for result in results] == ["household-0", "household-1"]
@@ -0,0 +1,116 @@
+import json
+import os
+import pytest
+from expenses_opt.optimization import run
+from expenses_opt.optimization.cache import SolutionCache
+
+
+@pytest.fixture
+def raw_data():
+    with open("test_input.json") as file:
+        return json.load(file)
+
+
+@pytest.fixture
+def counted_runs(monkeypatch):
+    calls = list()
+    original = run.run_optimization
+
+    def counted(input_data, **kwargs):
+        calls.append(input_data)
+        return original(input_data, **kwargs)
+
+    monkeypatch.setattr(run, "run_optimization", counted)
+    return calls
+
+
+def test_cache_hit_skips_solver(raw_data, counted_runs):
+    cache = SolutionCache()
+
+    first = run.run_optimization_from_raw_data(raw_data, cache=cache)
+    second = run.run_optimization_from_raw_data(raw_data, cache=cache)
+
+    assert first == second
+    assert len(counted_runs) == 1
+    assert cache.stats == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_cache_key_ignores_expenses_order(raw_data, counted_runs):
+    cache = SolutionCache()
+    first = run.run_optimization_from_raw_data(raw_data, cache=cache)
+
+    reordered = dict(raw_data, expenses=list(reversed(raw_data["expenses"])))
+    second = run.run_optimization_from_raw_data(reordered, cache=cache)
+
+    assert len(counted_runs) == 1
+    assert second["expenses"] == list(reversed(first["expenses"]))
+
+
+def test_cache_key_depends_on_parameters(raw_data, counted_runs):
+    cache = SolutionCache()
+    run.run_optimization_from_raw_data(raw_data, cache=cache)
+
+    raw_data["optimization_parameters"]["deviation_weight"] = 1
+    run.run_optimization_from_raw_data(raw_data, cache=cache)
+
+    assert len(counted_runs) == 2
+    assert cache.misses == 2
+
+
+def test_cache_returns_copies():
+    cache = SolutionCache()
+    cache.set("key", {"status": 0, "expenses": [], "error": ""})
+
+    cache.get("key")["expenses"].append("changed")
+
+    assert cache.get("key")["expenses"] == []
+
+
+def test_cache_entries_expire():
+    now = [0.0]
+    cache = SolutionCache(ttl=10, clock=lambda: now[0])
+    cache.set("key", {"status": 0})
+
+    now[0] = 5
+    assert cache.get("key") == {"status": 0}
+
+    now[0] = 11
+    assert cache.get("key") is None
+    assert cache.stats == {"hits": 1, "misses": 1, "size": 0}
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SolutionCache(max_entries=2)
+    cache.set("a", {"status": 0})
+    cache.set("b", {"status": 0})
+    cache.get("a")
+    cache.set("c", {"status": 0})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_cache_disk_store(tmp_path, raw_data, counted_runs):
+    first = run.run_optimization_from_raw_data(
+        raw_data, cache=SolutionCache(directory=str(tmp_path))
+    )
+
+    # a new cache on the same directory, as in another process
+    cache = SolutionCache(directory=str(tmp_path))
+    second = run.run_optimization_from_raw_data(raw_data, cache=cache)
+
+    assert first == second
+    assert len(counted_runs) == 1
+    assert cache.hits == 1
+
+
+def test_clear_empties_the_disk_store(tmp_path):
+    cache = SolutionCache(directory=str(tmp_path))
+    cache.set("key", {"status": 0})
+
+    cache.clear()
+
+    assert cache.get("key") is None
+    assert SolutionCache(directory=str(tmp_path)).get("key") is None
+    assert os.listdir(tmp_path) == []
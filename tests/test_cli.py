@@ -0,0 +1,47 @@
+import json
+import pytest
+from expenses_opt.cli import main
+from expenses_opt.optimization.run import run_optimization_from_json
+
+
+def test_solve_writes_the_result(tmp_path):
+    output = tmp_path / "result.json"
+
+    status = main(["solve", "test_input.json", "--output", str(output)])
+
+    with open(output) as file:
+        result = json.load(file)
+    assert status == result["status"] == 0
+    assert result == run_optimization_from_json("test_input.json")
+
+
+@pytest.mark.parametrize(
+    "status, error, code",
+    [(0, "", 0), (1, "", 0), (1, "Optimizer did not found a feasible solution", 1)],
+)
+def test_solve_exit_code(tmp_path, monkeypatch, status, error, code):
+    def run(raw_data):
+        return {"status": status, "expenses": [], "error": error}
+
+    monkeypatch.setattr(
+        "expenses_opt.optimization.run.run_optimization_from_raw_data", run
+    )
+
+    assert (
+        main(["solve", "test_input.json", "--output", str(tmp_path / "out.json")])
+        == code
+    )
+
+
+def test_validate(tmp_path, capsys):
+    assert main(["validate", "test_input.json"]) == 0
+    assert "11 expenses" in capsys.readouterr().out
+
+    with open("test_input.json") as file:
+        raw_data = json.load(file)
+    del raw_data["budget"]
+    path = tmp_path / "invalid.json"
+    path.write_text(json.dumps(raw_data))
+
+    assert main(["validate", str(path)]) == 1
+    assert "budget" in capsys.readouterr().err
@@ -0,0 +1,86 @@
+import json
+import logging
+import pytest
+from expenses_opt.optimization.diagnostics import Diagnostics
+from expenses_opt.optimization.run import (
+    run_optimization_from_json,
+    run_optimization_from_raw_data,
+)
+
+CONSTRAINT_STAGES = [
+    "constraint_total_spend_respect_max_cost",
+    "constraint_respect_min_cost",
+    "constraint_total_spend_respect_iteration_budget",
+    "constraint_absolute_error_definition",
+    "constraint_mandatory_expenses_must_be_attended",
+]
+
+
+@pytest.fixture
+def raw_data():
+    with open("test_input.json") as file:
+        raw_data = json.load(file)
+    raw_data["optimization_parameters"]["diagnostics"] = True
+    return raw_data
+
+
+def test_no_diagnostics_by_default(capsys):
+    solution = run_optimization_from_json("test_input.json")
+
+    assert "diagnostics" not in solution
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_diagnostics_section(raw_data, vectorized):
+    raw_data["optimization_parameters"]["vectorized"] = vectorized
+    diagnostics = run_optimization_from_raw_data(raw_data)["diagnostics"]
+
+    stages = diagnostics["stages"]
+    for name in ["build_input_data", "build", "create_variables", "solve"]:
+        assert stages[name]["time"] >= 0
+    for name in CONSTRAINT_STAGES:
+        assert name in stages
+    assert stages["build"]["peak_memory"] >= stages["create_variables"]["peak_memory"]
+    assert ("load_model" in stages) == vectorized
+
+    solver = diagnostics["solver"]
+    assert solver["variables"] > 0
+    assert solver["constraints"] > 0
+    assert solver["nonzeros"] > 0
+    for name in ["nodes", "iterations", "objective", "best_bound", "gap"]:
+        assert name in solver
+
+
+def test_lp_diagnostics_have_no_nodes(raw_data, capfd):
+    raw_data["optimization_parameters"]["solver"] = "glop"
+    diagnostics = run_optimization_from_raw_data(raw_data)["diagnostics"]
+
+    assert diagnostics["solver"]["nodes"] is None
+    assert "nodes" not in capfd.readouterr().err
+
+
+def test_diagnostics_hooks_and_logging(raw_data, caplog):
+    events = list()
+    diagnostics = Diagnostics(hooks=[lambda event, data: events.append(event)])
+
+    with caplog.at_level(logging.DEBUG, logger="expenses_opt.optimization"):
+        run_optimization_from_raw_data(raw_data, diagnostics=diagnostics)
+
+    assert events.count("solver") == 1
+    assert events.count("stage") == len(diagnostics.stages)
+    assert any("solve" in record.getMessage() for record in caplog.records)
+
+
+def test_nested_stage_memory():
+    diagnostics = Diagnostics(track_memory=True)
+
+    with diagnostics.stage("outer"):
+        with diagnostics.stage("inner"):
+            data = [0] * 100_000
+        del data
+
+    stages = diagnostics.stages
+    assert stages["inner"]["peak_memory"] >= 100_000 * 8
+    assert stages["outer"]["peak_memory"] >= stages["inner"]["peak_memory"]
+    assert stages["outer"]["time"] >= stages["inner"]["time"]
@@ -0,0 +1,81 @@
+import pytest
+from expenses_opt.constants import Priority
+from expenses_opt.exceptions import InfeasibleProblemException
+from expenses_opt.models.expense import Expense, ExpenseRange
+from expenses_opt.models.portfolio import Budget, Portfolio
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.feasibility import (
+    check_mandatory_feasibility,
+    mandatory_requirements,
+)
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.benchmarks.generator import START_DATE
+
+
+def _expense(description, days, minimum, mandatory=True):
+    return Expense(
+        description=description,
+        due_date=START_DATE.add(days=days),
+        priority=Priority.HIGHT,
+        range=ExpenseRange(minimum=minimum, maximum=minimum * 2, target=minimum),
+        mandatory=mandatory,
+    )
+
+
+def _portfolio(expenses):
+    budget = Budget(
+        initial=100, recorrent=100, recurrence=30, last_recurrence=0, iterations=4
+    )
+    return Portfolio(expenses, budget)
+
+
+def test_mandatory_requirements_by_period():
+    portfolio = _portfolio(
+        [
+            _expense("Rent", 10, 80),
+            _expense("Insurance", 40, 50),
+            _expense("Trip", 40, 500, mandatory=False),
+            _expense("Taxes", 100, 30),
+        ]
+    )
+    last_periods = portfolio.last_periods(START_DATE)
+
+    assert mandatory_requirements(portfolio, last_periods).tolist() == [
+        80,
+        130,
+        130,
+        160,
+    ]
+    check_mandatory_feasibility(portfolio, last_periods)
+
+
+def test_early_conflict_names_period_and_expenses():
+    # 250 is below the total budget of 400, but must be spent by period 1
+    portfolio = _portfolio(
+        [
+            _expense("Rent", 10, 80),
+            _expense("Insurance", 40, 170),
+            _expense("Taxes", 100, 30),
+        ]
+    )
+    parameters = OptmizationParameters(
+        priority_exponent=2, deviation_weight=0.2, max_time=10000
+    )
+
+    with pytest.raises(InfeasibleProblemException) as error:
+        Optimizer(portfolio, parameters, START_DATE)
+
+    message = str(error.value)
+    assert "250.00 must be spent by period 1" in message
+    assert "budget up to it is 200.00" in message
+    assert "Insurance, Rent" in message
+    assert "Taxes" not in message
+
+
+def test_mandatory_expense_due_before_start():
+    portfolio = _portfolio([_expense("Rent", -40, 80), _expense("Taxes", 100, 30)])
+
+    with pytest.raises(
+        InfeasibleProblemException, match="before the first period: Rent"
+    ):
+        check_mandatory_feasibility(portfolio, portfolio.last_periods(START_DATE))
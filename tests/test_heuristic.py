@@ -0,0 +1,113 @@
+import json
+import numpy as np
+import pendulum
+import pytest
+from expenses_opt.constants import BudgetFormulation, Priority, SolveMode
+from expenses_opt.exceptions import InfeasibleProblemException
+from expenses_opt.models.expense import Expense, ExpenseRange
+from expenses_opt.models.input import build_input_data
+from expenses_opt.models.portfolio import Budget, Portfolio
+from expenses_opt.optimization.builder import OptimizerBuilder, OptmizationParameters
+from expenses_opt.optimization.heuristic import GreedyPlanner
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.run import run_optimization
+from expenses_opt.benchmarks.generator import START_DATE, random_portfolio
+
+
+def _parameters(**kwargs):
+    return OptmizationParameters(
+        priority_exponent=2, deviation_weight=0.1, max_time=10000, **kwargs
+    )
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_greedy_schedule_is_feasible(seed):
+    portfolio = random_portfolio(num_expenses=40, iterations=6, seed=seed)
+    planner = GreedyPlanner(portfolio, _parameters(), START_DATE)
+    solution = planner.solve()
+
+    spent_by_period = np.cumsum(solution.spends.sum(axis=0))
+    assert np.all(spent_by_period <= portfolio.budget.capacities + 1e-6)
+
+    periods = np.arange(portfolio.budget.iterations)
+    after_due = periods[None, :] > planner.last_periods[:, None]
+    assert np.all(solution.spends[after_due] == 0)
+
+    totals = solution.total_costs
+    assert np.all(solution.attended[portfolio.mandatory_flags])
+    assert np.all(totals[solution.attended] >= portfolio.minimums[solution.attended])
+    assert np.all(totals <= portfolio.maximums)
+    assert np.all(totals[~solution.attended] == 0)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_greedy_objective_bounded_by_milp(seed):
+    portfolio = random_portfolio(num_expenses=40, iterations=6, seed=seed)
+    parameters = _parameters(warm_start=True)
+
+    heuristic = GreedyPlanner(portfolio, parameters, START_DATE).solve()
+    solution = Optimizer(portfolio, parameters, START_DATE).solve_optimization_problem()
+
+    assert solution.heuristic_objective == pytest.approx(heuristic.objective_value)
+    assert heuristic.objective_value >= solution.objective_value - 1e-6
+    assert solution.heuristic_gap >= -1e-6
+
+
+@pytest.mark.parametrize("formulation", list(BudgetFormulation))
+def test_greedy_schedule_is_a_feasible_hint(formulation):
+    portfolio = random_portfolio(num_expenses=20, iterations=5, seed=4)
+    parameters = _parameters(budget_formulation=formulation)
+
+    heuristic = GreedyPlanner(portfolio, parameters, START_DATE).solve()
+    builder = OptimizerBuilder(portfolio, parameters, START_DATE)
+    solver = builder.build_optimization_problem()
+    hint = builder.hint_from_schedule(heuristic.spends, heuristic.attended)
+
+    variables = solver.variables()
+    assert sorted(hint) == [var.index() for var in variables]
+
+    for constraint in solver.constraints():
+        activity = sum(
+            constraint.GetCoefficient(var) * hint[var.index()] for var in variables
+        )
+        assert constraint.lb() - 1e-6 <= activity <= constraint.ub() + 1e-6
+
+    objective = solver.Objective()
+    value = sum(objective.GetCoefficient(var) * hint[var.index()] for var in variables)
+    assert value == pytest.approx(heuristic.objective_value)
+
+
+def test_heuristic_mode_from_json():
+    with open("test_input.json") as file:
+        raw_data = json.load(file)
+    raw_data["optimization_parameters"]["mode"] = "heuristic"
+
+    input_data = build_input_data(raw_data)
+    solution = run_optimization(input_data)
+
+    assert input_data.optmization_parameters.mode == SolveMode.HEURISTIC
+    # feasible, not proven optimal
+    assert solution["status"] == 1
+    assert solution["error"] == ""
+    assert len(solution["expenses"]) == len(raw_data["expenses"])
+
+
+def test_heuristic_reports_unattended_mandatory_expense():
+    expenses = [
+        Expense(
+            description=description,
+            due_date=pendulum.date(2023, 1, 10),
+            priority=Priority.HIGHT,
+            range=ExpenseRange(minimum=60, maximum=80, target=70),
+            mandatory=True,
+        )
+        for description in ("first", "second")
+    ]
+    # enough total budget, but not before the due date
+    budget = Budget(
+        initial=100, recorrent=100, recurrence=30, last_recurrence=0, iterations=2
+    )
+    portfolio = Portfolio(expenses=expenses, budget=budget)
+
+    with pytest.raises(InfeasibleProblemException, match="second"):
+        GreedyPlanner(portfolio, _parameters(), pendulum.date(2023, 1, 1)).solve()
@@ -0,0 +1,90 @@
+import csv
+import numpy as np
+import pytest
+from expenses_opt.constants import Priority
+from expenses_opt.exceptions import InvalidRowsException
+from expenses_opt.models.expense import build_expense_from_row, build_expenses_from_csv
+from expenses_opt.models.ingestion import iter_expense_columns, read_expense_columns
+
+HEADER = "Item,Data limite,Preço mínimo,Preço desejável,Preço máximo,Prioridade,Obrigatório\n"
+
+
+def _write_csv(tmp_path, rows: list[str]) -> str:
+    path = tmp_path / "expenses.csv"
+    path.write_text(HEADER + "\n".join(rows) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_csv_matches_row_parser():
+    with open("csv_test.csv", encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        next(reader)
+        expected = [build_expense_from_row(row) for row in reader]
+
+    expenses = build_expenses_from_csv("csv_test.csv")
+
+    assert len(expenses) == len(expected)
+    for expense, other in zip(expenses, expected):
+        assert expense.description == other.description
+        assert expense.due_date == other.due_date
+        assert expense.priority == other.priority
+        assert expense.mandatory == other.mandatory
+        assert repr(expense.range) == repr(other.range)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 65536])
+def test_chunks_give_the_same_columns(chunk_size):
+    chunks = list(iter_expense_columns("csv_test.csv", chunk_size=chunk_size))
+    columns = read_expense_columns("csv_test.csv", chunk_size=chunk_size)
+
+    assert len(chunks) == -(-11 // chunk_size)
+    assert len(columns) == 11
+    assert columns.due_dates[0] == np.datetime64("2023-09-30")
+    assert columns.priorities[0] == Priority.LOW.value
+    assert columns.priorities[3] == Priority.MEDIUM.value
+    assert columns.maximums[6] == 800
+    assert columns.mandatory.sum() == 5
+
+
+def test_iso_dates_and_defaults(tmp_path):
+    path = _write_csv(
+        tmp_path,
+        ["A,2023-09-30,10,20,,1,yes", "B,,,,30,,", "C,2023-10-01,1,2,3,3,No"],
+    )
+    columns = read_expense_columns(path)
+
+    assert columns.due_dates.tolist()[0].isoformat() == "2023-09-30"
+    assert np.isnat(columns.due_dates[1])
+    assert columns.maximums[0] == float("inf")
+    assert columns.minimums[1] == 0 and columns.targets[1] == 0
+    assert columns.mandatory.tolist() == [True, False, False]
+
+    expenses = build_expenses_from_csv(path)
+    assert expenses[1].due_date is None
+    assert expenses[0].priority == Priority.HIGHT
+
+
+def test_bad_rows_reported_by_line(tmp_path):
+    path = _write_csv(
+        tmp_path,
+        [
+            "Good,30/09/2023,10,20,30,1,Yes",
+            "Bad date,31/02/2023,10,20,30,1,Yes",
+            "Bad price,30/09/2023,ten,20,30,1,Yes",
+            "Bad priority,30/09/2023,10,20,30,high,Yes",
+            "Bad range,30/09/2023,50,20,30,1,Yes",
+            "Short,30/09/2023,10",
+            "Also good,2023-09-30,10,20,30,2,No",
+        ],
+    )
+
+    with pytest.raises(InvalidRowsException) as error:
+        read_expense_columns(path)
+
+    assert [line for line, _ in error.value.errors] == [3, 4, 5, 6, 7]
+    assert "line 4: invalid minimum price 'ten'" in str(error.value)
+
+    columns = read_expense_columns(path, chunk_size=4, skip_invalid=True)
+    assert columns.descriptions == ["Good", "Also good"]
+    assert len(columns.errors) == 5
+    assert columns.due_dates.tolist()[1].isoformat() == "2023-09-30"
@@ -1,12 +1,26 @@
-import pytest
+import json
 import pendulum
-from expenses_opt.constants import Priority
-from expenses_opt.models.portfolio import Portfolio, Budget
+import pytest
+from ortools.linear_solver import linear_solver_pb2
+from expenses_opt.benchmarks.generator import START_DATE, random_portfolio
+from expenses_opt.constants import (
+    BudgetFormulation,
+    OptimizationObjective,
+    Priority,
+    SolverBackend,
+)
+from expenses_opt.exceptions import InfeasibleProblemException, InvalidDataException
 from expenses_opt.models.expense import Expense, ExpenseRange
-from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.models.input import InputData, build_input_data
+from expenses_opt.models.portfolio import Budget, Portfolio
+from expenses_opt.optimization.builder import OptimizerBuilder, OptmizationParameters
 from expenses_opt.optimization.optimizer import Optimizer
-from expenses_opt.exceptions import InfeasibleProblemException
-from expenses_opt.optimization.run import run_optimization_from_json
+from expenses_opt.optimization.run import (
+    run_optimization,
+    run_optimization_from_json,
+    run_optimizations_batch,
+)
+from expenses_opt.optimization.vectorized import VectorizedOptimizerBuilder
 
 item01 = "Item 01"
 
@@ -31,13 +45,14 @@ def test_update_single_expense_cost():
         portfolio=portfolio, parameters=params, start_date=pendulum.date(2023, 1, 1)
     )
 
-    assert expense.cost == 0
-    assert len(expense.partial_spends) == 0
+    solution = optimizer.solve_optimization_problem()
 
-    optimizer.solve_optimization_problem()
+    assert solution.cost(0) == 1000
+    assert len(solution.partial_spends(0)) == 1
 
-    assert expense.cost == 1000
-    assert len(expense.partial_spends) == 1
+    # the expense itself is left untouched
+    assert expense.cost == 0
+    assert len(expense.partial_spends) == 0
 
 
 def test_optimizer_chooses_high_priority_expense():
@@ -77,14 +92,10 @@ def test_optimizer_chooses_high_priority_expense():
         portfolio=portfolio, parameters=params, start_date=pendulum.date(2023, 1, 1)
     )
 
-    for expense in portfolio.expenses:
-        assert expense.cost == 0
-
-    optimizer.solve_optimization_problem()
+    solution = optimizer.solve_optimization_problem()
 
-    assert expense_high.cost == pytest.approx(1000)
-    assert expense_medium.cost == pytest.approx(0)
-    assert expense_low.cost == pytest.approx(0)
+    assert list(solution.total_costs) == pytest.approx([0, 0, 1000])
+    assert list(solution.attended) == [False, False, True]
 
 
 def test_optimizer_chooses_mandatory_expense():
@@ -125,14 +136,9 @@ def test_optimizer_chooses_mandatory_expense():
         portfolio=portfolio, parameters=params, start_date=pendulum.date(2023, 1, 1)
     )
 
-    for expense in portfolio.expenses:
-        assert expense.cost == 0
+    solution = optimizer.solve_optimization_problem()
 
-    optimizer.solve_optimization_problem()
-
-    assert mandatory_expense.cost == pytest.approx(1000)
-    assert expense_medium.cost == pytest.approx(0)
-    assert expense_hight.cost == pytest.approx(0)
+    assert list(solution.total_costs) == pytest.approx([1000, 0, 0])
 
 
 def test_do_not_spend_after_expense_due_date():
@@ -166,13 +172,13 @@ def test_do_not_spend_after_expense_due_date():
         portfolio=portfolio, parameters=params, start_date=pendulum.date(2023, 1, 1)
     )
 
-    optimizer.solve_optimization_problem()
+    solution = optimizer.solve_optimization_problem()
 
-    assert expense1.cost == pytest.approx(1000)
-    assert expense2.cost == pytest.approx(500)
+    assert solution.cost(0) == pytest.approx(1000)
+    assert solution.cost(1) == pytest.approx(500)
 
-    assert expense1.partial_spends[0] == pytest.approx(0)
-    assert expense2.partial_spends[-1] == pytest.approx(0)
+    assert solution.partial_spends(0)[0] == pytest.approx(0)
+    assert solution.partial_spends(1)[-1] == pytest.approx(0)
 
 
 def test_not_enough_budget_to_cover_min_expenses_raises_error():
@@ -202,3 +208,343 @@ def test_full_optimization():
     solution = run_optimization_from_json("test_input.json")
     assert solution["status"] == 0
     assert solution["error"] == ""
+
+
+def _exported_model(builder: OptimizerBuilder):
+    solver = builder.build_optimization_problem()
+    model = linear_solver_pb2.MPModelProto()
+    solver.ExportModelToProto(model)
+
+    variables = [
+        (var.lower_bound, var.upper_bound, var.is_integer, var.objective_coefficient)
+        for var in model.variable
+    ]
+    constraints = [
+        (
+            cons.lower_bound,
+            cons.upper_bound,
+            sorted(
+                (index, coef)
+                for index, coef in zip(cons.var_index, cons.coefficient)
+                if coef != 0
+            ),
+        )
+        for cons in model.constraint
+    ]
+    return variables, constraints
+
+
+def test_vectorized_builder_matches_default_builder():
+    with open("test_input.json") as file:
+        input_data = build_input_data(json.load(file))
+
+    builders = [
+        builder_class(
+            input_data.portfolio,
+            input_data.optmization_parameters,
+            input_data.start_date,
+        )
+        for builder_class in (OptimizerBuilder, VectorizedOptimizerBuilder)
+    ]
+
+    assert _exported_model(builders[0]) == _exported_model(builders[1])
+
+
+def test_vectorized_optimizer_respects_due_date():
+    expense1 = Expense(
+        description=item01,
+        due_date=pendulum.date(2023, 1, 31),
+        priority=Priority.HIGHT,
+        range=ExpenseRange(1000, 1000, 1000),
+        mandatory=True,
+    )
+
+    expense2 = Expense(
+        description="Item 02",
+        due_date=pendulum.date(2023, 2, 25),
+        priority=Priority.HIGHT,
+        range=ExpenseRange(500, 500, 500),
+        mandatory=True,
+    )
+
+    budget = Budget(
+        initial=500, recorrent=1000, recurrence=30, last_recurrence=0, iterations=2
+    )
+    portfolio = Portfolio(expenses=[expense1, expense2], budget=budget)
+
+    params = OptmizationParameters(
+        priority_exponent=2, deviation_weight=0, max_time=1000, vectorized=True
+    )
+
+    optimizer = Optimizer(
+        portfolio=portfolio, parameters=params, start_date=pendulum.date(2023, 1, 1)
+    )
+    solution = optimizer.solve_optimization_problem()
+
+    assert solution.cost(0) == pytest.approx(1000)
+    assert solution.cost(1) == pytest.approx(500)
+    assert solution.partial_spends(0)[0] == pytest.approx(0)
+    assert solution.partial_spends(1)[-1] == pytest.approx(0)
+
+
+@pytest.mark.parametrize(
+    "formulation", [BudgetFormulation.PERIOD, BudgetFormulation.CUMULATIVE]
+)
+def test_vectorized_builder_matches_default_builder_with_aggregates(formulation):
+    portfolio = random_portfolio(num_expenses=8, iterations=4)
+    params = OptmizationParameters(
+        priority_exponent=2,
+        deviation_weight=0,
+        max_time=1000,
+        budget_formulation=formulation,
+    )
+
+    builders = [
+        builder_class(portfolio, params, START_DATE)
+        for builder_class in (OptimizerBuilder, VectorizedOptimizerBuilder)
+    ]
+
+    assert _exported_model(builders[0]) == _exported_model(builders[1])
+
+
+def test_budget_formulations_have_same_optimum():
+    portfolio = random_portfolio(num_expenses=15, iterations=6, seed=3)
+
+    objectives = list()
+    for formulation in BudgetFormulation:
+        params = OptmizationParameters(
+            priority_exponent=2,
+            deviation_weight=0,
+            max_time=10000,
+            budget_formulation=formulation,
+        )
+        solver = OptimizerBuilder(
+            portfolio, params, START_DATE
+        ).build_optimization_problem()
+        assert solver.Solve() == solver.OPTIMAL
+        objectives.append(solver.Objective().Value())
+
+    assert objectives[0] > 0
+    assert objectives == pytest.approx([objectives[0]] * len(objectives))
+
+
+def test_solver_backends_bound_the_same_optimum():
+    portfolio = random_portfolio(num_expenses=15, iterations=6, seed=3)
+
+    objectives = dict()
+    for backend in (SolverBackend.CBC, SolverBackend.SCIP, SolverBackend.GLOP):
+        params = OptmizationParameters(
+            priority_exponent=2,
+            deviation_weight=0,
+            max_time=10000,
+            solver=backend,
+            num_threads=2,
+            relative_gap=0,
+            presolve=True,
+        )
+        solution = Optimizer(portfolio, params, START_DATE).solve_optimization_problem()
+        objectives[backend] = solution.objective_value
+
+    assert objectives[SolverBackend.SCIP] == pytest.approx(
+        objectives[SolverBackend.CBC]
+    )
+    # the LP relaxation is a lower bound of the MILP optimum
+    assert objectives[SolverBackend.GLOP] <= objectives[SolverBackend.CBC] + 1e-6
+
+
+def test_solver_options_from_json():
+    with open("test_input.json") as file:
+        raw_data = json.load(file)
+
+    raw_data["optimization_parameters"].update(
+        {"solver": "scip", "num_threads": 2, "relative_gap": 0.01}
+    )
+    input_data = build_input_data(raw_data)
+
+    assert input_data.optmization_parameters.solver == SolverBackend.SCIP
+    assert run_optimization(input_data)["status"] == 0
+
+    raw_data["optimization_parameters"]["solver"] = "gurobi"
+    with pytest.raises(InvalidDataException):
+        build_input_data(raw_data)
+
+
+def test_no_variables_after_due_date():
+    expense1 = Expense(
+        description=item01,
+        due_date=pendulum.date(2023, 1, 31),
+        priority=Priority.HIGHT,
+        range=ExpenseRange(100, 100, 100),
+    )
+    expense2 = Expense(
+        description="Item 02",
+        due_date=pendulum.date(2023, 4, 30),
+        priority=Priority.HIGHT,
+        range=ExpenseRange(100, 100, 100),
+    )
+    budget = Budget(
+        initial=500, recorrent=1000, recurrence=30, last_recurrence=0, iterations=4
+    )
+    portfolio = Portfolio(expenses=[expense1, expense2], budget=budget)
+    params = OptmizationParameters(
+        priority_exponent=2, deviation_weight=0, max_time=1000
+    )
+
+    for builder_class in (OptimizerBuilder, VectorizedOptimizerBuilder):
+        builder = builder_class(portfolio, params, pendulum.date(2023, 1, 1))
+        solver = builder.build_optimization_problem()
+
+        assert list(builder.last_periods) == [1, 3]
+        assert [len(x_i) for x_i in builder.variables["x"]] == [2, 4]
+        assert solver.NumConstraints() == 5 * 2 + 4
+
+
+def test_batch_matches_single_runs():
+    with open("test_input.json") as file:
+        raw_data = json.load(file)
+
+    scenarios = [
+        OptmizationParameters(
+            priority_exponent=exponent,
+            deviation_weight=0,
+            max_time=10000,
+            objective=objective,
+        )
+        for exponent in (1, 3)
+        for objective in OptimizationObjective
+    ]
+
+    results = run_optimizations_batch(build_input_data(raw_data), scenarios, workers=2)
+
+    assert len(results) == len(scenarios)
+    for scenario, result in zip(scenarios, results):
+        input_data = build_input_data(raw_data)
+        input_data.optmization_parameters = scenario
+        assert result == run_optimization(input_data)
+
+
+def test_batch_reports_failed_scenarios():
+    expense = Expense(
+        description=item01,
+        due_date=pendulum.date(2023, 1, 31),
+        priority=Priority.LOW,
+        range=ExpenseRange(900, 1200, 1000),
+        mandatory=True,
+    )
+    budget = Budget(
+        initial=100, recorrent=500, recurrence=30, last_recurrence=0, iterations=1
+    )
+    input_data = InputData(
+        start_date=pendulum.date(2023, 1, 1),
+        portfolio=Portfolio(expenses=[expense], budget=budget),
+        optmization_parameters=None,
+    )
+    scenarios = [
+        OptmizationParameters(priority_exponent=2, deviation_weight=0, max_time=1000)
+        for _ in range(2)
+    ]
+
+    results = run_optimizations_batch(input_data, scenarios, workers=2)
+
+    assert [result["status"] for result in results] == [1, 1]
+    assert all(result["error"] for result in results)
+
+
+def test_optimizer_can_solve_many_times():
+    portfolio = random_portfolio(num_expenses=10, iterations=3)
+    params = OptmizationParameters(
+        priority_exponent=2, deviation_weight=0, max_time=10000
+    )
+    optimizer = Optimizer(portfolio=portfolio, parameters=params, start_date=START_DATE)
+
+    first = optimizer.solve_optimization_problem()
+    second = optimizer.solve_optimization_problem()
+
+    assert first.objective_value == pytest.approx(second.objective_value)
+    assert first.spends.shape == (10, 3)
+    assert all(expense.partial_spends == [] for expense in portfolio.expenses)
+
+    with pytest.raises(ValueError):
+        first.spends[0, 0] = 1
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+@pytest.mark.parametrize("formulation", list(BudgetFormulation))
+def test_incremental_changes_match_fresh_build(vectorized, formulation):
+    portfolio = random_portfolio(num_expenses=12, iterations=4, seed=5)
+    extra = random_portfolio(num_expenses=2, iterations=4, seed=6).expenses
+    params = OptmizationParameters(
+        priority_exponent=2,
+        deviation_weight=0.01,
+        max_time=10000,
+        vectorized=vectorized,
+        budget_formulation=formulation,
+    )
+
+    optimizer = Optimizer(portfolio=portfolio, parameters=params, start_date=START_DATE)
+    optimizer.solve_optimization_problem()
+
+    budget = portfolio.budget
+    new_budget = Budget(
+        initial=budget.initial * 1.5,
+        recorrent=budget.recorrent * 0.8,
+        recurrence=budget.recurrence,
+        last_recurrence=budget.last_recurrence,
+        iterations=budget.iterations,
+    )
+
+    optimizer.add_expense(extra[0])
+    optimizer.add_expense(extra[1])
+    optimizer.remove_expense(3)
+    optimizer.update_range(0, ExpenseRange(50, 400, 300))
+    optimizer.update_priority(1, Priority.HIGHT)
+    optimizer.update_budget(new_budget)
+    incremental = optimizer.solve_optimization_problem()
+
+    fresh = Optimizer(
+        portfolio=Portfolio(expenses=optimizer.expenses, budget=new_budget),
+        parameters=params,
+        start_date=START_DATE,
+    ).solve_optimization_problem()
+
+    assert len(optimizer.expenses) == 13
+    assert optimizer.expenses[0].range.target == 300
+    assert optimizer.expenses[1].priority == Priority.HIGHT
+    assert len(portfolio.expenses) == 12
+    assert incremental.spends.shape == fresh.spends.shape
+    assert incremental.objective_value == pytest.approx(fresh.objective_value)
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_bulk_extraction_matches_variable_values(vectorized):
+    portfolio = random_portfolio(num_expenses=40, iterations=6, seed=7)
+    params = OptmizationParameters(
+        priority_exponent=2, deviation_weight=0.2, max_time=10000, vectorized=vectorized
+    )
+    optimizer = Optimizer(portfolio=portfolio, parameters=params, start_date=START_DATE)
+    solution = optimizer.solve_optimization_problem()
+
+    for i_index, x_i in enumerate(optimizer.variables["x"]):
+        expected = [round(x_i_j.solution_value(), 2) for x_i_j in x_i]
+        expected += [0.0] * (portfolio.budget.iterations - len(x_i))
+        assert solution.partial_spends(i_index) == expected
+    assert solution.attended.tolist() == [
+        y_i.solution_value() > 0.5 for y_i in optimizer.variables["y"]
+    ]
+
+
+def test_monthly_recurrence_from_json():
+    with open("test_input.json") as file:
+        raw_data = json.load(file)
+    raw_data["budget"]["recurrence"] = "monthly"
+
+    input_data = build_input_data(raw_data)
+    solution = run_optimization(input_data)
+
+    calendar = input_data.portfolio.budget.calendar(input_data.start_date)
+    assert solution["status"] == 0
+    assert solution["periods"] == [str(date) for date in calendar.start_dates()]
+    assert all(
+        len(expense["partial_spends"]) == len(solution["periods"])
+        for expense in solution["expenses"]
+    )
@@ -1,13 +1,21 @@
+import numpy as np
 import pytest
 import pendulum
+from expenses_opt.constants import Priority
+from expenses_opt.exceptions import InvalidDataException
 from expenses_opt.models.expense import (
+    Expense,
+    ExpenseRange,
     build_expenses_from_csv,
 )
+from expenses_opt.models.ingestion import read_expense_columns
 from expenses_opt.models.portfolio import (
     Budget,
     Portfolio,
     build_budget_from_parameters,
 )
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.optimizer import Optimizer
 from expenses_opt.utils.utils import get_date_from_string
 
 
@@ -32,6 +40,11 @@ def test_total_budget(budget_factory):
     assert budget.total_budget == 4500
 
 
+def test_budget_capacities(budget_factory):
+    budget = budget_factory(iterations=3)
+    assert list(budget.capacities) == [500, 4500, 8500]
+
+
 def test_build_budget_from_parameters():
     my_params = {
         "initial": 500,
@@ -48,8 +61,183 @@ def test_build_budget_from_parameters():
     assert budget.total_budget == 8500
 
 
+@pytest.mark.parametrize(
+    "recurrence", ["weekly", "30", -7, -7.0, 7.5, float("inf"), True, None]
+)
+def test_build_budget_rejects_unknown_recurrences(recurrence):
+    params = {
+        "initial": 500,
+        "recorrent": 4000,
+        "recurrence": recurrence,
+        "last_recurrence": "2023-06-05",
+        "iterations": 3,
+    }
+
+    with pytest.raises(InvalidDataException):
+        build_budget_from_parameters(params, get_date_from_string("2023-06-11"))
+
+
+def test_build_budget_accepts_whole_float_recurrences():
+    params = {
+        "initial": 500,
+        "recorrent": 4000,
+        "recurrence": 30.0,
+        "last_recurrence": "2023-06-05",
+        "iterations": 3,
+    }
+
+    budget = build_budget_from_parameters(params, get_date_from_string("2023-06-11"))
+
+    assert budget.recurrence == 30
+    assert isinstance(budget.recurrence, int)
+
+
 def test_build_portfolio(budget_factory):
     budget = budget_factory()
     expenses = build_expenses_from_csv("csv_test.csv")
     portfolio = Portfolio(expenses, budget)
     assert portfolio.mandatory_total_min_spend == 570
+
+
+def test_portfolio_from_columns(budget_factory):
+    budget = budget_factory()
+    expenses = build_expenses_from_csv("csv_test.csv")
+    portfolio = Portfolio.from_columns(read_expense_columns("csv_test.csv"), budget)
+
+    assert len(portfolio) == len(expenses)
+    assert portfolio.mandatory_total_min_spend == 570
+    assert portfolio.descriptions == [expense.description for expense in expenses]
+    assert [repr(expense) for expense in portfolio.expenses] == [
+        repr(expense) for expense in expenses
+    ]
+    assert [expense.due_date for expense in portfolio.expenses] == [
+        expense.due_date for expense in expenses
+    ]
+
+
+def test_portfolio_builds_expenses_once(budget_factory):
+    portfolio = Portfolio.from_columns(
+        read_expense_columns("csv_test.csv"), budget_factory()
+    )
+
+    assert portfolio.expenses[0] is portfolio.expenses[0]
+    assert portfolio.expenses[-1] is portfolio.expense(len(portfolio) - 1)
+    assert not hasattr(portfolio.expenses[0], "__dict__")
+    assert not portfolio.minimums.flags.writeable
+
+
+def test_portfolio_changes_return_new_portfolios(budget_factory):
+    budget = budget_factory()
+    portfolio = Portfolio(build_expenses_from_csv("csv_test.csv"), budget)
+    extra = Expense(
+        description="Extra",
+        due_date=pendulum.date(2023, 9, 30),
+        priority=Priority.HIGHT,
+        range=ExpenseRange(minimum=10, maximum=30, target=20),
+        mandatory=True,
+    )
+
+    added = portfolio.with_expense(extra)
+    assert len(added) == len(portfolio) + 1
+    assert added.mandatory_total_min_spend == 580
+    assert added.expenses[-1] is not extra
+    assert added.expenses[-1].description == extra.description
+    assert added.expenses[-1].range.minimum == extra.range.minimum
+
+    removed = added.without_expense(0)
+    assert removed.descriptions == added.descriptions[1:]
+
+    replaced = portfolio.with_replaced_expense(0, extra)
+    assert replaced.descriptions[0] == "Extra"
+    assert replaced.priorities[0] == Priority.HIGHT.value
+    assert portfolio.descriptions[0] != "Extra"
+
+    assert portfolio.with_budget(budget_factory(iterations=5)).budget.iterations == 5
+
+
+def test_changed_expenses_reach_the_columns_and_the_solve():
+    expenses = build_expenses_from_csv("csv_test.csv")
+    portfolio = Portfolio(expenses, Budget(300, 400, 30, 0, iterations=4))
+    before = portfolio.with_budget(portfolio.budget)
+    params = OptmizationParameters(
+        priority_exponent=2, deviation_weight=0.2, max_time=10000
+    )
+    start = pendulum.date(2023, 6, 5)
+    first = Optimizer(portfolio, params, start).solve_optimization_problem()
+    assert not first.attended[0]
+
+    portfolio.expenses[0].mandatory = True
+    portfolio.expenses[1].range = ExpenseRange(1, 2, 1.5)
+    portfolio.expenses[2].range.maximum = 40
+    portfolio.expenses.append(expenses[0])
+
+    assert portfolio.mandatory_flags[0]
+    assert portfolio.minimums[1] == 1
+    assert portfolio.maximums[2] == 40
+    assert len(portfolio) == len(expenses) + 1
+    assert portfolio.descriptions[-1] == expenses[0].description
+    # the given objects and other portfolios are left as they were
+    assert not expenses[0].mandatory
+    assert expenses[1].range.minimum == 30
+    assert not before.mandatory_flags[0]
+    assert before.minimums[1] == 30
+
+    solution = Optimizer(portfolio, params, start).solve_optimization_problem()
+    assert solution.attended[0]
+    assert solution.total_costs[0] >= 180
+    assert solution.total_costs[1] <= 2
+    assert solution.total_costs[2] <= 40
+
+    del portfolio.expenses[0]
+    assert len(portfolio) == len(expenses)
+    assert portfolio.minimums[0] == 1
+
+
+@pytest.mark.parametrize("recurrence", [0, 7, 30])
+@pytest.mark.parametrize("last_recurrence", [0, 12])
+def test_calendar_matches_fixed_recurrence(recurrence, last_recurrence):
+    start = pendulum.date(2023, 6, 5)
+    budget = Budget(1000, 500, recurrence, last_recurrence, iterations=6)
+    expenses = [
+        Expense(
+            description=f"Item {days}",
+            due_date=start.add(days=days),
+            priority=Priority.LOW,
+            range=ExpenseRange(10, 20, 15),
+        )
+        for days in range(-20, 220, 3)
+    ]
+    portfolio = Portfolio(expenses, budget)
+
+    due_days = np.array([expense.get_due_date_in_days(start) for expense in expenses])
+    due_days += last_recurrence
+    if recurrence:
+        expected = np.clip(due_days // recurrence, -1, 5)
+    else:
+        expected = np.where(due_days >= 0, 5, -1)
+
+    assert portfolio.last_periods(start).tolist() == expected.tolist()
+
+
+def test_monthly_calendar_follows_month_ends():
+    params = {
+        "initial": 500,
+        "recorrent": 4000,
+        "recurrence": "monthly",
+        "last_recurrence": "31/01/2024",
+        "iterations": 4,
+    }
+    start = pendulum.date(2024, 2, 10)
+    budget = build_budget_from_parameters(params, start)
+    calendar = budget.calendar(start)
+
+    assert budget.monthly
+    assert [str(date) for date in calendar.start_dates()] == [
+        "2024-01-31",
+        "2024-02-29",
+        "2024-03-31",
+        "2024-04-30",
+    ]
+    assert calendar.period_of(pendulum.date(2024, 3, 30)) == 1
+    assert calendar.period_of(pendulum.date(2024, 3, 31)) == 2
+    assert calendar.period_of(pendulum.date(2024, 1, 30)) == -1
@@ -0,0 +1,108 @@
+import json
+import numpy as np
+import pytest
+from expenses_opt.constants import Priority
+from expenses_opt.exceptions import InfeasibleProblemException
+from expenses_opt.models.expense import Expense, ExpenseRange
+from expenses_opt.models.input import build_input_data
+from expenses_opt.models.portfolio import Budget, Portfolio
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.presolve import DecomposedOptimizer, Presolve
+from expenses_opt.optimization.run import run_optimization
+from expenses_opt.benchmarks.generator import START_DATE, random_portfolio
+
+
+def _parameters(**kwargs):
+    return OptmizationParameters(
+        priority_exponent=2, deviation_weight=0.2, max_time=10000, **kwargs
+    )
+
+
+def _expense(description, days, minimum, target, priority=Priority.HIGHT, **kwargs):
+    return Expense(
+        description=description,
+        due_date=START_DATE.add(days=days),
+        priority=priority,
+        range=ExpenseRange(minimum=minimum, maximum=target * 2, target=target),
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("seed", [0, 1, 3])
+@pytest.mark.parametrize("budget_ratio", [0.3, 0.8, 1.5])
+def test_decomposition_matches_full_model(seed, budget_ratio):
+    portfolio = random_portfolio(
+        num_expenses=60, iterations=6, seed=seed, budget_ratio=budget_ratio
+    )
+    parameters = _parameters()
+
+    full = Optimizer(portfolio, parameters, START_DATE).solve_optimization_problem()
+    decomposed = DecomposedOptimizer(
+        portfolio, parameters, START_DATE
+    ).solve_optimization_problem()
+
+    assert decomposed.objective_value == pytest.approx(full.objective_value, abs=1e-4)
+
+    spent_by_period = np.cumsum(decomposed.spends.sum(axis=0))
+    assert np.all(spent_by_period <= portfolio.budget.capacities + 0.01)
+    assert np.all(decomposed.attended[portfolio.mandatory_flags])
+
+
+def test_presolve_settles_loose_budget():
+    budget = Budget(
+        initial=100, recorrent=100, recurrence=30, last_recurrence=0, iterations=3
+    )
+    portfolio = Portfolio(
+        [
+            # more than the first period holds, the first row binds
+            _expense("Early", 10, 50, 80),
+            _expense("Early too", 20, 20, 40),
+            # fits after the first period, whatever the early ones spend
+            _expense("Late", 70, 10, 50),
+            # attending costs A = 0.2, not attending 1 / 3^2
+            _expense("Cheap", 70, 10, 20, priority=Priority.LOW),
+        ],
+        budget,
+    )
+    presolve = Presolve(portfolio, _parameters(), START_DATE)
+
+    assert presolve.horizon == 1
+    assert presolve.coupled.tolist() == [True, True, False, False]
+    assert presolve.separable.tolist() == [False, False, True, False]
+    assert presolve.skipped.tolist() == [False, False, False, True]
+    assert presolve.separable_schedule()[2].tolist() == [0, 50, 0]
+
+    solution = DecomposedOptimizer(
+        portfolio, _parameters(), START_DATE
+    ).solve_optimization_problem()
+    full = Optimizer(portfolio, _parameters(), START_DATE).solve_optimization_problem()
+    assert solution.objective_value == pytest.approx(full.objective_value)
+    assert solution.total_costs[2:].tolist() == [50, 0]
+
+
+def test_presolve_rejects_unreachable_mandatory_expense():
+    budget = Budget(
+        initial=10, recorrent=100, recurrence=30, last_recurrence=0, iterations=3
+    )
+    portfolio = Portfolio(
+        [_expense("Rent", 10, 50, 80, mandatory=True)],
+        budget,
+    )
+
+    with pytest.raises(InfeasibleProblemException, match="Rent"):
+        Presolve(portfolio, _parameters(), START_DATE)
+
+
+def test_decompose_option_from_json():
+    with open("test_input.json") as file:
+        raw_data = json.load(file)
+    expected = run_optimization(build_input_data(raw_data))
+
+    raw_data["optimization_parameters"]["decompose"] = True
+    solution = run_optimization(build_input_data(raw_data))
+
+    assert solution["status"] == expected["status"]
+    assert sum(expense["total_cost"] for expense in solution["expenses"]) == (
+        pytest.approx(sum(expense["total_cost"] for expense in expected["expenses"]))
+    )
@@ -0,0 +1,79 @@
+import json
+import numpy as np
+import pytest
+from expenses_opt.constants import SolverBackend
+from expenses_opt.models.input import build_input_data
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.relaxation import RelaxAndRoundOptimizer
+from expenses_opt.optimization.run import run_optimization
+from expenses_opt.benchmarks.generator import START_DATE, random_portfolio
+
+
+def _parameters(**kwargs):
+    return OptmizationParameters(
+        priority_exponent=2, deviation_weight=0.2, max_time=10000, **kwargs
+    )
+
+
+@pytest.mark.parametrize("solver", [SolverBackend.CBC, SolverBackend.PDLP])
+@pytest.mark.parametrize("budget_ratio", [0.3, 0.8])
+def test_rounded_plan_is_feasible_and_bounded(solver, budget_ratio):
+    portfolio = random_portfolio(
+        num_expenses=60, iterations=6, seed=2, budget_ratio=budget_ratio
+    )
+    parameters = _parameters(solver=solver)
+
+    solution = RelaxAndRoundOptimizer(
+        portfolio, parameters, START_DATE
+    ).solve_optimization_problem()
+    milp = Optimizer(portfolio, _parameters(), START_DATE).solve_optimization_problem()
+
+    assert solution.bound <= milp.objective_value + 1e-4
+    assert milp.objective_value <= solution.objective_value + 1e-4
+    assert solution.gap == pytest.approx(
+        (solution.objective_value - solution.bound) / solution.objective_value
+    )
+
+    spent_by_period = np.cumsum(solution.spends.sum(axis=0))
+    assert np.all(spent_by_period <= portfolio.budget.capacities + 0.01)
+    assert np.all(solution.attended[portfolio.mandatory_flags])
+    totals = solution.total_costs[solution.attended]
+    assert np.all(totals >= portfolio.minimums[solution.attended] - 0.01)
+    assert not solution.spends[~solution.attended].any()
+
+
+def test_rounding_keeps_expenses_funded_below_half_their_maximum():
+    # Item 03 is funded at its target, 30 of a maximum of 80, so its relaxed
+    # y_i is below 0.5
+    with open("test_input.json") as file:
+        input_data = build_input_data(json.load(file))
+    arguments = (
+        input_data.portfolio,
+        input_data.optmization_parameters,
+        input_data.start_date,
+    )
+
+    solution = RelaxAndRoundOptimizer(*arguments).solve_optimization_problem()
+    milp = Optimizer(*arguments).solve_optimization_problem()
+
+    assert solution.objective_value == pytest.approx(milp.objective_value, abs=1e-6)
+    assert np.array_equal(solution.attended, milp.attended)
+    assert solution.gap == pytest.approx(0, abs=1e-6)
+
+
+def test_relax_mode_from_json():
+    with open("test_input.json") as file:
+        raw_data = json.load(file)
+    expected = run_optimization(build_input_data(raw_data))
+
+    raw_data["optimization_parameters"]["mode"] = "relax"
+    solution = run_optimization(build_input_data(raw_data))
+
+    # feasible, not proven optimal
+    assert solution["status"] == 1
+    assert solution["error"] == ""
+    assert len(solution["expenses"]) == len(expected["expenses"])
+    assert solution["bound"] >= 0
+    assert 0 <= solution["gap"] <= 1
+    assert "bound" not in expected
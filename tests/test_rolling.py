@@ -0,0 +1,81 @@
+import json
+import numpy as np
+import pytest
+from expenses_opt.exceptions import InvalidDataException
+from expenses_opt.models.input import build_input_data
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.rolling import RollingHorizonOptimizer
+from expenses_opt.optimization.run import run_optimization
+from expenses_opt.benchmarks.generator import START_DATE, random_portfolio
+
+
+def _parameters(**kwargs):
+    return OptmizationParameters(
+        priority_exponent=2, deviation_weight=0.2, max_time=10000, **kwargs
+    )
+
+
+def test_windows_advance_by_the_horizon():
+    portfolio = random_portfolio(num_expenses=10, iterations=24, seed=1)
+
+    for rolling_horizon, num_windows in [(6, 4), (5, 5), (24, 1), (30, 1)]:
+        rolling = RollingHorizonOptimizer(
+            portfolio, _parameters(rolling_horizon=rolling_horizon), START_DATE
+        )
+        assert rolling.num_windows == num_windows
+
+
+def test_single_window_matches_full_model():
+    portfolio = random_portfolio(num_expenses=60, iterations=6, seed=1)
+    parameters = _parameters(rolling_horizon=6)
+
+    full = Optimizer(portfolio, parameters, START_DATE).solve_optimization_problem()
+    rolling = RollingHorizonOptimizer(portfolio, parameters, START_DATE)
+
+    assert rolling.num_windows == 1
+    solution = rolling.solve_optimization_problem()
+    assert solution.objective_value == pytest.approx(full.objective_value, abs=1e-2)
+
+
+@pytest.mark.parametrize("budget_ratio", [0.3, 0.8])
+def test_rolling_horizon_is_feasible_and_close(budget_ratio):
+    portfolio = random_portfolio(
+        num_expenses=60, iterations=12, seed=2, budget_ratio=budget_ratio
+    )
+    parameters = _parameters(rolling_horizon=2)
+
+    full = Optimizer(portfolio, parameters, START_DATE).solve_optimization_problem()
+    rolling = RollingHorizonOptimizer(portfolio, parameters, START_DATE)
+    assert rolling.num_windows > 1
+    solution = rolling.solve_optimization_problem()
+
+    spent_by_period = np.cumsum(solution.spends.sum(axis=0))
+    assert np.all(spent_by_period <= portfolio.budget.capacities + 0.01)
+    assert np.all(solution.attended[portfolio.mandatory_flags])
+    # no spend after the due date
+    periods = np.arange(portfolio.budget.iterations)
+    late = periods[None, :] > portfolio.last_periods(START_DATE)[:, None]
+    assert not solution.spends[late].any()
+
+    # each window only sees the later expenses through their relaxation
+    assert solution.objective_value == pytest.approx(full.objective_value, rel=1e-2)
+
+
+def test_rolling_horizon_parameters_are_checked():
+    with pytest.raises(InvalidDataException):
+        _parameters(rolling_horizon=0)
+
+
+def test_rolling_horizon_option_from_json():
+    with open("test_input.json") as file:
+        raw_data = json.load(file)
+    expected = run_optimization(build_input_data(raw_data))
+
+    raw_data["optimization_parameters"]["rolling_horizon"] = 1
+    solution = run_optimization(build_input_data(raw_data))
+
+    # feasible, not proven optimal
+    assert solution["status"] == 1
+    assert solution["error"] == ""
+    assert len(solution["expenses"]) == len(expected["expenses"])
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+from ortools.linear_solver import linear_solver_pb2
+from expenses_opt.constants import ModelFormat
+from expenses_opt.exceptions import InvalidDataException
+from expenses_opt.models.portfolio import Budget
+from expenses_opt.optimization.builder import OptmizationParameters
+from expenses_opt.optimization.optimizer import Optimizer
+from expenses_opt.optimization.serialization import layout_path, read_model, write_model
+from expenses_opt.benchmarks.generator import START_DATE, random_portfolio
+
+
+def _parameters(**kwargs):
+    return OptmizationParameters(
+        priority_exponent=2, deviation_weight=0.2, max_time=10000, **kwargs
+    )
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+@pytest.mark.parametrize("extension", ["pb", "mps"])
+def test_loaded_model_solves_like_the_built_one(tmp_path, vectorized, extension):
+    portfolio = random_portfolio(num_expenses=30, iterations=4, seed=3)
+    parameters = _parameters(vectorized=vectorized)
+    path = str(tmp_path / f"model.{extension}")
+
+    built = Optimizer(portfolio, parameters, START_DATE)
+    built.export_model(path)
+    expected = built.solve_optimization_problem()
+
+    loaded = Optimizer(portfolio, parameters, START_DATE, model_path=path)
+    solution = loaded.solve_optimization_problem()
+
+    assert solution.objective_value == pytest.approx(expected.objective_value)
+    assert np.allclose(solution.spends, expected.spends)
+    assert solution.attended.tolist() == expected.attended.tolist()
+
+
+def test_loaded_model_takes_budget_updates(tmp_path):
+    portfolio = random_portfolio(num_expenses=30, iterations=4, seed=4)
+    budget = portfolio.budget
+    tighter = Budget(
+        initial=budget.initial / 2,
+        recorrent=budget.recorrent / 2,
+        recurrence=budget.recurrence,
+        last_recurrence=budget.last_recurrence,
+        iterations=budget.iterations,
+    )
+    path = str(tmp_path / "model.mps")
+    Optimizer(portfolio, _parameters(), START_DATE).export_model(path)
+
+    loaded = Optimizer(portfolio, _parameters(), START_DATE, model_path=path)
+    loaded.update_budget(tighter)
+    solution = loaded.solve_optimization_problem()
+
+    expected = Optimizer(
+        portfolio.with_budget(tighter), _parameters(), START_DATE
+    ).solve_optimization_problem()
+    assert solution.objective_value == pytest.approx(expected.objective_value)
+
+
+def test_lp_is_export_only(tmp_path):
+    portfolio = random_portfolio(num_expenses=5, iterations=3)
+    path = str(tmp_path / "model.lp")
+    Optimizer(portfolio, _parameters(), START_DATE).export_model(path)
+
+    with open(path) as file:
+        assert "Subject to" in file.read()
+    with pytest.raises(InvalidDataException):
+        Optimizer(portfolio, _parameters(), START_DATE, model_path=path)
+
+
+def test_model_of_another_portfolio_is_rejected(tmp_path):
+    path = str(tmp_path / "model.pb")
+    Optimizer(
+        random_portfolio(num_expenses=5, iterations=3), _parameters(), START_DATE
+    ).export_model(path, ModelFormat.PROTO)
+
+    with pytest.raises(InvalidDataException):
+        Optimizer(
+            random_portfolio(num_expenses=6, iterations=3),
+            _parameters(),
+            START_DATE,
+            model_path=path,
+        )
+
+
+def test_mps_keeps_order_and_precision(tmp_path):
+    model_proto = linear_solver_pb2.MPModelProto(objective_offset=1234.5678901)
+    model_proto.variable.add(
+        lower_bound=0, upper_bound=1, objective_coefficient=1 / 9, is_integer=True
+    )
+    model_proto.variable.add(lower_bound=-np.inf, upper_bound=np.inf)
+    model_proto.variable.add(lower_bound=2.5, upper_bound=2.5)
+    model_proto.constraint.add(
+        lower_bound=10.25, upper_bound=123456.789, var_index=[0, 1], coefficient=[1, 2]
+    )
+    model_proto.constraint.add(
+        lower_bound=-np.inf, upper_bound=7, var_index=[2], coefficient=[1 / 3]
+    )
+    model_proto.constraint.add(
+        lower_bound=-np.inf, upper_bound=np.inf, var_index=[0, 2], coefficient=[3, 4]
+    )
+    path = str(tmp_path / "model.mps")
+
+    write_model(model_proto, {"variables": {}}, path, ModelFormat.MPS)
+    loaded, layout = read_model(path)
+
+    assert layout == {"variables": {}, "format": "mps"}
+    assert loaded.objective_offset == model_proto.objective_offset
+    for field in ("lower_bound", "upper_bound", "objective_coefficient", "is_integer"):
+        assert [getattr(var, field) for var in loaded.variable] == [
+            getattr(var, field) for var in model_proto.variable
+        ]
+    assert len(loaded.constraint) == len(model_proto.constraint)
+    for constraint, expected in zip(loaded.constraint, model_proto.constraint):
+        assert constraint.lower_bound == expected.lower_bound
+        assert constraint.upper_bound == expected.upper_bound
+        assert list(constraint.var_index) == list(expected.var_index)
+        assert list(constraint.coefficient) == list(expected.coefficient)
+    assert layout_path(path).endswith(".layout.json")
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import os
+import time
+import pytest
+from expenses_opt.optimization.run import run_optimization_from_raw_data
+from expenses_opt.service import (
+    DeadlineExceeded,
+    OptimizationService,
+    apply_deadline,
+)
+
+
+@pytest.fixture
+def raw_data():
+    with open("test_input.json") as file:
+        return json.load(file)
+
+
+def _slow_solve(raw_data, deadline):
+    time.sleep(raw_data.get("sleep", 0))
+    return {"status": 0, "expenses": [], "error": ""}
+
+
+def _crashing_solve(raw_data, deadline):
+    if raw_data.get("crash"):
+        # a worker killed by the system, no exception reaches the pool
+        os._exit(1)
+    return _slow_solve(raw_data, deadline)
+
+
+async def _request(port, method, path, payload=None, headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if payload is None else json.dumps(payload).encode()
+    lines = [f"{method} {path} HTTP/1.1", f"Content-Length: {len(body)}"] + [
+        f"{name}: {value}" for name, value in (headers or {}).items()
+    ]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    head, _, content = response.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    return status, json.loads(content)
+
+
+def _run(scenario, **kwargs):
+    async def main():
+        async with OptimizationService(port=0, **kwargs) as service:
+            return await scenario(service.port)
+
+    return asyncio.run(main())
+
+
+def test_optimize_matches_library(raw_data):
+    async def scenario(port):
+        return await _request(port, "POST", "/optimize", raw_data)
+
+    status, result = _run(scenario, workers=1)
+
+    assert status == 200
+    assert result == run_optimization_from_raw_data(raw_data)
+
+
+def test_full_queue_is_refused():
+    async def scenario(port):
+        slow = asyncio.create_task(_request(port, "POST", "/optimize", {"sleep": 1}))
+        await asyncio.sleep(0.2)
+        refused = await _request(port, "POST", "/optimize", {"sleep": 0})
+        health = await _request(port, "GET", "/health")
+        return await slow, refused, health
+
+    slow, refused, health = _run(scenario, workers=1, max_pending=1, solve=_slow_solve)
+
+    assert slow[0] == 200
+    assert refused[0] == 503
+    assert refused[1]["error"] == "Too many pending requests"
+    assert health[1]["pending"] == 1
+
+
+def test_service_recovers_from_a_dead_worker():
+    async def scenario(port):
+        crashed = await _request(port, "POST", "/optimize", {"crash": True})
+        after = [await _request(port, "POST", "/optimize", {}) for _ in range(2)]
+        health = await _request(port, "GET", "/health")
+        return crashed, after, health
+
+    crashed, after, health = _run(scenario, workers=1, solve=_crashing_solve)
+
+    assert crashed[0] == 500
+    assert crashed[1]["error"] == "Solver process died"
+    assert [status for status, _ in after] == [200, 200]
+    assert health[1]["pending"] == 0
+
+
+def test_deadline_exceeded():
+    async def scenario(port):
+        return await _request(
+            port, "POST", "/optimize", {"sleep": 2}, {"X-Deadline-Ms": 300}
+        )
+
+    status, result = _run(scenario, workers=1, solve=_slow_solve)
+
+    assert status == 504
+    assert result["status"] == 1
+
+
+def test_deadline_bounds_solver_time():
+    raw_data = {"optimization_parameters": {"max_time": 60000}}
+
+    bounded = apply_deadline(raw_data, time.time() + 2)
+    assert 1000 < bounded["optimization_parameters"]["max_time"] <= 1800
+    assert raw_data["optimization_parameters"]["max_time"] == 60000
+
+    assert apply_deadline(raw_data, None) is raw_data
+    with pytest.raises(DeadlineExceeded):
+        apply_deadline(raw_data, time.time() + 0.1)
+
+
+def test_bad_requests():
+    async def scenario(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST /optimize HTTP/1.1\r\nContent-Length: 3\r\n\r\n{x}")
+        await writer.drain()
+        invalid_json = await reader.read()
+        writer.close()
+
+        return (
+            invalid_json,
+            await _request(port, "POST", "/optimize", {"start_date": "2023-06-11"}),
+            await _request(port, "GET", "/unknown"),
+            await _request(port, "GET", "/optimize"),
+        )
+
+    invalid_json, invalid_input, unknown, wrong_method = _run(scenario, workers=1)
+
+    assert invalid_json.startswith(b"HTTP/1.1 400")
+    assert invalid_input[0] == 400
+    assert unknown[0] == 404
+    assert wrong_method[0] == 405